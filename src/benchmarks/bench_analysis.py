@@ -0,0 +1,76 @@
+import gc
+import logging
+import os
+import pathlib
+import shutil
+import sys
+import tempfile
+import time
+
+file_path = os.path.dirname(os.path.realpath(__file__))
+src_dir = str(pathlib.Path(file_path).parent.absolute())
+sys.path.append(src_dir)
+
+from code_representation import CodeRepresenter
+from get_context import CodeParser
+
+TEST_DATA_DIR = os.path.join(src_dir, "test", "test_data")
+COPIES = 100
+ROUNDS = 5
+
+
+def run(working_dir: str, files: list[str]) -> tuple[float, float]:
+    """
+    Parse the files and time the analysis passes run by main.py
+
+    :param working_dir: path to the code
+    :type working_dir: str
+    :param files: files to parse
+    :type files: list[str]
+
+    :return: seconds spent in the per object analysis and in resolving calls across files
+    :return type: tuple[float, float]
+    """
+    code_parser = CodeParser(
+        code_representer=CodeRepresenter(),
+        working_dir=working_dir,
+        logger=logging.getLogger(__name__),
+        debug=True,
+        files=files,
+    )
+    # keep garbage collection of the parsed trees out of the measurement
+    gc.collect()
+    gc.freeze()
+    start = time.perf_counter()
+    code_parser.extract_args_and_return_type()
+    code_parser.extract_exceptions()
+    code_parser.check_return_type()
+    code_parser.extract_attributes()
+    analysis_duration = time.perf_counter() - start
+    start = time.perf_counter()
+    code_parser.extract_class_and_method_calls()
+    resolution_duration = time.perf_counter() - start
+    gc.unfreeze()
+    return analysis_duration, resolution_duration
+
+
+if __name__ == "__main__":
+    # the test_data corpus, copied COPIES times into separate directories
+    with tempfile.TemporaryDirectory() as working_dir:
+        files = []
+        for copy_index in range(COPIES):
+            copy_dir = os.path.join(working_dir, f"copy_{copy_index}")
+            shutil.copytree(TEST_DATA_DIR, copy_dir)
+            files.extend(
+                os.path.join(dirpath, filename)
+                for (dirpath, dirnames, filenames) in os.walk(copy_dir)
+                for filename in filenames
+                if filename.endswith(".py")
+            )
+        durations = [run(working_dir, files) for _ in range(ROUNDS)]
+        analysis_duration = min(duration[0] for duration in durations)
+        resolution_duration = min(duration[1] for duration in durations)
+        print(f"{len(files)} files, best of {ROUNDS}")
+        print(f"analysis:        {analysis_duration:.3f} seconds")
+        print(f"call resolution: {resolution_duration:.3f} seconds")
+        print(f"total:           {analysis_duration + resolution_duration:.3f} seconds")
@@ -0,0 +1,97 @@
+import gc
+import logging
+import os
+import pathlib
+import sys
+import tempfile
+import time
+
+file_path = os.path.dirname(os.path.realpath(__file__))
+src_dir = str(pathlib.Path(file_path).parent.absolute())
+sys.path.append(src_dir)
+
+from code_representation import CodeRepresenter
+from get_context import CodeParser
+
+CLASSES_PER_FILE = 5
+METHODS_PER_CLASS = 5
+
+
+def create_module(class_count: int, method_count: int) -> str:
+    """
+    Create the source code of a synthetic module. Every module uses the same names, so a lookup by
+    name alone matches objects in every file
+
+    :param class_count: number of classes in the module
+    :type class_count: int
+    :param method_count: number of methods per class
+    :type method_count: int
+
+    :return: source code of the module
+    :return type: str
+    """
+    lines = []
+    for class_index in range(class_count):
+        lines.append(f"class Class{class_index}:")
+        for method_index in range(method_count):
+            lines.append(f"    def method_{method_index}(self, x):")
+            if method_index > 0:
+                lines.append(f"        self.method_{method_index - 1}(x)")
+            lines.append(f"        return helper_{class_index}(x)")
+        lines.append("")
+        lines.append(f"def helper_{class_index}(x):")
+        lines.append("    print(x)")
+        lines.append("    return len(str(x))")
+        lines.append("")
+    lines.append("def main():")
+    for class_index in range(class_count):
+        lines.append(f"    obj_{class_index} = Class{class_index}()")
+        lines.append(f"    obj_{class_index}.method_{method_count - 1}(1)")
+    lines.append("")
+    return "\n".join(lines)
+
+
+def run(file_count: int) -> tuple[int, float]:
+    """
+    Parse a synthetic repository and time the call graph creation
+
+    :param file_count: number of files in the repository
+    :type file_count: int
+
+    :return: number of CodeObjects and seconds spent in extract_class_and_method_calls
+    :return type: tuple[int, float]
+    """
+    with tempfile.TemporaryDirectory() as working_dir:
+        files = []
+        source = create_module(CLASSES_PER_FILE, METHODS_PER_CLASS)
+        for file_index in range(file_count):
+            filename = os.path.join(working_dir, f"module_{file_index}.py")
+            with open(filename, mode="w") as f:
+                f.write(source)
+            files.append(filename)
+        code_parser = CodeParser(
+            code_representer=CodeRepresenter(),
+            working_dir=working_dir,
+            logger=logging.getLogger(__name__),
+            files=files,
+        )
+        # keep garbage collection of the parsed trees out of the measurement
+        gc.collect()
+        gc.freeze()
+        start = time.perf_counter()
+        code_parser.extract_class_and_method_calls()
+        duration = time.perf_counter() - start
+        gc.unfreeze()
+        return len(code_parser.code_representer.objects), duration
+
+
+if __name__ == "__main__":
+    # call graph creation should grow linearly with the size of the repository,
+    # so the time per CodeObject should stay roughly constant
+    print(f"{'files':>6} {'objects':>8} {'seconds':>9} {'us/object':>10}")
+    for file_count in [25, 50, 100, 200, 400]:
+        object_count, duration = run(file_count)
+        print(
+            f"{file_count:>6} {object_count:>8} {duration:>9.3f} "
+            f"{duration / object_count * 1e6:>10.1f}"
+        )
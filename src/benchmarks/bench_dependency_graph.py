@@ -0,0 +1,89 @@
+import gc
+import logging
+import os
+import pathlib
+import sys
+import tempfile
+import time
+import tracemalloc
+
+file_path = os.path.dirname(os.path.realpath(__file__))
+src_dir = str(pathlib.Path(file_path).parent.absolute())
+sys.path.append(src_dir)
+sys.path.append(file_path)
+
+from bench_call_graph import CLASSES_PER_FILE, METHODS_PER_CLASS, create_module
+
+from code_representation import CodeRepresenter
+from get_context import CodeParser
+
+FILE_COUNT = 400
+ROUNDS = 5
+
+
+def run(code_representer: CodeRepresenter) -> dict[str, float]:
+    """
+    Measure building the dependency graph and propagating outdated state over it
+
+    :param code_representer: CodeRepresenter with extracted calls
+    :type code_representer: CodeRepresenter
+
+    :return: number of edges, bytes of the graph, seconds to build it and seconds to mark every
+        module as outdated and collect the outdated ids
+    :return type: dict[str, float]
+    """
+    code_objects = code_representer.get_code_objects()
+    module_ids = [code_obj.id for code_obj in code_objects if code_obj.code_type == "module"]
+
+    # the first build moves the edges from the CodeObjects into the graph
+    code_representer.build_dependency_graph()
+    edge_count = len(code_representer.dependency_graph.targets)
+    code_representer.invalidate_dependency_graph()
+    gc.collect()
+    tracemalloc.start()
+    code_representer.build_dependency_graph()
+    graph_size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    build_durations = []
+    propagation_durations = []
+    for _ in range(ROUNDS):
+        code_representer.invalidate_dependency_graph()
+        start = time.perf_counter()
+        code_representer.build_dependency_graph()
+        build_durations.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        code_representer.set_multiple_outdated(module_ids)
+        code_representer.get_outdated_ids()
+        code_representer.set_multiple_outdated(module_ids, outdated=False)
+        propagation_durations.append(time.perf_counter() - start)
+    return {
+        "edges": edge_count,
+        "graph_size": graph_size,
+        "build_duration": min(build_durations),
+        "propagation_duration": min(propagation_durations),
+    }
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as working_dir:
+        files = []
+        source = create_module(CLASSES_PER_FILE, METHODS_PER_CLASS)
+        for file_index in range(FILE_COUNT):
+            filename = os.path.join(working_dir, f"module_{file_index}.py")
+            with open(filename, mode="w") as f:
+                f.write(source)
+            files.append(filename)
+        code_parser = CodeParser(
+            code_representer=CodeRepresenter(),
+            working_dir=working_dir,
+            logger=logging.getLogger(__name__),
+            files=files,
+        )
+        code_parser.extract_class_and_method_calls()
+        result = run(code_parser.code_representer)
+        print(f"{len(files)} files, {len(code_parser.code_representer.objects)} objects")
+        print(f"{result['edges']} edges, best of {ROUNDS}")
+        print(f"graph bytes/edge:  {result['graph_size'] / result['edges']:>8.1f}")
+        print(f"build:             {result['build_duration'] * 1e3:>8.1f} ms")
+        print(f"propagation:       {result['propagation_duration'] * 1e3:>8.1f} ms")
@@ -0,0 +1,142 @@
+import gc
+import logging
+import os
+import pathlib
+import sys
+import tempfile
+import time
+import tracemalloc
+
+file_path = os.path.dirname(os.path.realpath(__file__))
+src_dir = str(pathlib.Path(file_path).parent.absolute())
+sys.path.append(src_dir)
+sys.path.append(file_path)
+
+from bench_call_graph import CLASSES_PER_FILE, METHODS_PER_CLASS, create_module
+
+from code_representation import CodeRepresenter
+from get_context import CodeParser
+
+FILE_COUNT = 400
+WRITE_ROUNDS = 20
+
+
+def get_object_size(code_obj) -> int:
+    """
+    Get the size of a CodeObject and the containers it owns. The ast and the code are left out,
+    they are measured separately by tracemalloc
+
+    :param code_obj: CodeObject to measure
+    :type code_obj: CodeObject
+
+    :return: size in bytes
+    :return type: int
+    """
+    names = set(getattr(code_obj, "__dict__", {}))
+    for cls in type(code_obj).__mro__:
+        names.update(getattr(cls, "__slots__", ()))
+    size = sys.getsizeof(code_obj)
+    if hasattr(code_obj, "__dict__"):
+        size += sys.getsizeof(code_obj.__dict__)
+    for name in names:
+        value = getattr(code_obj, name, None)
+        # immutable values like the shared empty id sets are not owned by the object
+        if isinstance(value, (set, list, dict)):
+            size += sys.getsizeof(value)
+    return size
+
+
+def get_code_size(code_objects: list) -> int:
+    """
+    Get the size of the source code held by CodeObjects, either as their own string or as a
+    span of a shared file buffer. Shared strings are counted once
+
+    :param code_objects: CodeObjects to measure
+    :type code_objects: list[CodeObject]
+
+    :return: size in bytes
+    :return type: int
+    """
+    texts = {}
+    for code_obj in code_objects:
+        try:
+            # bypasses __getattr__, which would create a new string for code held as a span
+            code = object.__getattribute__(code_obj, "code")
+        except AttributeError:
+            code = None
+        if code is not None:
+            texts[id(code)] = code
+        code_buffer = getattr(code_obj, "code_buffer", None)
+        if code_buffer is not None:
+            texts[id(code_buffer.text)] = code_buffer.text
+    return sum(sys.getsizeof(text) for text in texts.values())
+
+
+def run(working_dir: str, files: list[str]) -> dict[str, float]:
+    """
+    Parse and analyze the files, then measure the memory held and the cost of attribute writes
+
+    :param working_dir: path to the code
+    :type working_dir: str
+    :param files: files to parse
+    :type files: list[str]
+
+    :return: number of CodeObjects, bytes of the objects themselves, bytes of the code, bytes
+        traced in total after the analysis and after releasing the asts, and nanoseconds per
+        attribute write
+    :return type: dict[str, float]
+    """
+    gc.collect()
+    tracemalloc.start()
+    code_parser = CodeParser(
+        code_representer=CodeRepresenter(),
+        working_dir=working_dir,
+        logger=logging.getLogger(__name__),
+        files=files,
+    )
+    code_parser.analyze()
+    code_parser.extract_class_and_method_calls()
+    gc.collect()
+    traced_size = tracemalloc.get_traced_memory()[0]
+    code_parser.release_asts()
+    gc.collect()
+    released_size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    code_objects = list(code_parser.code_representer.objects.values())
+    object_size = sum(get_object_size(code_obj) for code_obj in code_objects)
+    code_size = get_code_size(code_objects)
+
+    start = time.perf_counter()
+    for _ in range(WRITE_ROUNDS):
+        for code_obj in code_objects:
+            code_obj.outdated = True
+            code_obj.name = code_obj.name
+    write_duration = time.perf_counter() - start
+    return {
+        "objects": len(code_objects),
+        "object_size": object_size,
+        "code_size": code_size,
+        "traced_size": traced_size,
+        "released_size": released_size,
+        "write_ns": write_duration / (WRITE_ROUNDS * len(code_objects) * 2) * 1e9,
+    }
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as working_dir:
+        files = []
+        source = create_module(CLASSES_PER_FILE, METHODS_PER_CLASS)
+        for file_index in range(FILE_COUNT):
+            filename = os.path.join(working_dir, f"module_{file_index}.py")
+            with open(filename, mode="w") as f:
+                f.write(source)
+            files.append(filename)
+        result = run(working_dir, files)
+        object_count = result["objects"]
+        print(f"{len(files)} files, {object_count} objects")
+        print(f"object bytes/object:  {result['object_size'] / object_count:>8.0f}")
+        print(f"code bytes/object:    {result['code_size'] / object_count:>8.0f}")
+        print(f"traced bytes/object:  {result['traced_size'] / object_count:>8.0f}")
+        print(f"  after release_asts: {result['released_size'] / object_count:>8.0f}")
+        print(f"attribute write:      {result['write_ns']:>8.1f} ns")
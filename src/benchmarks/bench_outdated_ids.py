@@ -0,0 +1,86 @@
+import logging
+import os
+import pathlib
+import sys
+import time
+
+file_path = os.path.dirname(os.path.realpath(__file__))
+src_dir = str(pathlib.Path(file_path).parent.absolute())
+sys.path.append(src_dir)
+sys.path.append(file_path)
+
+from bench_call_graph import CLASSES_PER_FILE, METHODS_PER_CLASS, create_module
+
+from code_representation import CodeRepresenter
+from extract_outdated_ids import extract_code_affected_by_change
+from get_context import CodeParser
+from source_store import SourceStore
+
+FILE_COUNT = 400
+ROUNDS = 5
+
+
+def create_code_parser(working_dir: str, files: list[str], source: str) -> CodeParser:
+    """
+    Parse files that all have the same content, without writing them to disk
+
+    :param working_dir: path to the code
+    :type working_dir: str
+    :param files: files to parse
+    :type files: list[str]
+    :param source: content of every file
+    :type source: str
+
+    :return: CodeParser of the files
+    :return type: CodeParser
+    """
+    source_store = SourceStore()
+    for filename in files:
+        source_store.add_source(filename, source)
+    return CodeParser(
+        code_representer=CodeRepresenter(),
+        working_dir=working_dir,
+        logger=logging.getLogger(__name__),
+        files=files,
+        source_store=source_store,
+    )
+
+
+def run(file_count: int) -> dict[str, float]:
+    """
+    Time the comparison of a synthetic repository with a version of it where one function per
+    file changed
+
+    :param file_count: number of files in the repository
+    :type file_count: int
+
+    :return: number of CodeObjects, number of outdated CodeObjects and seconds per comparison
+    :return type: dict[str, float]
+    """
+    working_dir = os.path.abspath("bench_repo")
+    files = [os.path.join(working_dir, f"module_{index}.py") for index in range(file_count)]
+    source_old = create_module(CLASSES_PER_FILE, METHODS_PER_CLASS)
+    source_new = source_old.replace("    print(x)", "    print(x, x)", 1)
+    code_parser_old = create_code_parser(working_dir, files, source_old)
+    code_parser_new = create_code_parser(working_dir, files, source_new)
+
+    durations = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        outdated_ids = extract_code_affected_by_change(
+            code_parser_old=code_parser_old,
+            code_parser_new=code_parser_new,
+            changed_files=files,
+        )
+        durations.append(time.perf_counter() - start)
+    return {
+        "objects": len(code_parser_new.code_representer.objects),
+        "outdated": len(outdated_ids),
+        "duration": min(durations),
+    }
+
+
+if __name__ == "__main__":
+    result = run(FILE_COUNT)
+    print(f"{FILE_COUNT} files, {result['objects']} objects, {result['outdated']} outdated")
+    print(f"comparison: {result['duration'] * 1e3:>8.1f} ms, best of {ROUNDS}")
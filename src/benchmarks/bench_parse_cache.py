@@ -0,0 +1,63 @@
+import logging
+import os
+import pathlib
+import sys
+import tempfile
+import time
+
+file_path = os.path.dirname(os.path.realpath(__file__))
+src_dir = str(pathlib.Path(file_path).parent.absolute())
+sys.path.append(src_dir)
+sys.path.append(file_path)
+
+from bench_call_graph import create_module
+
+from code_representation import CodeRepresenter
+from get_context import CodeParser
+from parse_cache import ParseCache
+
+FILE_COUNT = 3000
+
+
+def run(working_dir: str, files: list[str], parse_cache: ParseCache) -> float:
+    """
+    Parse and analyze the files
+
+    :param working_dir: path to the code
+    :type working_dir: str
+    :param files: files to parse
+    :type files: list[str]
+    :param parse_cache: cache to use
+    :type parse_cache: ParseCache
+
+    :return: seconds spent
+    :return type: float
+    """
+    start = time.perf_counter()
+    code_parser = CodeParser(
+        code_representer=CodeRepresenter(),
+        working_dir=working_dir,
+        logger=logging.getLogger(__name__),
+        files=files,
+        parse_cache=parse_cache,
+    )
+    code_parser.analyze()
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    # an unchanged repository should be loaded from the cache in well under a second
+    with tempfile.TemporaryDirectory() as working_dir, tempfile.TemporaryDirectory() as cache_dir:
+        files = []
+        for file_index in range(FILE_COUNT):
+            filename = os.path.join(working_dir, f"module_{file_index}.py")
+            with open(filename, mode="w") as f:
+                # make every file unique, so they do not share cache entries
+                f.write(f"# module {file_index}\n" + create_module(2, 3))
+            files.append(filename)
+        parse_cache = ParseCache(cache_dir=cache_dir)
+        cold = run(working_dir, files, parse_cache)
+        warm = run(working_dir, files, parse_cache)
+        print(f"{FILE_COUNT} files")
+        print(f"empty cache: {cold:.3f} seconds")
+        print(f"warm cache:  {warm:.3f} seconds ({parse_cache.hits} hits)")
@@ -0,0 +1,422 @@
+import ast
+from dataclasses import dataclass
+from typing import Self
+
+from code_representation import (
+    ClassObject,
+    CodeObject,
+    CodeRepresenter,
+    MethodObject,
+    ModuleObject,
+)
+
+
+class AttributeExtractionError(Exception):
+    """
+    Exception raised when Attribute extraction fails.
+
+    Attributes:
+        message -- explanation of the error
+    """
+
+    def __init__(self, message):
+        self.message = message
+
+
+class ExceptionExtractionError(Exception):
+    """
+    Exception raised when exception extraction fails.
+
+    Attributes:
+        message -- explanation of the error
+    """
+
+    def __init__(self, message):
+        self.message = message
+
+
+class VariableChainCreationError(Exception):
+    """
+    Exception raised when variable chain creatin fails.
+
+    Attributes:
+        message -- explanation of the error
+    """
+
+    def __init__(self, message):
+        self.message = message
+
+
+# version of the extraction results, increase it whenever they change to invalidate cached results
+ANALYZER_VERSION = 5
+
+# fields not visited for classes and methods, decorators belong to neither them nor their parent
+DECORATOR_FIELDS = frozenset({"decorator_list"})
+
+# nodes that can not contain calls, raises, returns or assignments and do not need to be visited
+LEAF_NODES = {
+    ast.Name,
+    ast.Constant,
+    ast.Pass,
+    ast.Break,
+    ast.Continue,
+    ast.Global,
+    ast.Nonlocal,
+    ast.alias,
+    *[
+        node_type
+        for base in [ast.expr_context, ast.boolop, ast.operator, ast.unaryop, ast.cmpop]
+        for node_type in base.__subclasses__()
+    ],
+}
+
+
+@dataclass
+class CallSite:
+    """
+    A call made by a CodeObject, before it is resolved to the called CodeObject
+
+    :param caller_id: id of the CodeObject making the call
+    :type caller_id: int
+    :param name: name of the called function
+    :type name: str
+    :param variable: variable chain the function is called on. Optional
+    :type variable: str|None
+    """
+
+    caller_id: int
+    name: str
+    variable: str | None = None
+
+
+def get_call_name(node: ast.Call, debug: bool = False) -> tuple[str, str | None]:
+    """
+    Get the name of the called function and the variable it is called on
+
+    :param node: the call
+    :type node: ast.Call
+    :param debug: toggle debug mode
+    :type debug: bool
+
+    :return: name of the called function and the variable chain it is called on, if any
+    :return type: tuple[str, str|None]
+    """
+    variable_to_resolve = None  # TODO resolve variable(?)
+    if hasattr(node.func, "id"):
+        called_func_name = node.func.id
+    else:
+        called_func_name = node.func.attr
+        if hasattr(node.func, "value"):
+            skip = False
+            if hasattr(node.func.value, "id"):
+                variable_to_resolve = node.func.value.id
+            elif isinstance(node.func.value, ast.Attribute):
+                variable_to_resolve = node.func.value.attr
+            else:
+                skip = True
+            if not skip:
+                value = node.func.value
+                while hasattr(value, "value"):
+                    if hasattr(value.value, "id"):
+                        variable_to_resolve = value.value.id + "." + variable_to_resolve
+                    elif hasattr(value.value, "attr"):
+                        variable_to_resolve = value.value.attr + "." + variable_to_resolve
+                    else:
+                        if not debug:
+                            raise VariableChainCreationError
+                    value = value.value
+    return called_func_name, variable_to_resolve
+
+
+class CodeAnalyzer(ast.NodeVisitor):
+    """
+    Extract arguments, return types, exceptions, attributes and calls of all CodeObjects of a
+    module in a single traversal of the module's ast
+    """
+
+    def __init__(self, code_representer: CodeRepresenter, debug: bool = False):
+        """
+        Extract arguments, return types, exceptions, attributes and calls of all CodeObjects of a
+        module in a single traversal of the module's ast
+
+        :param code_representer: CodeRepresenter containing the CodeObjects of the module
+        :type code_representer: CodeRepresenter
+        :param debug: toggle debug mode
+        :type debug: bool
+        """
+        self.code_representer = code_representer
+        self.debug = debug
+        self.visitors = {}
+
+    def analyze(self, module_obj: ModuleObject) -> list[CallSite]:
+        """
+        Analyze a module and all CodeObjects in it. Afterwards, assignments holds all assignments
+        of the module in the order of ast.walk
+
+        :param module_obj: the module to analyze
+        :type module_obj: ModuleObject
+
+        :return: calls made by the CodeObjects of the module
+        :return type: list[CallSite]
+        """
+        self.call_sites = []
+        # enclosing CodeObjects and the positions of their children, innermost last
+        self.code_obj_stack = []
+        self.children_stack = []
+        # enclosing function scopes, None for functions that are no CodeObject of their own
+        self.function_stack = []
+        self.returning_ids = set()
+        # assignments that might define instance attributes, per enclosing class
+        self.attribute_candidates = {}
+        # all assignments of the module, used to resolve variables
+        self.assignment_candidates = []
+        self.depth = 0
+
+        self.enter_code_obj(module_obj)
+        self.visit_fields(module_obj.ast)
+        self.exit_code_obj()
+        # breadth first order, like ast.walk
+        self.assignment_candidates.sort(key=lambda candidate: candidate[0])
+        self.assignments = [node for _, node in self.assignment_candidates]
+        return self.call_sites
+
+    def enter_code_obj(self, code_obj: CodeObject):
+        children = {}
+        for child_id in [*code_obj.class_ids, *code_obj.method_ids]:
+            child_obj = self.code_representer.get(child_id)
+            children[(child_obj.ast.lineno, child_obj.ast.col_offset)] = child_obj
+        self.code_obj_stack.append(code_obj)
+        self.children_stack.append(children)
+
+    def exit_code_obj(self):
+        self.children_stack.pop()
+        return self.code_obj_stack.pop()
+
+    def get_child(self, node: ast.AST) -> CodeObject | None:
+        return self.children_stack[-1].get((node.lineno, node.col_offset))
+
+    def visit(self, node: ast.AST):
+        self.depth += 1
+        # NodeVisitor.visit looks the visitor up by name for every node, cache it per node type
+        visitor = self.visitors.get(node.__class__)
+        if visitor is None:
+            visitor = getattr(self, "visit_" + node.__class__.__name__, self.generic_visit)
+            self.visitors[node.__class__] = visitor
+        visitor(node)
+        self.depth -= 1
+
+    def generic_visit(self, node: ast.AST, skipped_fields: frozenset[str] = frozenset()):
+        for name in node._fields:
+            if name in skipped_fields:
+                continue
+            value = getattr(node, name, None)
+            if isinstance(value, list):
+                for item in value:
+                    if isinstance(item, ast.AST) and item.__class__ not in LEAF_NODES:
+                        self.visit(item)
+            elif isinstance(value, ast.AST) and value.__class__ not in LEAF_NODES:
+                self.visit(value)
+
+    def visit_fields(self, node: ast.AST):
+        # decorators are not part of the code of the decorated code object or its parent
+        self.generic_visit(node, skipped_fields=DECORATOR_FIELDS)
+
+    def visit_function(self, node: ast.FunctionDef | ast.AsyncFunctionDef):
+        method_obj = self.get_child(node)
+        if method_obj is None:
+            # e.g. a function defined in an if block, which belongs to the enclosing CodeObject
+            self.function_stack.append(None)
+            self.visit_fields(node)
+            self.function_stack.pop()
+            return
+        self.enter_code_obj(method_obj)
+        self.extract_args_and_return_type(method_obj)
+        self.function_stack.append(method_obj)
+        self.visit_fields(node)
+        self.function_stack.pop()
+        self.exit_code_obj()
+        if method_obj.return_type is None and method_obj.id in self.returning_ids:
+            method_obj.missing_return_type = True
+
+    visit_FunctionDef = visit_function
+    visit_AsyncFunctionDef = visit_function
+
+    def visit_Lambda(self, node: ast.Lambda):
+        self.function_stack.append(None)
+        self.generic_visit(node)
+        self.function_stack.pop()
+
+    def visit_ClassDef(self, node: ast.ClassDef):
+        class_obj = self.get_child(node)
+        if class_obj is None:
+            self.visit_fields(node)
+            return
+        self.enter_code_obj(class_obj)
+        self.extract_class_attributes(class_obj)
+        self.attribute_candidates[class_obj.id] = []
+        self.visit_fields(node)
+        self.extract_instance_attributes(class_obj, self.attribute_candidates.pop(class_obj.id))
+        self.exit_code_obj()
+
+    def visit_Return(self, node: ast.Return):
+        if len(self.function_stack) > 0 and self.function_stack[-1] is not None:
+            if node.value is not None:
+                self.returning_ids.add(self.function_stack[-1].id)
+        self.generic_visit(node)
+
+    def visit_Raise(self, node: ast.Raise):
+        exception = None
+        if hasattr(node.exc, "id"):
+            exception = node.exc.id
+        elif hasattr(node.exc, "func"):
+            exception = node.exc.func.id
+        else:
+            if not self.debug:
+                raise ExceptionExtractionError
+        if exception is not None:
+            # exceptions are raised by all enclosing modules and methods
+            for code_obj in self.code_obj_stack:
+                if isinstance(code_obj, ModuleObject) or isinstance(code_obj, MethodObject):
+                    code_obj.add_exception(exception)
+        self.generic_visit(node)
+
+    def visit_Call(self, node: ast.Call):
+        called_func_name, variable_to_resolve = get_call_name(node, debug=self.debug)
+        self.call_sites.append(
+            CallSite(
+                caller_id=self.code_obj_stack[-1].id,
+                name=called_func_name,
+                variable=variable_to_resolve,
+            )
+        )
+        self.generic_visit(node)
+
+    def visit_assignment(self, node: ast.Assign | ast.AnnAssign):
+        self.assignment_candidates.append((self.depth, node))
+        # instance attributes are attributes of all enclosing classes
+        for code_obj in self.code_obj_stack:
+            if isinstance(code_obj, ClassObject):
+                self.attribute_candidates[code_obj.id].append((self.depth, node))
+        self.generic_visit(node)
+
+    visit_Assign = visit_assignment
+    visit_AnnAssign = visit_assignment
+
+    def extract_args_and_return_type(self, method_obj: MethodObject):
+        """
+        Extract arguments and return type of a method
+
+        :param method_obj: the method
+        :type method_obj: MethodObject
+        """
+        node = method_obj.ast
+        for i in range(len(node.args.args)):
+            arg = node.args.args[i]
+            new_arg = {"name": arg.arg}
+            if arg.annotation is not None:
+                if hasattr(arg.annotation, "id"):
+                    new_arg["type"] = arg.annotation.id
+                elif hasattr(arg.annotation, "value") and hasattr(arg.annotation.value, "id"):
+                    new_arg["type"] = arg.annotation.value.id
+                elif hasattr(arg, "type_comment"):
+                    new_arg["type"] = arg.type_comment
+            else:
+                if i == 0 and arg.arg == "self":
+                    new_arg["type"] = Self  # see https://peps.python.org/pep-0673/
+                else:
+                    method_obj.add_missing_arg_type(arg.arg)
+            if i < len(node.args.defaults):
+                default = node.args.defaults[i]
+                if isinstance(default, ast.Constant):
+                    new_arg["default"] = default.value
+                elif isinstance(default, ast.List):
+                    new_arg["default"] = [item.value for item in default.elts]
+            method_obj.add_argument(new_arg)
+        if hasattr(node.returns, "id"):
+            return_type = node.returns.id
+        elif hasattr(node.returns, "value"):
+            return_type = node.returns.value
+        else:
+            return_type = None
+        if isinstance(return_type, ast.Name):
+            return_type = return_type.id
+        method_obj.return_type = return_type
+
+    def extract_class_attributes(self, class_obj: ClassObject):
+        """
+        Extract the attributes assigned in the body of a class
+
+        :param class_obj: the class
+        :type class_obj: ClassObject
+        """
+        for node in class_obj.ast.body:
+            if isinstance(node, ast.Assign):
+                if len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+                    attr = {"name": node.targets[0].id}
+                    class_obj.add_class_attribute(attribute=attr)
+            elif isinstance(node, ast.AnnAssign):
+                if isinstance(node.target, ast.Name):
+                    annotation_location = node.annotation
+                    while True:
+                        if hasattr(annotation_location, "id"):
+                            attr_type = annotation_location.id
+                            break
+                        elif hasattr(annotation_location, "value"):
+                            annotation_location = annotation_location.value
+                        elif hasattr(annotation_location, "left"):
+                            annotation_location = annotation_location.left
+                        else:
+                            raise AttributeExtractionError
+                    attr = {"name": node.target.id, "type": attr_type}
+                    class_obj.add_class_attribute(attribute=attr)
+                else:
+                    raise AttributeExtractionError
+
+    def extract_instance_attributes(
+        self, class_obj: ClassObject, candidates: list[tuple[int, ast.Assign | ast.AnnAssign]]
+    ):
+        """
+        Extract the attributes assigned to self anywhere in a class
+
+        :param class_obj: the class
+        :type class_obj: ClassObject
+        :param candidates: depth and node of all assignments in the class
+        :type candidates: list[tuple[int, ast.Assign|ast.AnnAssign]]
+        """
+        # the first assignment of an attribute wins, process them in breadth first order like
+        # ast.walk
+        candidates.sort(key=lambda candidate: candidate[0])
+        for _, node in candidates:
+            if isinstance(node, ast.Assign):
+                for target in node.targets:
+                    if hasattr(target, "id"):
+                        attr_name = target.id
+                    elif hasattr(target, "attr"):
+                        attr_name = target.attr
+                    else:
+                        continue  # TODO review
+                    if not hasattr(target, "value"):
+                        continue  # TODO review
+                    if hasattr(target.value, "id"):
+                        if target.value.id == "self":
+                            attr = {"name": attr_name}
+                            class_obj.add_instance_attribute(attribute=attr)
+            elif isinstance(node, ast.AnnAssign):
+                if hasattr(node.target, "id"):
+                    attr_name = node.target.id
+                elif hasattr(node.target, "attr"):
+                    attr_name = node.target.attr
+                else:
+                    raise AttributeExtractionError
+                if hasattr(node.target, "value") and hasattr(node.target.value, "id"):
+                    if node.target.value.id == "self":
+                        if hasattr(node.annotation, "id"):
+                            attr_type = node.annotation.id
+                        elif hasattr(node.annotation, "value") and hasattr(
+                            node.annotation.value, "id"
+                        ):
+                            attr_type = node.annotation.value.id
+                        else:
+                            raise AttributeExtractionError
+                        attr = {"name": attr_name, "type": attr_type}
+                        class_obj.add_instance_attribute(attribute=attr)
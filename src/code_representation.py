@@ -1,10 +1,16 @@
+import functools
+import hashlib
 import os
 import pathlib
 import sys
+from array import array
 from ast import AST
+from collections import deque
 from dataclasses import dataclass, field, fields
 from typing import List
 
+from source_store import SourceBuffer
+
 file_path = os.path.dirname(os.path.realpath(__file__))
 project_dir = str(pathlib.Path(file_path).parent.parent.absolute())
 sys.path.append(project_dir)
@@ -16,6 +22,20 @@ from gpt_input import (
 )
 
 
+@functools.lru_cache(maxsize=2**16)
+def normalize_absolute_filename(filename: str) -> str:
+    """
+    Canonicalize an absolute filename. Cached, since the same files are looked up repeatedly
+
+    :param filename: absolute filename
+    :type filename: str
+
+    :return: normalized filename
+    :return type: str
+    """
+    return os.path.normcase(os.path.normpath(filename))
+
+
 class MultipleMatchesError(Exception):
     """
     Exception raised when multiple objects match.
@@ -71,13 +91,17 @@ def frozen_field_support(cls):
 
     @raises Exception
     """
+    # looked up once, so writes to fields that are not frozen stay cheap
+    frozen_names = frozenset(
+        name
+        for name, _field in cls.__dataclass_fields__.items()
+        if _field.metadata.get("frozen", False)
+    )
+    base_setattr = super(cls, cls).__setattr__
 
     def _setattr_(this, name, value):
-        _field = cls.__dataclass_fields__.get(name, {})
-        _meta = getattr(_field, "metadata", {})
-        is_frozen = _meta.get("frozen", False)
-        if not is_frozen:
-            return super(cls, this).__setattr__(name, value)
+        if name not in frozen_names:
+            return base_setattr(this, name, value)
 
         try:
             current_value = getattr(this, name)
@@ -87,14 +111,63 @@ def frozen_field_support(cls):
             # dataclass not initialized yet...
             pass
 
-        super(cls, this).__setattr__(name, value)
+        base_setattr(this, name, value)
 
     setattr(cls, "__setattr__", _setattr_)
     return cls
 
 
+# returned for CodeObjects without edges of a kind
+EMPTY_IDS = frozenset()
+
+# kinds of the edges of a CodeObject. Calls, children and the base class are dependencies, a caller
+# is stored as a call of the caller
+CALLED_METHOD = 0
+CALLED_CLASS = 1
+CLASS_ID = 2
+METHOD_ID = 3
+BASE_CLASS = 4
+CALLER_METHOD = 5
+CALLER_CLASS = 6
+CALLER_MODULE = 7
+CALL_KINDS = (CALLED_METHOD, CALLED_CLASS)
+# kind of the caller edges by the code_type of the caller
+CALLER_KINDS = {"method": CALLER_METHOD, "class": CALLER_CLASS, "module": CALLER_MODULE}
+
+
+def create_stable_id(*parts: str) -> int:
+    """
+    Create an id that is the same in every process and run, unlike hash()
+
+    :param parts: everything identifying the object
+    :type parts: str
+
+    :return: non-negative 63 bit id
+    :return type: int
+    """
+    digest = hashlib.blake2b(digest_size=8)
+    for part in parts:
+        encoded = part.encode("utf-8", errors="surrogatepass")
+        digest.update(len(encoded).to_bytes(8, "little"))
+        digest.update(encoded)
+    return int.from_bytes(digest.digest(), "little") >> 1
+
+
+def normalize_id_filename(filename: str) -> str:
+    """
+    Normalize a filename for use in ids, so they do not depend on the platform
+
+    :param filename: filename to normalize
+    :type filename: str
+
+    :return: normalized filename using "/" as separator
+    :return type: str
+    """
+    return os.path.normpath(filename.replace("\\", "/")).replace(os.sep, "/")
+
+
 @frozen_field_support
-@dataclass(unsafe_hash=True)
+@dataclass(unsafe_hash=True, slots=True)
 class CodeObject:
     """
     Represent a piece of code like a module, class or method
@@ -107,8 +180,18 @@ class CodeObject:
     :type ast: ast.AST
     :param docstring: Docstring of the code piece. Optional
     :type docstring: str
-    :param code: Code of the code piece
+    :param code: Code of the code piece. Ignored if code_buffer is given
     :type code: str
+    :param occurrence: number of earlier definitions with the same name in the same parent, e.g.
+        for property setters. Optional
+    :type occurrence: int
+    :param code_buffer: buffer of the file, the code is the span from code_start to code_end of it.
+        Optional
+    :type code_buffer: SourceBuffer|None
+    :param code_start: character offset of the code in code_buffer. Optional
+    :type code_start: int
+    :param code_end: character offset of the end of the code in code_buffer. Optional
+    :type code_end: int
     """
 
     name: str = field(compare=True, hash=True, metadata={"frozen": True})
@@ -117,18 +200,43 @@ class CodeObject:
     docstring: str | None = field(compare=False, hash=False)
     code: str | None = field(compare=True, hash=True, metadata={"frozen": False})
     parent_id: int | None = field(compare=True, hash=True, metadata={"frozen": True})
+    occurrence: int = field(default=0, compare=False, hash=False, kw_only=True)
+    code_buffer: SourceBuffer | None = field(
+        default=None, compare=False, hash=False, kw_only=True, repr=False
+    )
+    code_start: int = field(default=0, compare=False, hash=False, kw_only=True, repr=False)
+    code_end: int = field(default=0, compare=False, hash=False, kw_only=True, repr=False)
+    # set in __post_init__ or later, declared as fields to get a slot
+    id: int = field(init=False, compare=False, hash=False, repr=False)
+    code_type: str = field(init=False, compare=False, hash=False, repr=False)
+    # edges by kind, added since the CodeObject was numbered in a dependency graph. Moved into the
+    # graph arrays when the graph is built
+    staged_edges: dict[int, set[int]] | None = field(
+        init=False, compare=False, hash=False, repr=False
+    )
+    dependency_graph: "DependencyGraph | None" = field(
+        init=False, compare=False, hash=False, repr=False
+    )
+    outdated: bool = field(init=False, compare=False, hash=False, repr=False)
+    is_updated: bool = field(init=False, compare=False, hash=False, repr=False)
+    send_to_gpt: bool = field(init=False, compare=False, hash=False, repr=False)
+    old_docstring: str | None = field(init=False, compare=False, hash=False, repr=False)
+    # only set for some objects, checked with hasattr
+    retry: int = field(init=False, compare=False, hash=False, repr=False)
+    validated_unaltered: bool = field(init=False, compare=False, hash=False, repr=False)
 
     def __post_init__(self):
         # self.__set_fields_frozen()
-        self.id = hash(self)
+        # filenames and names repeat across many objects
+        self.filename = sys.intern(self.filename)
+        self.name = sys.intern(self.name)
+        if self.code_buffer is not None:
+            # read from the buffer on access, see __getattr__
+            del self.code
+        self.id = self.create_id()
         self.code_type = "code"
-        self.class_ids = set()
-        self.method_ids = set()
-        self.called_methods = set()
-        self.called_classes = set()
-        self.called_by_methods = set()
-        self.called_by_classes = set()
-        self.called_by_modules = set()
+        self.staged_edges = None
+        self.dependency_graph = None
         self.outdated = False
         self.is_updated = False
         self.send_to_gpt = False
@@ -153,6 +261,124 @@ class CodeObject:
 
                 setattr(self, field_name, property(local_getter, frozen(field_name)))
 
+    def __getattr__(self, name: str):
+        # only called for attributes without a value. Until code is assigned, it is a span of the
+        # file buffer that all code objects of the file share, so nested code is not stored once
+        # per nesting level
+        if name == "code":
+            code_buffer = self.code_buffer
+            if code_buffer is not None:
+                return code_buffer.text[self.code_start : self.code_end]
+        # after release_ast, the ast is parsed again from the file buffer
+        elif name == "ast":
+            code_buffer = self.code_buffer
+            if code_buffer is not None:
+                if self.code_type == "module":
+                    return code_buffer.get_tree()
+                return code_buffer.get_node(self.code_start, self.code_end)
+        raise AttributeError(f"'{self.__class__.__name__}' object has no attribute '{name}'")
+
+    def release_ast(self):
+        """
+        Drop the reference to the ast, so it can be freed. If the code is a span of a file buffer,
+        the ast is parsed again from the buffer on the next access, otherwise it is kept
+        """
+        if self.code_buffer is None:
+            return
+        try:
+            del self.ast
+        except AttributeError:
+            # already released
+            pass
+
+    def create_id(self) -> int:
+        """
+        Create the id of the code piece from its parent, kind, name and occurrence. It is stable
+        across runs and independent of the code, so changed code keeps its id
+
+        :return: the id
+        :return type: int
+        """
+        if self.parent_id is None:
+            parent = normalize_id_filename(self.filename)
+        else:
+            parent = str(self.parent_id)
+        return create_stable_id(parent, self.__class__.__name__, self.name, str(self.occurrence))
+
+    @property
+    def class_ids(self) -> set[int]:
+        return self.get_edge_ids(CLASS_ID)
+
+    @property
+    def method_ids(self) -> set[int]:
+        return self.get_edge_ids(METHOD_ID)
+
+    @property
+    def called_methods(self) -> set[int]:
+        return self.get_edge_ids(CALLED_METHOD)
+
+    @property
+    def called_classes(self) -> set[int]:
+        return self.get_edge_ids(CALLED_CLASS)
+
+    @property
+    def called_by_methods(self) -> set[int]:
+        return self.get_edge_ids(CALLER_METHOD)
+
+    @property
+    def called_by_classes(self) -> set[int]:
+        return self.get_edge_ids(CALLER_CLASS)
+
+    @property
+    def called_by_modules(self) -> set[int]:
+        return self.get_edge_ids(CALLER_MODULE)
+
+    def get_edge_ids(self, kind: int) -> set[int]:
+        """
+        Get the ids of the edges of a kind, from the dependency graph and the edges added since
+
+        :param kind: edge kind, e.g. CALLED_METHOD
+        :type kind: int
+
+        :return: ids, a new set unless there are none
+        :return type: set[int]
+        """
+        ids = EMPTY_IDS
+        if self.dependency_graph is not None:
+            ids = self.dependency_graph.get_edge_ids(self.id, kind)
+        if self.staged_edges is not None and kind in self.staged_edges:
+            ids = self.staged_edges[kind].union(ids)
+        return ids
+
+    def get_edges(self) -> list[tuple[int, int]]:
+        """
+        Get all edges as pairs of edge kind and id, from the dependency graph and the edges added
+        since
+
+        :return: pairs of edge kind and id
+        :return type: list[tuple[int, int]]
+        """
+        edges = []
+        if self.dependency_graph is not None:
+            edges.extend(self.dependency_graph.get_edges(self.id))
+        if self.staged_edges is not None:
+            for kind, ids in self.staged_edges.items():
+                edges.extend((kind, id) for id in ids)
+        return edges
+
+    def add_edge(self, kind: int, id: int):
+        """
+        Add an edge. It is stored in the dependency graph when the graph is built again
+
+        :param kind: edge kind, e.g. CALLED_METHOD
+        :type kind: int
+        :param id: id of the code at the other end
+        :type id: int
+        """
+        if self.staged_edges is None:
+            self.staged_edges = {}
+        self.staged_edges.setdefault(kind, set()).add(id)
+
     def add_class_id(self, class_id: int):
         """
         Add a class id
@@ -160,7 +386,7 @@ class CodeObject:
         :param class_id: class id
         :type class_id: int
         """
-        self.class_ids.add(class_id)
+        self.add_edge(CLASS_ID, class_id)
 
     def add_method_id(self, method_id: int):
         """
@@ -169,7 +395,7 @@ class CodeObject:
         :param method_id: method id
         :type method_id: int
         """
-        self.method_ids.add(method_id)
+        self.add_edge(METHOD_ID, method_id)
 
     def add_called_method(self, called_method_id: int):
         """
@@ -179,7 +405,7 @@ class CodeObject:
         :type called_method_id: int
         """
         if called_method_id != self.id:
-            self.called_methods.add(called_method_id)
+            self.add_edge(CALLED_METHOD, called_method_id)
 
     def add_called_class(self, called_class_id: int):
         """
@@ -189,7 +415,7 @@ class CodeObject:
         :type called_class_id: int
         """
         if called_class_id != self.id:
-            self.called_classes.add(called_class_id)
+            self.add_edge(CALLED_CLASS, called_class_id)
 
     def add_caller_method(self, caller_method_id: int):
         """
@@ -198,7 +424,7 @@ class CodeObject:
         :param caller_method_id: id of the calling method
         :type caller_method_id: int
         """
-        self.called_by_methods.add(caller_method_id)
+        self.add_edge(CALLER_METHOD, caller_method_id)
 
     def add_caller_class(self, caller_class_id: int):
         """
@@ -207,7 +433,7 @@ class CodeObject:
         :param caller_class_id: id of the calling class
         :type caller_class_id: int
         """
-        self.called_by_classes.add(caller_class_id)
+        self.add_edge(CALLER_CLASS, caller_class_id)
 
     def add_caller_module(self, caller_module_id: int):
         """
@@ -216,7 +442,7 @@ class CodeObject:
         :param caller_module_id: id of the calling module
         :type caller_module_id: int
         """
-        self.called_by_modules.add(caller_module_id)
+        self.add_edge(CALLER_MODULE, caller_module_id)
 
     def add_docstring(self, docstring: str):
         """
@@ -302,7 +528,7 @@ class ContextObject:
     code: str = field(compare=True, hash=True)
 
 
-@dataclass(unsafe_hash=True)
+@dataclass(unsafe_hash=True, slots=True)
 class ModuleObject(CodeObject):
     """
     Represent Module. Extends CodeObject
@@ -321,14 +547,28 @@ class ModuleObject(CodeObject):
     :type code: str
     :param exceptions: Exceptions raised by the code piece. Optional
     :type exceptions: list(str)
+    :param relative_filename: filename relative to the repository root, used for the id. Optional
+    :type relative_filename: str|None
     """
 
     exceptions: set[str] | None = field(default_factory=set, compare=False, hash=False)
+    relative_filename: str | None = field(default=None, compare=False, hash=False)
 
     def __post_init__(self):
-        super().__post_init__()
+        # slots=True replaces the class, so super() needs explicit arguments
+        super(ModuleObject, self).__post_init__()
         self.code_type = "module"
 
+    def create_id(self) -> int:
+        """
+        Create the id of the module from its filename relative to the repository root, if known
+
+        :return: the id
+        :return type: int
+        """
+        filename = self.relative_filename if self.relative_filename is not None else self.filename
+        return create_stable_id(normalize_id_filename(filename), self.__class__.__name__)
+
     def add_exception(self, exception: str):
         """
         Add an exception that is raise by this code piece
@@ -389,7 +629,7 @@ class ModuleContextObject(ContextObject):
     exceptions: list[str] = field(compare=True, hash=True)
 
 
-@dataclass(unsafe_hash=True)
+@dataclass(unsafe_hash=True, slots=True)
 class MethodObject(CodeObject):
     """
     Represent a method. Extends CodeObject
@@ -424,9 +664,11 @@ class MethodObject(CodeObject):
     outer_method_id: int | None = field(default=None, compare=True, hash=True)
     outer_class_id: int | None = field(default=None, compare=True, hash=True)
     module_id: int | None = field(default=None, compare=True, hash=True)
+    missing_arg_types: set[str] = field(init=False, compare=False, hash=False, repr=False)
+    missing_return_type: bool = field(init=False, compare=False, hash=False, repr=False)
 
     def __post_init__(self):
-        super().__post_init__()
+        super(MethodObject, self).__post_init__()
         if self.arguments is None:
             self.arguments = []
         if self.exceptions is None:
@@ -434,8 +676,6 @@ class MethodObject(CodeObject):
         self.missing_arg_types = set()
         self.missing_return_type = False
         self.code_type = "method"
-        self.class_ids = set()
-        self.method_ids = set()
 
     def add_argument(self, argument: dict[str, str]):
         """
@@ -471,7 +711,7 @@ class MethodObject(CodeObject):
         :param class_id: class id
         :type class_id: int
         """
-        self.class_ids.add(class_id)
+        self.add_edge(CLASS_ID, class_id)
 
     def add_method_id(self, method_id: int):
         """
@@ -481,7 +721,7 @@ class MethodObject(CodeObject):
         :type method_id: int
         """
         if method_id != self.id:
-            self.method_ids.add(method_id)
+            self.add_edge(METHOD_ID, method_id)
 
     def get_missing_arg_types(self) -> set[str]:
         """
@@ -506,7 +746,7 @@ class MethodObject(CodeObject):
         :return: A dictionary of types of context, containing lists of code ids or a code id
         :return type: dict[str, list[int]|int]
         """
-        result = super().get_context()
+        result = super(MethodObject, self).get_context()
         result["outer_class_id"] = self.outer_class_id
         result["outer_method_id"] = self.outer_method_id
         result["module_id"] = self.module_id
@@ -550,7 +790,7 @@ class MethodContextObject(ContextObject):
     arguments: list | None = field(compare=True, hash=True)
 
 
-@dataclass(unsafe_hash=True)
+@dataclass(unsafe_hash=True, slots=True)
 class ClassObject(CodeObject):
     """
     Represent a class. Extends CodeObject
@@ -580,13 +820,27 @@ class ClassObject(CodeObject):
     module_id: int = field(default=None, compare=True, hash=True)
     inherited_from: int = field(default=None, compare=True, hash=True)
     exceptions: set[str] | None = field(default_factory=set, compare=False, hash=False)
+    class_attributes: list = field(init=False, compare=False, hash=False, repr=False)
+    instance_attributes: list = field(init=False, compare=False, hash=False, repr=False)
 
     def __post_init__(self):
-        super().__post_init__()
+        super(ClassObject, self).__post_init__()
         self.code_type = "class"
         self.class_attributes = list()
         self.instance_attributes = list()
 
+    def get_edges(self) -> list[tuple[int, int]]:
+        """
+        Get all edges as pairs of edge kind and id, including the base class
+
+        :return: pairs of edge kind and id
+        :return type: list[tuple[int, int]]
+        """
+        edges = super(ClassObject, self).get_edges()
+        if self.inherited_from is not None:
+            edges.append((BASE_CLASS, self.inherited_from))
+        return edges
+
     def add_exception(self, exception: str):
         """
         Add an exception that is raise by this code piece
@@ -627,7 +881,7 @@ class ClassObject(CodeObject):
         :return: A dictionary of types of context, containing lists of code ids or a code id
         :return type: dict[str, list[int]|int]
         """
-        result = super().get_context()
+        result = super(ClassObject, self).get_context()
         result["parent_id"] = self.parent_id
         result["module_id"] = self.module_id
         result["inherited_from"] = self.inherited_from
@@ -686,12 +940,381 @@ class ClassContextObject(ContextObject):
     instance_attributes: list[str] = field(compare=True, hash=True)
 
 
+class DependencyGraph:
+    """
+    Edges between CodeObjects and their reverse, stored as compressed sparse rows over a dense
+    numbering of the CodeObjects. This is the only place the edges are kept once it is built
+    """
+
+    def __init__(self, code_objects: list):
+        """
+        Edges between CodeObjects and their reverse, stored as compressed sparse rows over a dense
+        numbering of the CodeObjects. Ids of code that is not one of the CodeObjects are numbered
+        after them, so their edges are kept for the next build
+
+        :param code_objects: CodeObjects to number
+        :type code_objects: list[CodeObject]
+        """
+        ids = [code_obj.id for code_obj in code_objects]
+        indices = {code_obj_id: index for index, code_obj_id in enumerate(ids)}
+        self.object_count = len(ids)
+        # the caller edge kind of each index, for the called_by views
+        caller_kinds = [CALLER_KINDS.get(code_obj.code_type, -1) for code_obj in code_objects]
+
+        def add_index(code_obj_id: int, caller_kind: int = -1) -> int:
+            index = indices.get(code_obj_id)
+            if index is None:
+                index = indices[code_obj_id] = len(ids)
+                ids.append(code_obj_id)
+                caller_kinds.append(caller_kind)
+            elif caller_kinds[index] == -1:
+                caller_kinds[index] = caller_kind
+            return index
+
+        # edges packed into one int each, so sorting orders them by source, target and kind
+        edges = set()
+        caller_kind_set = set(CALLER_KINDS.values())
+        for index, code_obj in enumerate(code_objects):
+            call_kind = CALLED_CLASS if code_obj.code_type == "class" else CALLED_METHOD
+            for kind, code_obj_id in code_obj.get_edges():
+                if kind in caller_kind_set:
+                    source = add_index(code_obj_id, kind)
+                    edges.add(source << 40 | index << 8 | call_kind)
+                else:
+                    target = indices.get(code_obj_id)
+                    if target is None:
+                        target = add_index(code_obj_id)
+                    edges.add(index << 40 | target << 8 | kind)
+        edges = sorted(edges)
+        sources = [edge >> 40 for edge in edges]
+        targets = [edge >> 8 & 0xFFFFFFFF for edge in edges]
+        kinds = [edge & 0xFF for edge in edges]
+        self.ids = array("q", ids)
+        self.indices = indices
+        self.caller_kinds = array("b", caller_kinds)
+        # the edges of index i are at offsets[i]:offsets[i + 1]
+        offsets = [0] * (len(ids) + 1)
+        for source in sources:
+            offsets[source + 1] += 1
+        for index in range(len(ids)):
+            offsets[index + 1] += offsets[index]
+        self.offsets = array("i", offsets)
+        self.targets = array("i", targets)
+        self.kinds = array("b", kinds)
+        # reverse edges, counted first so they can be placed without resizing
+        reverse_offsets = [0] * (len(ids) + 1)
+        for target in targets:
+            reverse_offsets[target + 1] += 1
+        for index in range(len(ids)):
+            reverse_offsets[index + 1] += reverse_offsets[index]
+        reverse_targets = [0] * len(edges)
+        reverse_kinds = [0] * len(edges)
+        positions = reverse_offsets[:-1]
+        # sources are ascending, so the dependents of each CodeObject end up sorted as well
+        for source, target, kind in zip(sources, targets, kinds):
+            reverse_targets[positions[target]] = source
+            reverse_kinds[positions[target]] = kind
+            positions[target] += 1
+        self.reverse_offsets = array("i", reverse_offsets)
+        self.reverse_targets = array("i", reverse_targets)
+        self.reverse_kinds = array("b", reverse_kinds)
+
+    def get_edge_ids(self, code_obj_id: int, kind: int) -> set[int]:
+        """
+        Get the ids at the other end of the edges of a kind of a CodeObject
+
+        :param code_obj_id: CodeObject id
+        :type code_obj_id: int
+        :param kind: edge kind, e.g. CALLED_METHOD
+        :type kind: int
+
+        :return: ids, a new set unless there are none
+        :return type: set[int]
+        """
+        index = self.indices.get(code_obj_id)
+        if index is None or index >= self.object_count:
+            return EMPTY_IDS
+        ids = self.ids
+        if kind in CALLER_KINDS.values():
+            reverse_kinds = self.reverse_kinds
+            reverse_targets = self.reverse_targets
+            caller_kinds = self.caller_kinds
+            result = {
+                ids[reverse_targets[position]]
+                for position in range(self.reverse_offsets[index], self.reverse_offsets[index + 1])
+                if reverse_kinds[position] in CALL_KINDS
+                and caller_kinds[reverse_targets[position]] == kind
+            }
+        else:
+            kinds = self.kinds
+            targets = self.targets
+            result = {
+                ids[targets[position]]
+                for position in range(self.offsets[index], self.offsets[index + 1])
+                if kinds[position] == kind
+            }
+        return result or EMPTY_IDS
+
+    def get_edges(self, code_obj_id: int) -> list[tuple[int, int]]:
+        """
+        Get the edges of a CodeObject as pairs of edge kind and id, like CodeObject.get_edges.
+        Calls by code that is not one of the CodeObjects are returned as callers, the base class
+        is left out as it is a field of the CodeObject
+
+        :param code_obj_id: CodeObject id
+        :type code_obj_id: int
+
+        :return: pairs of edge kind and id
+        :return type: list[tuple[int, int]]
+        """
+        index = self.indices.get(code_obj_id)
+        if index is None or index >= self.object_count:
+            return []
+        ids = self.ids
+        start = self.offsets[index]
+        end = self.offsets[index + 1]
+        edges = [
+            (kind, ids[target])
+            for kind, target in zip(self.kinds[start:end], self.targets[start:end])
+            if kind != BASE_CLASS
+        ]
+        object_count = self.object_count
+        for source in self.get_dependents(index):
+            if source >= object_count:
+                edges.append((self.caller_kinds[source], ids[source]))
+        return edges
+
+    def get_dependencies(self, index: int) -> array:
+        """
+        Get the indices of the CodeObjects a CodeObject depends on
+
+        :param index: index of the CodeObject
+        :type index: int
+
+        :return: indices of the dependencies
+        :return type: array
+        """
+        return self.targets[self.offsets[index] : self.offsets[index + 1]]
+
+    def get_dependents(self, index: int) -> array:
+        """
+        Get the indices of the CodeObjects depending on a CodeObject
+
+        :param index: index of the CodeObject
+        :type index: int
+
+        :return: indices of the dependents
+        :return type: array
+        """
+        return self.reverse_targets[self.reverse_offsets[index] : self.reverse_offsets[index + 1]]
+
+    def get_dependency_ids(self, code_obj_id: int) -> list[int]:
+        """
+        Get the ids of the CodeObjects a CodeObject depends on
+
+        :param code_obj_id: CodeObject id
+        :type code_obj_id: int
+
+        :return: ids of the dependencies
+        :return type: list[int]
+        """
+        index = self.indices.get(code_obj_id)
+        if index is None:
+            return []
+        return [self.ids[dependency] for dependency in self.get_dependencies(index)]
+
+
+class BatchScheduler:
+    """
+    Schedule CodeObjects so that each one is only sent after the code it depends on is done.
+    Strongly connected components, e.g. mutually recursive methods, are scheduled as one unit
+    """
+
+    def __init__(self, code_obj_ids: list[int], get_dependencies):
+        """
+        Schedule CodeObjects so that each one is only sent after the code it depends on is done.
+        Strongly connected components, e.g. mutually recursive methods, are scheduled as one unit
+
+        :param code_obj_ids: ids of the CodeObjects to schedule
+        :type code_obj_ids: list[int]
+        :param get_dependencies: returns the ids a CodeObject id depends on. Ids that are not
+            scheduled are ignored
+        :type get_dependencies: Callable[[int], Iterable[int]]
+        """
+        self.pending = set(code_obj_ids)
+        self.get_dependencies = get_dependencies
+        # dependencies are visited in the order of code_obj_ids, so the schedule is deterministic
+        self.positions = {
+            code_obj_id: position for position, code_obj_id in enumerate(code_obj_ids)
+        }
+        self.components = [
+            sorted(component, key=self.positions.get)
+            for component in self.find_components(code_obj_ids)
+        ]
+        self.component_ids = {}
+        for component_id, component in enumerate(self.components):
+            for code_obj_id in component:
+                self.component_ids[code_obj_id] = component_id
+        self.remaining = [len(component) for component in self.components]
+        self.in_degrees = [0] * len(self.components)
+        self.dependent_components = [[] for component in self.components]
+        for component_id, component in enumerate(self.components):
+            dependency_components = {
+                self.component_ids[dependency_id]
+                for code_obj_id in component
+                for dependency_id in self.get_scheduled_dependencies(code_obj_id)
+            }
+            dependency_components.discard(component_id)
+            self.in_degrees[component_id] = len(dependency_components)
+            for dependency_component_id in dependency_components:
+                self.dependent_components[dependency_component_id].append(component_id)
+        # components are found dependencies first, so the queue starts in topological order
+        self.ready = deque(
+            self.components[component_id]
+            for component_id in range(len(self.components))
+            if self.in_degrees[component_id] == 0
+        )
+
+    def get_scheduled_dependencies(self, code_obj_id: int) -> list[int]:
+        return sorted(
+            (
+                dependency_id
+                for dependency_id in self.get_dependencies(code_obj_id)
+                if dependency_id in self.pending
+            ),
+            key=self.positions.get,
+        )
+
+    def find_components(self, code_obj_ids: list[int]) -> list[list[int]]:
+        """
+        Find the strongly connected components of the dependency graph with Tarjan's algorithm,
+        iteratively to support deep call graphs
+
+        :param code_obj_ids: ids of the CodeObjects to schedule
+        :type code_obj_ids: list[int]
+
+        :return: components, each one after all components it depends on
+        :return type: list[list[int]]
+        """
+        indices = {}
+        lowlinks = {}
+        stack = []
+        on_stack = set()
+        components = []
+        for root_id in code_obj_ids:
+            if root_id in indices:
+                continue
+            indices[root_id] = lowlinks[root_id] = len(indices)
+            stack.append(root_id)
+            on_stack.add(root_id)
+            work = [(root_id, iter(self.get_scheduled_dependencies(root_id)))]
+            while len(work) > 0:
+                code_obj_id, dependencies = work[-1]
+                for dependency_id in dependencies:
+                    if dependency_id not in indices:
+                        indices[dependency_id] = lowlinks[dependency_id] = len(indices)
+                        stack.append(dependency_id)
+                        on_stack.add(dependency_id)
+                        work.append(
+                            (dependency_id, iter(self.get_scheduled_dependencies(dependency_id)))
+                        )
+                        break
+                    if dependency_id in on_stack:
+                        lowlinks[code_obj_id] = min(lowlinks[code_obj_id], indices[dependency_id])
+                else:
+                    # all dependencies visited
+                    work.pop()
+                    if len(work) > 0:
+                        caller_id = work[-1][0]
+                        lowlinks[caller_id] = min(lowlinks[caller_id], lowlinks[code_obj_id])
+                    if lowlinks[code_obj_id] == indices[code_obj_id]:
+                        component = []
+                        while True:
+                            member_id = stack.pop()
+                            on_stack.discard(member_id)
+                            component.append(member_id)
+                            if member_id == code_obj_id:
+                                break
+                        components.append(component)
+        return components
+
+    def pop_ready(self) -> list[int]:
+        """
+        Get the next unit of CodeObjects whose dependencies are done
+
+        :return: CodeObject ids of the unit
+        :return type: list[int]
+        """
+        return self.ready.popleft()
+
+    def push(self, code_obj_id: int):
+        """
+        Make a pending CodeObject ready again, e.g. because sending it failed
+
+        :param code_obj_id: CodeObject id
+        :type code_obj_id: int
+        """
+        if code_obj_id in self.pending:
+            self.ready.append([code_obj_id])
+
+    def complete(self, code_obj_id: int):
+        """
+        Mark a CodeObject as done. Units depending on it become ready once all of their other
+        dependencies are done as well
+
+        :param code_obj_id: CodeObject id
+        :type code_obj_id: int
+        """
+        if code_obj_id not in self.pending:
+            return
+        self.pending.remove(code_obj_id)
+        component_id = self.component_ids[code_obj_id]
+        self.remaining[component_id] -= 1
+        if self.remaining[component_id] > 0:
+            return
+        for dependent_component_id in self.dependent_components[component_id]:
+            self.in_degrees[dependent_component_id] -= 1
+            if self.in_degrees[dependent_component_id] == 0:
+                self.ready.append(self.components[dependent_component_id])
+
+
 class CodeRepresenter:
     """Represent all code pieces like modules, classes and methods"""
 
     def __init__(self):
         """Represent all code pieces like modules, classes and methods"""
         self.objects = {}
+        # symbol index by normalized filename, maintained by add_code_obj and remove_code_obj
+        self.filename_index = {}
+        self.filename_name_index = {}
+        self.parent_name_index = {}
+        # DependencyGraph and effectively outdated CodeObjects by graph index, built on the first
+        # outdated check and kept up to date by the methods changing the outdated state
+        self.dependency_graph = None
+        self.outdated_closure = None
+        # BatchScheduler of the outdated CodeObjects, created by the first batch
+        self.scheduler = None
+
+    @staticmethod
+    def normalize_filename(filename: str) -> str:
+        """
+        Canonicalize a filename for use as an index key. Both separators are accepted, relative
+        filenames are resolved against the current working directory
+
+        :param filename: filename to normalize
+        :type filename: str
+
+        :return: normalized filename
+        :return type: str
+        """
+        if not filename.endswith(".py"):
+            filename += ".py"
+        # filenames may come from windows, e.g. the latest commit file or GitHub paths
+        filename = filename.replace("\\", "/")
+        if not os.path.isabs(filename):
+            # resolved before the cache, the working directory may change in between
+            filename = os.path.join(os.getcwd(), filename)
+        return normalize_absolute_filename(filename)
 
     def get(self, id: int) -> CodeObject:
         """
@@ -716,6 +1339,38 @@ class CodeRepresenter:
         """
         if code_obj.id not in self.objects.keys():
             self.objects[code_obj.id] = code_obj
+            self.invalidate_dependency_graph()
+            filename = self.normalize_filename(code_obj.filename)
+            self.filename_index.setdefault(filename, []).append(code_obj)
+            self.filename_name_index.setdefault((filename, code_obj.name), []).append(code_obj)
+            self.parent_name_index.setdefault((code_obj.parent_id, code_obj.name), []).append(
+                code_obj
+            )
+
+    def remove_code_obj(self, code_obj_id: int) -> CodeObject:
+        """
+        Remove a CodeObject
+
+        :param code_obj_id: id of the CodeObject to be removed
+        :type code_obj_id: int
+
+        :return: the removed CodeObject
+        :return type: CodeObject
+        """
+        code_obj = self.objects.pop(code_obj_id)
+        self.invalidate_dependency_graph()
+        filename = self.normalize_filename(code_obj.filename)
+        for index, key in [
+            (self.filename_index, filename),
+            (self.filename_name_index, (filename, code_obj.name)),
+            (self.parent_name_index, (code_obj.parent_id, code_obj.name)),
+        ]:
+            matches = [match for match in index[key] if match.id != code_obj_id]
+            if len(matches) > 0:
+                index[key] = matches
+            else:
+                del index[key]
+        return code_obj
 
     def get_docstring(self, code_obj_id: int) -> str | None:
         """
@@ -849,21 +1504,7 @@ class CodeRepresenter:
         :return: list of matching CodeObjecs
         :return type: list[CodeObject]
         """
-        if not filename.endswith(".py"):
-            filename += ".py"
-        matches = []
-        for object in self.objects.values():
-            if object.filename == filename:
-                matches.append(object)
-            else:
-                # TODO case different separators
-                from pathlib import Path
-
-                if str(os.path.join(*Path(object.filename).parts)) == str(
-                    os.path.join(*Path(filename).parts)
-                ):
-                    matches.append(object)
-        return matches
+        return list(self.filename_index.get(self.normalize_filename(filename), []))
 
     def get_by_type_filename_and_code(self, code_type: str, filename: str, code: str) -> CodeObject:
         """
@@ -882,11 +1523,8 @@ class CodeRepresenter:
         candidates = self.get_by_filename(filename=filename)
         matches = []
         for candidate in candidates:
-            if (
-                candidate.code_type == code_type
-                and candidate.code.strip()
-                in code.strip()  # in instead of == because the extracted code might include additional comments
-            ):
+            # in instead of == because the extracted code might include additional comments
+            if candidate.code_type == code_type and candidate.code.strip() in code.strip():
                 matches.append(candidate)
         if len(matches) > 1:
             raise MultipleMatchesError("More than one match")
@@ -906,14 +1544,22 @@ class CodeRepresenter:
         :return: list of matching CodeObjecs
         :return type: list[CodeObject]
         """
-        candidates = self.get_by_filename(filename=filename)
-        matches = []
-        for candidate in candidates:
-            if (
-                candidate.name == name  # TODO ambiguous
-            ):
-                matches.append(candidate)
-        return matches
+        # TODO ambiguous
+        return list(self.filename_name_index.get((self.normalize_filename(filename), name), []))
+
+    def get_by_parent_and_name(self, parent_id: int | None, name: str) -> list[CodeObject]:
+        """
+        Get direct children of a CodeObject by name
+
+        :param parent_id: id of the parent CodeObject. None for modules
+        :type parent_id: int|None
+        :param name: name of the class, module, or method
+        :type name: str
+
+        :return: list of matching CodeObjecs
+        :return type: list[CodeObject]
+        """
+        return list(self.parent_name_index.get((parent_id, name), []))
 
     def get_context_docstrings(self, code_obj_id: int) -> dict[int, str]:
         """
@@ -978,7 +1624,8 @@ class CodeRepresenter:
 
     def depends_on_outdated_code(self, code_obj_id: int) -> bool:
         """
-        Return if the CodeObject depends on other CodeObjects. Relevant for the order of docstring generation
+        Return if the CodeObject depends on other CodeObjects. Relevant for the order of docstring
+        generation
 
         :param code_obj_id: CodeObject id
         :type code_obj_id: int
@@ -986,18 +1633,14 @@ class CodeRepresenter:
         :return: True if the CodeObject depends on other CodeObjects
         :return type: bool
         """
-        code_obj = self.get(code_obj_id)
-        for code_id in code_obj.called_classes:
-            if self.is_outdated(code_id):
-                return True
-        for code_id in code_obj.called_methods:
-            if self.is_outdated(code_id):
-                return True
-        for class_id in code_obj.class_ids:
-            if self.is_outdated(class_id):
-                return True
-        for method_id in code_obj.method_ids:
-            if self.is_outdated(method_id):
+        if self.outdated_closure is None:
+            self.build_dependency_graph()
+        index = self.dependency_graph.indices.get(code_obj_id)
+        if index is None:
+            return False
+        outdated_closure = self.outdated_closure
+        for dependency in self.dependency_graph.get_dependencies(index):
+            if outdated_closure[dependency]:
                 return True
         return False
 
@@ -1010,25 +1653,84 @@ class CodeRepresenter:
         :param new_docstring: the new docstring
         :type new_docstring: str
         """
+        self.get(code_obj_id).update_docstring(new_docstring=new_docstring)
+        self.update_outdated([code_obj_id])
+        if self.scheduler is not None:
+            self.scheduler.complete(code_obj_id)
+
+    def revert_docstring(self, code_obj_id: int):
+        """
+        Undo the docstring update of a CodeObject whose docstring could not be inserted, so it is
+        outdated and sent again
+
+        :param code_obj_id: CodeObject id
+        :type code_obj_id: int
+        """
         code_obj = self.get(code_obj_id)
-        code_obj.old_docstring = code_obj.docstring
-        code_obj.docstring = new_docstring
-        code_obj.is_updated = True
-        code_obj.outdated = False
+        code_obj.docstring = code_obj.old_docstring
+        code_obj.is_updated = False
+        code_obj.outdated = True
+        self.update_outdated([code_obj_id])
+        self.reschedule(code_obj_id)
 
     def get_outdated_ids(self) -> list[int]:
-        return [code_obj.id for code_obj in self.objects.values() if self.is_outdated(code_obj.id)]
+        if self.outdated_closure is None:
+            self.build_dependency_graph()
+        ids = self.dependency_graph.ids
+        return [ids[index] for index in range(len(ids)) if self.outdated_closure[index]]
 
     def get_sent_to_gpt_ids(self) -> list[int]:
         return [code_obj.id for code_obj in self.objects.values() if code_obj.get_sent_to_gpt()]
 
+    def get_ready_ids(self, dry=False) -> list[int]:
+        """
+        Get the ids of outdated CodeObjects that were not sent yet and do not depend on outdated
+        code, except code they are mutually dependent on
+
+        :param dry: do not take the ids from the schedule
+        :type dry: bool
+
+        :return: CodeObject ids
+        :return type: list[int]
+        """
+        if self.scheduler is None:
+            outdated_ids = self.get_outdated_ids()
+            self.scheduler = BatchScheduler(
+                outdated_ids, get_dependencies=self.dependency_graph.get_dependency_ids
+            )
+        if dry:
+            return [
+                id
+                for component in self.scheduler.ready
+                for id in component
+                if self.is_outdated(id) and not self.get(id).send_to_gpt
+            ]
+        ids = []
+        while len(self.scheduler.ready) > 0:
+            for id in self.scheduler.pop_ready():
+                if not self.is_outdated(id):
+                    # the code it depended on was updated
+                    self.scheduler.complete(id)
+                elif not self.get(id).send_to_gpt:
+                    ids.append(id)
+        return ids
+
+    def reschedule(self, code_obj_id: int):
+        """
+        Mark a CodeObject as not sent, so it is part of the next batch again
+
+        :param code_obj_id: CodeObject id
+        :type code_obj_id: int
+        """
+        self.get(code_obj_id).send_to_gpt = False
+        if self.scheduler is not None:
+            self.scheduler.push(code_obj_id)
+
     def generate_next_batch(self, ignore_dependencies=False, dry=False) -> list[GptInputCodeObject]:
-        ids = [
-            id
-            for id in self.get_outdated_ids()
-            if ignore_dependencies
-            or (not self.depends_on_outdated_code(id) and not self.get(id).send_to_gpt)
-        ]
+        if ignore_dependencies:
+            ids = self.get_outdated_ids()
+        else:
+            ids = self.get_ready_ids(dry=dry)
         batch: List[GptInputCodeObject] = []
         for id in ids:
             code_obj = self.get(id)
@@ -1069,33 +1771,157 @@ class CodeRepresenter:
             changed_files.add(filename)
         return list(changed_files)
 
-    def set_outdated(self, code_obj_id: int):
-        code_obj = self.get(code_obj_id)
-        code_obj.outdated = True
+    def set_outdated(self, code_obj_id: int, outdated: bool = True):
+        """
+        Mark a CodeObject as outdated or no longer outdated and propagate the change to the code
+        depending on it
+
+        :param code_obj_id: CodeObject id
+        :type code_obj_id: int
+        :param outdated: new state
+        :type outdated: bool
+        """
+        self.set_multiple_outdated([code_obj_id], outdated=outdated)
+
+    def set_multiple_outdated(self, outdated_ids: list[int], outdated: bool = True):
+        """
+        Mark multiple CodeObjects as outdated or no longer outdated and propagate the change to the
+        code depending on them
 
-    def set_multiple_outdated(self, outdated_ids: list[int]):
+        :param outdated_ids: CodeObject ids
+        :type outdated_ids: list[int]
+        :param outdated: new state
+        :type outdated: bool
+        """
         for id in outdated_ids:
-            self.set_outdated(id)
+            self.get(id).outdated = outdated
+        self.update_outdated(outdated_ids)
+        if self.scheduler is not None:
+            if outdated:
+                self.scheduler = None  # scheduled again on the next batch
+            else:
+                for id in outdated_ids:
+                    self.scheduler.complete(id)
 
-    def is_outdated(self, code_obj_id):
-        code_obj = self.get(code_obj_id)
-        if code_obj.outdated:
-            return True
-        for dependency_id in [*code_obj.called_methods, *code_obj.called_classes]:
-            dependency_obj = self.get(dependency_id)
-            if self.is_outdated(dependency_obj.id) and not dependency_obj.is_updated:
-                return True
+    def set_updated(self, code_obj_id: int):
+        """
+        Mark a CodeObject as updated and no longer outdated, without changing its docstring
 
-        for dependency_id in [
-            *code_obj.class_ids,
-            *code_obj.method_ids,
-        ]:
-            if dependency_id is None:
+        :param code_obj_id: CodeObject id
+        :type code_obj_id: int
+        """
+        code_obj = self.get(code_obj_id)
+        code_obj.is_updated = True
+        code_obj.outdated = False
+        self.update_outdated([code_obj_id])
+        if self.scheduler is not None:
+            self.scheduler.complete(code_obj_id)
+
+    def invalidate_dependency_graph(self):
+        """Forget the dependency graph. It is built again on the next outdated check"""
+        self.dependency_graph = None
+        self.outdated_closure = None
+        self.scheduler = None
+
+    def build_dependency_graph(self):
+        """
+        Build the dependency graph and the effectively outdated CodeObjects from scratch
+        """
+        code_objects = list(self.objects.values())
+        self.dependency_graph = DependencyGraph(code_objects)
+        for code_obj in code_objects:
+            # the edges are only kept in the graph arrays from now on
+            code_obj.dependency_graph = self.dependency_graph
+            if code_obj.staged_edges is not None:
+                code_obj.staged_edges = None
+        # one flag per graph index
+        self.outdated_closure = bytearray(len(self.dependency_graph.ids))
+        self.propagate_outdated([code_obj.id for code_obj in code_objects if code_obj.outdated])
+
+    def propagate_outdated(self, seed_ids: list[int]):
+        """
+        Mark CodeObjects as effectively outdated, followed by everything depending on them.
+        Propagation stops at updated CodeObjects and at CodeObjects that are already marked, so
+        every CodeObject is visited at most once, even in cyclic call graphs
+
+        :param seed_ids: ids of CodeObjects known to be effectively outdated
+        :type seed_ids: list[int]
+        """
+        indices = self.dependency_graph.indices
+        self.propagate_outdated_indices([indices[code_obj_id] for code_obj_id in seed_ids])
+
+    def propagate_outdated_indices(self, seeds: list[int]):
+        """
+        Mark CodeObjects as effectively outdated by graph index, followed by everything depending
+        on them
+
+        :param seeds: graph indices of CodeObjects known to be effectively outdated
+        :type seeds: list[int]
+        """
+        outdated_closure = self.outdated_closure
+        dependency_graph = self.dependency_graph
+        ids = dependency_graph.ids
+        object_count = dependency_graph.object_count
+        queue = []
+        for index in seeds:
+            if not outdated_closure[index]:
+                outdated_closure[index] = 1
+                queue.append(index)
+        while len(queue) > 0:
+            index = queue.pop()
+            if self.objects[ids[index]].is_updated:
                 continue
-            dependency_obj = self.get(dependency_id)
-            if self.is_outdated(dependency_obj.id) and not dependency_obj.is_updated:
-                return True
-        if isinstance(code_obj, ClassObject) and code_obj.inherited_from is not None:
-            dependency_obj = self.get(code_obj.inherited_from)
-            if self.is_outdated(dependency_id) and not dependency_obj.is_updated:
-                return True
+            for dependent in dependency_graph.get_dependents(index):
+                # callers that are not CodeObjects have no outdated state
+                if not outdated_closure[dependent] and dependent < object_count:
+                    outdated_closure[dependent] = 1
+                    queue.append(dependent)
+
+    def update_outdated(self, changed_ids: list[int]):
+        """
+        Update the effectively outdated set after the outdated or updated state of CodeObjects
+        changed. Only the changed CodeObjects and the outdated code depending on them are
+        recomputed
+
+        :param changed_ids: ids of the CodeObjects whose state changed
+        :type changed_ids: list[int]
+        """
+        if self.outdated_closure is None:
+            return  # built on the next outdated check
+        dependency_graph = self.dependency_graph
+        outdated_closure = self.outdated_closure
+        ids = dependency_graph.ids
+        # everything that may have been outdated because of the changed CodeObjects
+        affected = {dependency_graph.indices[code_obj_id] for code_obj_id in changed_ids}
+        queue = list(affected)
+        while len(queue) > 0:
+            for dependent in dependency_graph.get_dependents(queue.pop()):
+                if outdated_closure[dependent] and dependent not in affected:
+                    affected.add(dependent)
+                    queue.append(dependent)
+        for index in affected:
+            outdated_closure[index] = 0
+        # the rest of the marks are final. Rederive the affected CodeObjects from them
+        seeds = []
+        for index in affected:
+            if self.objects[ids[index]].outdated or any(
+                outdated_closure[dependency] and not self.objects[ids[dependency]].is_updated
+                for dependency in dependency_graph.get_dependencies(index)
+            ):
+                seeds.append(index)
+        self.propagate_outdated_indices(seeds)
+
+    def is_outdated(self, code_obj_id: int) -> bool:
+        """
+        Return if a CodeObject is outdated, or depends on outdated code that was not updated yet
+
+        :param code_obj_id: CodeObject id
+        :type code_obj_id: int
+
+        :return: True if the CodeObject is effectively outdated
+        :return type: bool
+        """
+        if self.outdated_closure is None:
+            self.build_dependency_graph()
+        index = self.dependency_graph.indices.get(code_obj_id)
+        return index is not None and self.outdated_closure[index] == 1
@@ -0,0 +1,200 @@
+import ast
+import difflib
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass
+
+from fingerprint import get_ast_fingerprint, get_fingerprint
+
+
+@dataclass
+class DocstringEdit:
+    """Replacement of a range of characters in a file by a docstring"""
+
+    start: int
+    end: int
+    text: str
+    code_obj_id: int | None = None
+    # lines the edit replaces and the number of lines replacing them, None if it is not line based
+    start_line: int | None = None
+    end_line: int | None = None
+    line_count: int | None = None
+
+
+def apply_edits(text: str, edits: list[DocstringEdit]) -> str:
+    """
+    Apply edits to a text in a single pass. The edits must not overlap
+
+    :param text: text to edit
+    :type text: str
+    :param edits: edits to apply, in any order
+    :type edits: list[DocstringEdit]
+
+    :return: edited text
+    :return type: str
+    """
+    parts = []
+    end = len(text)
+    # from the end backwards, so the offsets of the remaining edits stay valid
+    for edit in sorted(edits, key=lambda edit: edit.start, reverse=True):
+        parts.append(text[edit.end : end])
+        parts.append(edit.text)
+        end = edit.start
+    parts.append(text[:end])
+    return "".join(reversed(parts))
+
+
+def is_code_intact(fingerprint: str, edited_text: str) -> bool:
+    """
+    Check that an edited text is still valid code and only differs in docstrings and comments
+
+    :param fingerprint: fingerprint of the text before the edits
+    :type fingerprint: str
+    :param edited_text: text after the edits
+    :type edited_text: str
+
+    :return: True if the code is intact
+    :return type: bool
+    """
+    if get_fingerprint(edited_text) != fingerprint:
+        return False
+    # the fingerprint does not catch docstrings that break the indentation
+    try:
+        ast.parse(edited_text)
+    except (SyntaxError, ValueError):
+        return False
+    return True
+
+
+def select_edits(text: str, edits: list[DocstringEdit]) -> tuple[list, list]:
+    """
+    Select the edits that only change docstrings and comments. All edits are checked together
+    first, each edit is only checked on its own if that fails
+
+    :param text: text to edit
+    :type text: str
+    :param edits: edits to check
+    :type edits: list[DocstringEdit]
+
+    :return: edits that keep the code intact and rejected edits
+    :return type: tuple[list[DocstringEdit], list[DocstringEdit]]
+    """
+    fingerprint = get_fingerprint(text)
+    accepted = []
+    rejected = []
+    # overlapping edits are rejected, except the first one
+    for edit in sorted(edits, key=lambda edit: edit.start):
+        if len(accepted) > 0 and (
+            edit.start < accepted[-1].end or edit.start == accepted[-1].start
+        ):
+            rejected.append(edit)
+        else:
+            accepted.append(edit)
+    if is_code_intact(fingerprint, apply_edits(text, accepted)):
+        return accepted, rejected
+    valid_edits = []
+    for edit in accepted:
+        if is_code_intact(fingerprint, apply_edits(text, [edit])):
+            valid_edits.append(edit)
+        else:
+            rejected.append(edit)
+    # edits that are only valid on their own
+    if not is_code_intact(fingerprint, apply_edits(text, valid_edits)):
+        return [], rejected + valid_edits
+    return valid_edits, rejected
+
+
+def check_file_integrity(
+    before_fingerprint: str | None, content_before: str | None, content_after: str
+) -> bool:
+    """
+    Check that the ast of a file only differs in docstrings after editing it. Runs in worker
+    processes
+
+    :param before_fingerprint: ast fingerprint of the file before editing. None to compute it
+    :type before_fingerprint: str|None
+    :param content_before: content of the file before editing, only needed without fingerprint
+    :type content_before: str|None
+    :param content_after: content of the file after editing
+    :type content_after: str
+
+    :return: True if the code is intact
+    :return type: bool
+    """
+    try:
+        if before_fingerprint is None:
+            before_fingerprint = get_ast_fingerprint(ast.parse(content_before))
+        return get_ast_fingerprint(ast.parse(content_after)) == before_fingerprint
+    except (SyntaxError, ValueError):
+        return False
+
+
+def write_atomically(filename: str, content: str):
+    """
+    Write a file through a temporary file, so it is never left partially written
+
+    :param filename: file to write
+    :type filename: str
+    :param content: new content of the file
+    :type content: str
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(filename), suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode="w") as f:
+            f.write(content)
+        if os.path.exists(filename):
+            shutil.copymode(filename, tmp_path)
+        os.replace(tmp_path, filename)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def split_lines(text: str) -> list[str]:
+    """
+    Split a text into lines at newline characters only, including line endings
+
+    :param text: text to split
+    :type text: str
+
+    :return: lines
+    :return type: list[str]
+    """
+    lines = [line + "\n" for line in text.split("\n")]
+    lines[-1] = lines[-1][:-1]
+    if len(lines[-1]) == 0:
+        lines.pop()
+    return lines
+
+
+def get_unified_diff(path: str, content_before: str, content_after: str) -> str:
+    """
+    Get the changes to a file as unified diff, in the format git apply accepts
+
+    :param path: path of the file relative to the repository, using "/" as separator
+    :type path: str
+    :param content_before: content of the file before editing
+    :type content_before: str
+    :param content_after: content of the file after editing
+    :type content_after: str
+
+    :return: unified diff, empty if the content did not change
+    :return type: str
+    """
+    if content_before == content_after:
+        return ""
+    diff = [f"diff --git a/{path} b/{path}\n"]
+    for line in difflib.unified_diff(
+        split_lines(content_before),
+        split_lines(content_after),
+        fromfile=f"a/{path}",
+        tofile=f"b/{path}",
+    ):
+        diff.append(line)
+        if not line.endswith("\n"):
+            diff.append("\n\\ No newline at end of file\n")
+    return "".join(diff)
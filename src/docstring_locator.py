@@ -0,0 +1,177 @@
+import ast
+import tokenize
+
+from source_store import SourceBuffer
+
+OPENING_BRACKETS = {"(", "[", "{"}
+CLOSING_BRACKETS = {")", "]", "}"}
+
+
+def get_indentation_level(line: str) -> int:
+    """
+    Get the indentation level of a line, tabs count as 4 spaces
+
+    :param line: line
+    :type line: str
+
+    :return: indentation level
+    :return type: int
+    """
+    return sum(4 if char == "\t" else 1 for char in line[: len(line) - len(line.lstrip())])
+
+
+def get_header_end(lines: list[str], node: ast.AST) -> int:
+    """
+    Get the line the signature of a class or method ends on, which is the line of the colon
+    following it
+
+    :param lines: lines of the file
+    :type lines: list[str]
+    :param node: class or function definition
+    :type node: ast.AST
+
+    :return: line index, starting at 0
+    :return type: int
+    """
+    first_line = node.lineno - 1
+    depth = 0
+    readline = iter(lines[first_line:]).__next__
+    try:
+        for token in tokenize.generate_tokens(readline):
+            if token.type != tokenize.OP:
+                continue
+            if token.string in OPENING_BRACKETS:
+                depth += 1
+            elif token.string in CLOSING_BRACKETS:
+                depth -= 1
+            elif token.string == ":" and depth == 0:
+                return first_line + token.start[0] - 1
+    except (tokenize.TokenError, SyntaxError, StopIteration):
+        pass
+    # the body starts after the signature at the latest
+    return node.body[0].lineno - 2
+
+
+class DocstringLocator:
+    """Locations of the docstrings of the module, classes and methods in a file"""
+
+    def __init__(self, buffer: SourceBuffer):
+        """
+        Locations of the docstrings of the module, classes and methods in a file, computed in a
+        single pass over its ast. A location is the range of lines the docstring occupies, or an
+        empty range where a new docstring would be inserted, and the indentation level of the
+        docstring. Classes and methods are identified by their path of names and occurrences
+        below the module, like the CodeObjects extracted by CodeParser
+
+        :param buffer: content of the file
+        :type buffer: SourceBuffer
+        """
+        self.buffer = buffer
+        self.locations = {}
+        lines = buffer.get_lines()
+        tree = ast.parse(buffer.text)
+        docstring_node = self.get_docstring_node(tree)
+        if docstring_node is None:
+            self.locations[()] = [0, 0, 0]
+        else:
+            self.locations[()] = [docstring_node.lineno - 1, 0, docstring_node.end_lineno]
+        self.add_locations(lines, tree, ())
+
+    @staticmethod
+    def get_docstring_node(node: ast.AST) -> ast.Expr | None:
+        """
+        Get the docstring of a module, class or method
+
+        :param node: module, class or function definition
+        :type node: ast.AST
+
+        :return: docstring statement, None if there is no docstring
+        :return type: ast.Expr|None
+        """
+        if (
+            len(node.body) > 0
+            and isinstance(node.body[0], ast.Expr)
+            and isinstance(node.body[0].value, ast.Constant)
+            and isinstance(node.body[0].value.value, str)
+        ):
+            return node.body[0]
+        return None
+
+    def add_locations(self, lines: list[str], node: ast.AST, path: tuple[tuple[str, int], ...]):
+        """
+        Add the docstring locations of the classes and methods in the body of a node
+
+        :param lines: lines of the file
+        :type lines: list[str]
+        :param node: module, class or function definition
+        :type node: ast.AST
+        :param path: path of the node
+        :type path: tuple[tuple[str, int], ...]
+        """
+        # children are found like CodeParser.extract_sub_classes_and_methods does
+        occurrences = {}
+        for child in node.body:
+            if not (
+                isinstance(child, ast.FunctionDef)
+                or isinstance(child, ast.AsyncFunctionDef)
+                or isinstance(child, ast.ClassDef)
+            ):
+                continue
+            occurrence = occurrences.get(child.name, 0)
+            occurrences[child.name] = occurrence + 1
+            child_path = path + ((child.name, occurrence),)
+            header_end = get_header_end(lines, child)
+            first_statement = child.body[0]
+            if first_statement.lineno - 1 > header_end:
+                indentation_level = get_indentation_level(lines[first_statement.lineno - 1])
+            else:
+                # the body is on the same line as the signature
+                indentation_level = get_indentation_level(lines[child.lineno - 1]) + 4
+            docstring_node = self.get_docstring_node(child)
+            if docstring_node is None or docstring_node.lineno - 1 == header_end:
+                self.locations[child_path] = [header_end + 1, indentation_level, header_end + 1]
+            else:
+                self.locations[child_path] = [
+                    docstring_node.lineno - 1,
+                    indentation_level,
+                    docstring_node.end_lineno,
+                ]
+            self.add_locations(lines, child, child_path)
+
+    def get(self, path: tuple[tuple[str, int], ...]) -> tuple[int, int, int] | None:
+        """
+        Get the docstring location of the module, a class or a method
+
+        :param path: path of names and occurrences below the module, the module has the empty path
+        :type path: tuple[tuple[str, int], ...]
+
+        :return: tuple(start, indentation level, end). None if there is no such class or method
+        :return type: tuple[int, int, int]|None
+        """
+        location = self.locations.get(path)
+        if location is None:
+            return None
+        return tuple(location)
+
+    def apply_edit(self, start: int, end: int, line_count: int, buffer: SourceBuffer):
+        """
+        Adjust the locations to a docstring being replaced or inserted
+
+        :param start: first replaced line
+        :type start: int
+        :param end: line after the last replaced line
+        :type end: int
+        :param line_count: number of lines that replaced them
+        :type line_count: int
+        :param buffer: content of the file after the edit
+        :type buffer: SourceBuffer
+        """
+        line_delta = line_count - (end - start)
+        for location in self.locations.values():
+            if location[0] == start:
+                # the edited docstring
+                location[2] = start + line_count
+            elif location[0] >= end:
+                location[0] += line_delta
+                location[2] += line_delta
+        self.buffer = buffer
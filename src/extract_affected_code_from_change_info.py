@@ -1,151 +1,154 @@
-def extract_methods_from_change_info(
-    filename: str, change_start: int, change_length: int
-) -> list[dict[str | int]]:
-    """
-    Extract start, end and content of methods affected by change information
+import bisect
+import re
+from collections.abc import Iterable, Iterator
 
-    :param filename: filename
-    :type filename: str
-    :param change_start: line where the change begins
-    :type change_start: int
-    :param change_length: line length of the change
-    :type change_length: int
+HUNK_HEADER_PATTERN = re.compile(r"@@ -\d+(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
 
-    :return: list of method information as dict with keys type, filename, start, end, content
-    :return type: list[dict[str|int]]
-    """
-    with open(filename, "r") as f:
-        content = f.readlines()
-
-    line = change_start
-    method_locations = []
-    # search for first affected method position
-    while line >= 0:
-        if content[line].lstrip().startswith("def "):
-            break
-        line -= 1
-    if content[line].lstrip().startswith("def "):
-        method_locations.append({"start": line})
-
-    # search for additional affected method positions
-    num_method = 0
-    line = change_start + 1
-    while line < len(content):
-        if content[line].lstrip().startswith("def "):
-            if len(method_locations) > 0:
-                method_locations[-1]["end"] = line - 1
-                # TODO detect and remove newlines before next method
-                num_method += 1
-            if line > change_start + change_length:
-                break
-            method_locations.append({"start": line})
-            line += 2
-            continue
-        line += 1
-    if len(method_locations) > 0 and "end" not in method_locations[-1].keys():
-        method_locations[-1]["end"] = len(content)
-
-    methods = []
-    for method_location in method_locations:
-        methods.append(
-            {
-                "type": "method",
-                "filename": filename,
-                "start": method_location["start"],
-                "end": method_location["end"],
-                "content": "".join(
-                    content[method_location["start"] : method_location["end"]]
-                ),
-            }
-        )
 
-    return methods
+def unquote_path(path: str) -> str:
+    """
+    Undo the quoting git applies to paths with special characters
 
+    :param path: path as printed by git
+    :type path: str
 
-def extract_classes_from_change_info(
-    filename: str, change_start: int, change_length: int
-) -> list[dict[str | int]]:
+    :return: path
+    :return type: str
+    """
+    if not path.startswith('"'):
+        return path
+    # octal escapes stand for the bytes of the utf-8 encoded path
+    return (
+        path[1:-1]
+        .encode("latin-1", errors="backslashreplace")
+        .decode("unicode_escape")
+        .encode("latin-1")
+        .decode("utf-8", errors="replace")
+    )
+
+
+def parse_diff(lines: Iterable[str]) -> Iterator[dict[str, str | int]]:
     """
-    Extract start, end and content of classes affected by change information
+    Parse the output of git diff line by line and yield every hunk with the lines it covers in
+    the new version of the file. Hunks of deleted files are skipped, since no code is left to be
+    affected. The diff should be created with --unified=0, context lines would widen the hunks,
+    and with the default prefixes a/ and b/
 
-    :param filename: filename
-    :type filename: str
-    :param change_start: line where the change begins
-    :type change_start: int
-    :param change_length: line length of the change
-    :type change_length: int
+    :param lines: lines of the diff
+    :type lines: Iterable[str]
 
-    :return: list of class information as dict with keys type, filename, start, end, content
-    :return type: list[dict[str|int]]
+    :return: hunks as dicts with keys filename (relative to the repository), start (first line,
+        starting at 1) and lines_changed (0 if lines were only removed after line start)
+    :return type: Iterator[dict[str, str|int]]
     """
-    with open(filename, "r") as f:
-        content = f.readlines()
-
-    line = change_start
-    class_locations = []
-    # search for first affected method position
-    while line >= 0:
-        if content[line].lstrip().startswith("class "):
-            break
-        line -= 1
-    if content[line].lstrip().startswith("class "):
-        class_locations.append({"start": line})
-
-    # search for additional affected method positions
-    num_class = 0
-    line = change_start + 1
-    while line < len(content):
-        if content[line].lstrip().startswith("class "):
-            if len(class_locations) > 0:
-                class_locations[-1]["end"] = line - 1
-                # TODO detect and remove newlines before next class
-                num_class += 1
-            if line > change_length:
-                break
-            class_locations.append({"start": line})
-            line += 2
+    filename = None
+    # lines of the current hunk that were not read yet, so content lines are never headers
+    remaining_lines = 0
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if remaining_lines > 0:
+            if line[:1] in ("+", "-", " "):
+                remaining_lines -= 1
+            continue
+        if line.startswith("+++ "):
+            path = unquote_path(line[4:])
+            filename = None if path == "/dev/null" else path[2:]
             continue
-        line += 1
-    if len(class_locations) > 0 and "end" not in class_locations[-1].keys():
-        class_locations[-1]["end"] = len(content)
-
-    classes = []
-    for class_location in class_locations:
-        classes.append(
-            {
-                "type": "class",
+        match = HUNK_HEADER_PATTERN.match(line)
+        if match is None:
+            continue
+        old_length = 1 if match.group(1) is None else int(match.group(1))
+        new_length = 1 if match.group(3) is None else int(match.group(3))
+        remaining_lines = old_length + new_length
+        if filename is not None:
+            yield {
                 "filename": filename,
-                "start": class_location["start"],
-                "end": class_location["end"],
-                "content": "".join(
-                    content[class_location["start"] : class_location["end"]]
-                ),
+                "start": int(match.group(2)),
+                "lines_changed": new_length,
             }
-        )
-
-    return classes
 
 
-def extract_module_from_change_info(filename: str) -> list[dict[str | int]]:
+def get_line_span(code_obj) -> tuple[int, int] | None:
     """
-    Extract start, end and content of methods affected by change information
+    Get the lines a CodeObject covers, including its decorators
 
-    :param filename: filename
-    :type filename: str
-    :param change_start: line where the change begins
-    :type change_start: int
-    :param change_length: line length of the change
-    :type change_length: int
+    :param code_obj: CodeObject
+    :type code_obj: CodeObject
 
-    :return: list of method information as dict with keys type, filename, start, end, content
-    :return type: list[dict[str|int]]
+    :return: first and last line, starting at 1. None if the location is unknown
+    :return type: tuple[int, int]|None
     """
-    with open(filename, "r") as f:
-        content = f.readlines()
-    return {
-        "type": "module",
-        "filename": filename,
-        "start": 0,
-        "end": len(content),
-        "content": "".join(content),
-    }
+    if code_obj.code_type == "module":
+        if code_obj.code_buffer is not None:
+            return (1, max(len(code_obj.code_buffer.line_offsets), 1))
+        return (1, code_obj.code.count("\n") + 1)
+    node = code_obj.ast
+    if node is None or getattr(node, "end_lineno", None) is None:
+        return None
+    start = min([node.lineno] + [decorator.lineno for decorator in node.decorator_list])
+    return (start, node.end_lineno)
+
+
+class LineIndex:
+    """Index of the lines covered by the CodeObjects of a file"""
+
+    def __init__(self, code_objects: list):
+        """
+        Index of the lines covered by the CodeObjects of a file. The spans of code objects are
+        either nested or disjoint, so they are kept sorted by their first line together with the
+        innermost span enclosing each of them. This works like an interval tree for nested spans
+
+        :param code_objects: CodeObjects of a single file
+        :type code_objects: list[CodeObject]
+        """
+        spans = []
+        for code_obj in code_objects:
+            span = get_line_span(code_obj)
+            if span is not None:
+                spans.append((span[0], -span[1], code_obj.id))
+        # enclosing spans first if they start on the same line
+        spans.sort()
+        self.starts = [start for start, _, _ in spans]
+        self.ends = [-negative_end for _, negative_end, _ in spans]
+        self.ids = [code_obj_id for _, _, code_obj_id in spans]
+        self.parents = []
+        enclosing = []
+        for index, start in enumerate(self.starts):
+            while enclosing and self.ends[enclosing[-1]] < start:
+                enclosing.pop()
+            self.parents.append(enclosing[-1] if enclosing else -1)
+            enclosing.append(index)
+
+    def get_ids(self, start: int, end: int) -> set[int]:
+        """
+        Get the ids of the CodeObjects covering any line in a range. These are the innermost
+        CodeObjects affected by a change of the lines and all CodeObjects enclosing them
+
+        :param start: first line, starting at 1
+        :type start: int
+        :param end: last line
+        :type end: int
+
+        :return: CodeObject ids
+        :return type: set[int]
+        """
+        ids = set()
+        seen = set()
+
+        def add_with_parents(index):
+            while index != -1 and index not in seen:
+                seen.add(index)
+                ids.add(self.ids[index])
+                index = self.parents[index]
+
+        # the innermost span containing the first line, spans starting before it end before it
+        index = bisect.bisect_right(self.starts, start) - 1
+        while index != -1 and self.ends[index] < start:
+            index = self.parents[index]
+        add_with_parents(index)
+        # spans starting within the range
+        for index in range(
+            bisect.bisect_right(self.starts, start), bisect.bisect_right(self.starts, end)
+        ):
+            add_with_parents(index)
+        return ids
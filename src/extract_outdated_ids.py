@@ -1,116 +1,121 @@
-import copy
-import helpers
-from code_representation import ModuleObject, NoMatchError, MultipleMatchesError
+import os
 
+from fingerprint import get_fingerprint
 
-def extract_code_affected_by_change(code_parser_old, code_parser_new):
-    outdated_ids = set()
-    # create ast from latest_commit state and current state
-    # create code representation from latest_commit state and current state
-    # while loop look for methods and classes that have no children in current state ast
-    object_copy = copy.deepcopy(
-        code_parser_new.code_representer.objects
-    )  # prevent mutating objects in code_prepresenter
-    next_code_objects = [
-        code_object
-        for code_object in object_copy.values()
-        if (not hasattr(code_object, "class_ids") or len(code_object.class_ids) == 0)
-        and (not hasattr(code_object, "method_ids") or len(code_object.method_ids) == 0)
+
+def get_own_code(code_representer, code_obj) -> str:
+    """
+    Get the code of a CodeObject without the code of its direct child classes and methods, which
+    is replaced by their names. Code that is not held as a span of a file is returned whole
+
+    :param code_representer: CodeRepresenter the CodeObject belongs to
+    :type code_representer: CodeRepresenter
+    :param code_obj: CodeObject to get the code of
+    :type code_obj: CodeObject
+
+    :return: own code of the CodeObject
+    :return type: str
+    """
+    if code_obj.code_buffer is None:
+        return code_obj.code
+    children = [
+        code_representer.get(child_id) for child_id in (*code_obj.class_ids, *code_obj.method_ids)
     ]
-    while len(next_code_objects) > 0:
-        for new_code_object in next_code_objects:
-            # look for those methods/classes in latest_commit state
-            old_code_object = [
-                code_object
-                for code_object in code_parser_old.code_representer.objects.values()
-                if code_object.name == new_code_object.name
-                and code_object.filename == new_code_object.filename
-                and (
-                    code_object.parent_id is None
-                    or code_parser_old.code_representer.get(code_object.parent_id).name
-                    == code_parser_new.code_representer.get(new_code_object.parent_id).name
-                )
-            ]
-            if len(old_code_object) > 1:
-                # if that does not work, ignore modules
-                old_code_object = [
-                    code_obj
-                    for code_obj in old_code_object
-                    if not isinstance(code_obj, ModuleObject)
-                ]
-                if len(old_code_object) > 1:
-                    parent_ids = []
-                    tmp = []
-                    for code_obj in old_code_object:
-                        if code_obj.parent_id not in parent_ids:
-                            tmp.append(code_obj)
-                            parent_ids.append(code_obj.parent_id)
-                    old_code_object = tmp
-                if len(old_code_object) < 1:
-                    raise NoMatchError
-                elif len(old_code_object) > 1:
-                    raise MultipleMatchesError
-            # compare them
-            if (len(old_code_object) > 0) and (
-                new_code_object.code == old_code_object[0].code
-                or helpers.remove_comments(new_code_object.code)
-                == helpers.remove_comments(old_code_object[0].code)
-            ):
-                new_code_object.validated_unaltered = True
-                continue
-            # if they are different, or new, mark as outdated
-            outdated_ids.add(new_code_object.id)
-            new_code_object.outdated = True
-            for parent_object in [
-                code_object
-                for code_object in object_copy.values()
-                if (
-                    hasattr(code_object, "class_ids")
-                    and new_code_object.id in code_object.class_ids
-                )
-                or (
-                    hasattr(code_object, "method_ids")
-                    and new_code_object.id in code_object.method_ids
-                )
-            ]:
-                # remove those methods/classes from list of children of other objects
-                if new_code_object.id in parent_object.class_ids:
-                    parent_object.class_ids.remove(new_code_object.id)
-                if new_code_object.id in parent_object.method_ids:
-                    parent_object.method_ids.remove(new_code_object.id)
-                # remove those methods/classes code from code of objects that have them as children, unless it's a new method/class
-                if len(old_code_object) == 1:
-                    parent_object.code = parent_object.code.replace(new_code_object.code, "")
-            object_copy.pop(new_code_object.id)
-            if len(old_code_object) == 1:
-                for parent_object in [
-                    code_object
-                    for code_object in code_parser_old.code_representer.objects.values()
-                    if (
-                        hasattr(code_object, "class_ids")
-                        and old_code_object[0].id in code_object.class_ids
-                    )
-                    or (
-                        hasattr(code_object, "method_ids")
-                        and old_code_object[0].id in code_object.method_ids
-                    )
-                ]:
-                    # remove those methods/classes from list of children of other objects
-                    if old_code_object[0].id in parent_object.class_ids:
-                        parent_object.class_ids.remove(old_code_object[0].id)
-                    if old_code_object[0].id in parent_object.method_ids:
-                        parent_object.method_ids.remove(old_code_object[0].id)
-                    # remove those methods/classes code from code of objects that have them as children
-                    parent_object.code = parent_object.code.replace(old_code_object[0].code, "")
-                    code_parser_old.code_representer.objects.pop(old_code_object[0].id)
-        # update next code objects
-        next_code_objects = [
-            code_object
-            for code_object in object_copy.values()
-            if not (hasattr(code_object, "validated_unaltered") and code_object.validated_unaltered)
-            and (not hasattr(code_object, "class_ids") or len(code_object.class_ids) == 0)
-            and (not hasattr(code_object, "method_ids") or len(code_object.method_ids) == 0)
+    children.sort(key=lambda child: child.code_start)
+    text = code_obj.code_buffer.text
+    parts = []
+    start = code_obj.code_start
+    for child in children:
+        if child.code_buffer is not code_obj.code_buffer:
+            return code_obj.code
+        parts.append(text[start : child.code_start])
+        parts.append(child.name)
+        start = child.code_end
+    parts.append(text[start : code_obj.code_end])
+    return "".join(parts)
+
+
+def get_keys(code_representer, code_objects) -> dict[int, tuple]:
+    """
+    Get the keys of CodeObjects, made of their normalized filename and their path of names and
+    occurrences below the module. The key of a CodeObject is the same in every version of the
+    code as long as it is not renamed or moved
+
+    :param code_representer: CodeRepresenter the CodeObjects belong to
+    :type code_representer: CodeRepresenter
+    :param code_objects: CodeObjects to get the keys of
+    :type code_objects: Iterable[CodeObject]
+
+    :return: keys by CodeObject id
+    :return type: dict[int, tuple[str, tuple[tuple[str, int], ...]]]
+    """
+    keys = {}
+
+    def get_key(code_obj):
+        key = keys.get(code_obj.id)
+        if key is None:
+            if code_obj.code_type == "module" or code_obj.parent_id is None:
+                filename = code_representer.normalize_filename(code_obj.filename)
+                path = ()
+            else:
+                filename, path = get_key(code_representer.get(code_obj.parent_id))
+            if code_obj.code_type != "module":
+                path = path + ((code_obj.name, code_obj.occurrence),)
+            key = (filename, path)
+            keys[code_obj.id] = key
+        return key
+
+    for code_obj in code_objects:
+        get_key(code_obj)
+    return keys
+
+
+def extract_code_affected_by_change(code_parser_old, code_parser_new, changed_files=None):
+    """
+    Compare the code objects of the current state with those of the latest commit. Code objects
+    are matched by their key and compared by fingerprints of their own code, so a changed method
+    does not make its class outdated, but an added or removed one does. Neither CodeParser is
+    modified
+
+    :param code_parser_old: CodeParser of the latest commit, only used for comparison
+    :type code_parser_old: CodeParser
+    :param code_parser_new: CodeParser of the current state, the returned ids belong to its
+        CodeRepresenter
+    :type code_parser_new: CodeParser
+    :param changed_files: files that changed since the latest commit. Code objects of other files
+        are unaltered and not compared. If None, all code objects are compared
+    :type changed_files: list[str]|None
+
+    :return: ids of the new and changed CodeObjects of code_parser_new
+    :return type: set[int]
+    """
+    code_representer_new = code_parser_new.code_representer
+    code_representer_old = code_parser_old.code_representer
+    new_objects = code_representer_new.get_code_objects()
+    if changed_files is not None:
+        # a code object and its children are always in the same file
+        changed_files = {os.path.normpath(file) for file in changed_files}
+        new_objects = [
+            code_obj
+            for code_obj in new_objects
+            if os.path.normpath(code_obj.filename) in changed_files
         ]
+    old_objects = code_representer_old.get_code_objects()
+    new_keys = get_keys(code_representer_new, new_objects)
+    old_keys = get_keys(code_representer_old, old_objects)
+    old_objects_by_key = {old_keys[code_obj.id]: code_obj for code_obj in old_objects}
+    outdated_ids = set()
+    for code_obj in new_objects:
+        key = new_keys[code_obj.id]
+        old_code_obj = old_objects_by_key.get(key)
+        if old_code_obj is None:
+            outdated_ids.add(code_obj.id)
+        elif old_code_obj.code != code_obj.code:
+            # only code that changed is fingerprinted
+            fingerprint = get_fingerprint(get_own_code(code_representer_new, code_obj))
+            old_fingerprint = get_fingerprint(get_own_code(code_representer_old, old_code_obj))
+            if fingerprint != old_fingerprint:
+                outdated_ids.add(code_obj.id)
     return outdated_ids
 
 
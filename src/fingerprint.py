@@ -0,0 +1,152 @@
+import ast
+import hashlib
+import io
+import tokenize
+
+# tokens that do not change what the code does
+IGNORED_TOKENS = {
+    tokenize.COMMENT,
+    tokenize.NL,
+    tokenize.ENCODING,
+    tokenize.ENDMARKER,
+}
+# tokens after which a statement starts
+STATEMENT_BOUNDARIES = {tokenize.NEWLINE, tokenize.INDENT, tokenize.DEDENT}
+# nodes that can have a docstring
+DOCSTRING_OWNERS = (ast.Module, ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)
+# fingerprints by content hash, the oldest ones are dropped first
+MAX_CACHED_FINGERPRINTS = 100_000
+fingerprints = {}
+
+
+def get_content_hash(code: str) -> bytes:
+    """
+    Get a hash of the exact code
+
+    :param code: code to hash
+    :type code: str
+
+    :return: hash
+    :return type: bytes
+    """
+    return hashlib.blake2b(code.encode("utf-8"), digest_size=16).digest()
+
+
+def get_fingerprint(code: str) -> str:
+    """
+    Get a fingerprint of code that does not change with formatting, comments and docstrings.
+    Fingerprints are cached by the hash of the code, so every version of a file or code object is
+    only tokenized once
+
+    :param code: code to fingerprint
+    :type code: str
+
+    :return: fingerprint
+    :return type: str
+    """
+    content_hash = get_content_hash(code)
+    fingerprint = fingerprints.get(content_hash)
+    if fingerprint is None:
+        fingerprint = create_fingerprint(code)
+        if len(fingerprints) >= MAX_CACHED_FINGERPRINTS:
+            del fingerprints[next(iter(fingerprints))]
+        fingerprints[content_hash] = fingerprint
+    return fingerprint
+
+
+def create_fingerprint(code: str) -> str:
+    """
+    Create a fingerprint of code from its tokens. Comments, blank lines, line breaks within
+    brackets and strings that make up a whole statement, like docstrings, are left out. Code that
+    cannot be tokenized is fingerprinted as is
+
+    :param code: code to fingerprint
+    :type code: str
+
+    :return: fingerprint
+    :return type: str
+    """
+    try:
+        tokens = [
+            token
+            for token in tokenize.generate_tokens(io.StringIO(code).readline)
+            if token.type not in IGNORED_TOKENS
+        ]
+    except (tokenize.TokenError, SyntaxError):
+        return get_content_hash(code).hex()
+    normalized = []
+    position = 0
+    while position < len(tokens):
+        token = tokens[position]
+        if (
+            token.type == tokenize.STRING
+            and (position == 0 or tokens[position - 1].type in STATEMENT_BOUNDARIES)
+            and (position + 1 == len(tokens) or tokens[position + 1].type == tokenize.NEWLINE)
+        ):
+            # skip the string statement and the end of its line
+            position += 2
+            continue
+        if token.type in STATEMENT_BOUNDARIES:
+            normalized.append(tokenize.tok_name[token.type])
+        else:
+            normalized.append(token.string)
+        position += 1
+    return hashlib.blake2b("\n".join(normalized).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def get_ast_fingerprint(tree: ast.AST) -> str:
+    """
+    Get a fingerprint of an ast without its docstrings. Unlike get_fingerprint, it only matches
+    if the compiled code is the same. Comments and formatting are not part of the ast
+
+    :param tree: ast to fingerprint, it is not modified
+    :type tree: ast.AST
+
+    :return: fingerprint
+    :return type: str
+    """
+    parts = []
+    add_ast_parts(tree, parts)
+    return hashlib.blake2b("".join(parts).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def add_ast_parts(node, parts: list[str]):
+    """
+    Add the parts of a dump of an ast node without docstrings and positions, like ast.dump
+
+    :param node: ast node, list of nodes or value of a field
+    :type node: ast.AST|list|Any
+    :param parts: parts of the dump to add to
+    :type parts: list[str]
+    """
+    if isinstance(node, ast.AST):
+        parts.append(type(node).__name__)
+        parts.append("(")
+        for name, value in ast.iter_fields(node):
+            if (
+                name == "body"
+                and isinstance(node, DOCSTRING_OWNERS)
+                and len(value) > 0
+                and isinstance(value[0], ast.Expr)
+                and isinstance(value[0].value, ast.Constant)
+                and isinstance(value[0].value.value, str)
+            ):
+                value = value[1:]
+            parts.append(name)
+            parts.append("=")
+            add_ast_parts(value, parts)
+            parts.append(",")
+        parts.append(")")
+    elif isinstance(node, list):
+        parts.append("[")
+        for item in node:
+            add_ast_parts(item, parts)
+            parts.append(",")
+        parts.append("]")
+    else:
+        parts.append(repr(node))
+
+
+def clear():
+    """Clear the cached fingerprints"""
+    fingerprints.clear()
@@ -1,9 +1,12 @@
 import ast
+import logging
 import os
 import pathlib
 import sys
-from typing import Self
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, field, replace
 
+from code_analyzer import ANALYZER_VERSION, CallSite, CodeAnalyzer
 from code_representation import (
     ClassObject,
     CodeObject,
@@ -13,20 +16,18 @@ from code_representation import (
     NoMatchError,
     MultipleMatchesError,
 )
-from extract_affected_code_from_change_info import (
-    extract_classes_from_change_info,
-    extract_methods_from_change_info,
-    extract_module_from_change_info,
-)
+from extract_affected_code_from_change_info import LineIndex
 from import_finder import ImportFinder
+from parse_cache import ParseCache
 from repo_controller import UnknownCodeObjectError
+from source_store import SourceBuffer, SourceStore
 
 code = CodeRepresenter()  # TODO what is this for?
 
 
-class AttributeExtractionError(Exception):
+class VariableChainResolutionError(Exception):
     """
-    Exception raised when Attribute extraction fails.
+    Exception raised when variable chain resolution fails.
 
     Attributes:
         message -- explanation of the error
@@ -36,40 +37,73 @@ class AttributeExtractionError(Exception):
         self.message = message
 
 
-class ExceptionExtractionError(Exception):
+@dataclass
+class FileParseResult:
     """
-    Exception raised when exception extraction fails.
-
-    Attributes:
-        message -- explanation of the error
+    Picklable extraction result of a single file, as returned by worker processes
+
+    :param filename: the parsed file
+    :type filename: str
+    :param objects: extracted CodeObjects by id, including arguments, exceptions and attributes
+    :type objects: dict[int, CodeObject]
+    :param imports: imports of the file
+    :type imports: list[str]
+    :param aliases: import aliases of the file
+    :type aliases: dict[str, str]
+    :param call_sites: unresolved calls made by the CodeObjects of the file
+    :type call_sites: list[CallSite]
+    :param assignments: all assignments of the file, in the order of ast.walk. None if unknown
+    :type assignments: list[ast.Assign|ast.AnnAssign]|None
     """
 
-    def __init__(self, message):
-        self.message = message
+    filename: str
+    objects: dict[int, CodeObject] = field(default_factory=dict)
+    imports: list[str] = field(default_factory=list)
+    aliases: dict[str, str] = field(default_factory=dict)
+    call_sites: list[CallSite] = field(default_factory=list)
+    assignments: list[ast.Assign | ast.AnnAssign] | None = field(default_factory=list)
 
 
-class VariableChainResolutionError(Exception):
+def parse_file(
+    filename: str, source: str, working_dir: str | None, debug: bool = False
+) -> FileParseResult:
     """
-    Exception raised when variable chain resolution fails.
-
-    Attributes:
-        message -- explanation of the error
+    Parse a single file and extract everything that does not depend on other files. Runs in a
+    worker process
+
+    :param filename: file to parse
+    :type filename: str
+    :param source: content of the file
+    :type source: str
+    :param working_dir: path to target code
+    :type working_dir: str|None
+    :param debug: toggle debug mode
+    :type debug: bool
+
+    :return: extraction result of the file
+    :return type: FileParseResult
     """
-
-    def __init__(self, message):
-        self.message = message
-
-
-class VariableChainCreationError(Exception):
-    """
-    Exception raised when variable chain creatin fails.
-
-    Attributes:
-        message -- explanation of the error
-    """
-
-    def __init__(self, message):
-        self.message = message
+    source_store = SourceStore()
+    source_store.add_source(filename, source)
+    code_parser = CodeParser(
+        code_representer=CodeRepresenter(),
+        working_dir=working_dir,
+        logger=logging.getLogger(__name__),
+        debug=debug,
+        files=[filename],
+        source_store=source_store,
+    )
+    code_parser.analyze()
+    result = FileParseResult(
+        filename=filename,
+        objects=code_parser.code_representer.objects,
+        call_sites=code_parser.call_sites,
+        assignments=code_parser.module_assignments.get(filename, []),
+    )
+    if working_dir is not None and filename in code_parser.import_finder.imports:
+        result.imports = code_parser.import_finder.imports[filename]
+        result.aliases = code_parser.import_finder.aliases[filename]
+    return result
 
 
 class CodeParser:
@@ -82,6 +116,10 @@ class CodeParser:
         logger,
         debug: bool = False,
         files: list = [],
+        source_store: SourceStore | None = None,
+        workers: int = 1,
+        executor: Executor | None = None,
+        parse_cache: ParseCache | None = None,
     ):
         """
         A code parser used to create dependencies between modules, classes and methods
@@ -91,15 +129,157 @@ class CodeParser:
         :param working_dir: path to target code
         :type working_dir: str
         :param debug: toggle debug mode
-        :type debug: bool"""
+        :type debug: bool
+        :param source_store: SourceStore to read files from. A new one is created if None
+        :type source_store: SourceStore|None
+        :param workers: number of worker processes used for parsing. 1 parses in this process
+        :type workers: int
+        :param executor: executor to submit parse jobs to instead of creating a process pool.
+            Optional
+        :type executor: Executor|None
+        :param parse_cache: cache to load extraction results of unchanged files from. Optional
+        :type parse_cache: ParseCache|None"""
         self.code_representer = code_representer
         self.working_dir = working_dir
         self.debug = debug
         self.logger = logger
+        self.source_store = source_store if source_store is not None else SourceStore()
+        self.module_trees = {}
+        # ids of modules that were already analyzed, e.g. by a worker, and the calls found in them
+        self.analyzed_ids = set()
+        self.call_sites = []
+        self.module_assignments = {}
+        self.parse_cache = parse_cache
         if self.working_dir is not None:
-            self.import_finder = ImportFinder(working_dir=working_dir, debug=self.debug)
+            self.import_finder = ImportFinder(
+                working_dir=working_dir, debug=self.debug, source_store=self.source_store
+            )
+        self.add_files(files, workers=workers, executor=executor)
+
+    def add_files(self, files: list[str], workers: int = 1, executor: Executor | None = None):
+        """
+        Add multiple files to the CodeParser, optionally parsing them in worker processes. Files
+        found in the ParseCache are loaded instead of parsed
+
+        :param files: files to add
+        :type files: list[str]
+        :param workers: number of worker processes. 1 parses in this process
+        :type workers: int
+        :param executor: executor to submit parse jobs to instead of creating a process pool.
+            Optional
+        :type executor: Executor|None
+        """
+        if self.parse_cache is None and executor is None and (workers <= 1 or len(files) <= 1):
+            for file in files:
+                self.add_file(file)
+            return
+
+        filenames = []
+        sources = []
+        cache_keys = []
         for file in files:
-            self.add_file(file)
+            try:
+                source = self.source_store.get_source(file)
+            except OSError:
+                self.logger.info(file + " could not be read and will be ignored")
+                continue
+            if self.parse_cache is not None:
+                cache_key = self.get_cache_key(file, source)
+                result = self.parse_cache.load(cache_key)
+                if result is not None:
+                    self.add_parse_result(result)
+                    continue
+                cache_keys.append(cache_key)
+            filenames.append(file)
+            sources.append(source)
+        for index, result in enumerate(
+            self.parse_files(filenames, sources, workers=workers, executor=executor)
+        ):
+            if self.parse_cache is not None:
+                # ast nodes are not cached, the assignments are collected again when needed
+                self.parse_cache.store(cache_keys[index], replace(result, assignments=None))
+            self.add_parse_result(result)
+        if self.parse_cache is not None and self.parse_cache.stored > 0:
+            self.parse_cache.evict()
+
+    def parse_files(
+        self,
+        filenames: list[str],
+        sources: list[str],
+        workers: int = 1,
+        executor: Executor | None = None,
+    ):
+        """
+        Parse files with parse_file, in this process or in worker processes
+
+        :param filenames: files to parse
+        :type filenames: list[str]
+        :param sources: content of the files
+        :type sources: list[str]
+        :param workers: number of worker processes. 1 parses in this process
+        :type workers: int
+        :param executor: executor to submit parse jobs to instead of creating a process pool.
+            Optional
+        :type executor: Executor|None
+
+        :return: extraction results in the order of the files
+        :return type: Iterator[FileParseResult]
+        """
+        chunksize = max(1, len(filenames) // (max(workers, 1) * 4))
+        jobs = (
+            filenames,
+            sources,
+            [self.working_dir] * len(filenames),
+            [self.debug] * len(filenames),
+        )
+        if executor is not None:
+            yield from executor.map(parse_file, *jobs, chunksize=chunksize)
+        elif workers <= 1 or len(filenames) <= 1:
+            yield from map(parse_file, *jobs)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as process_pool:
+                yield from process_pool.map(parse_file, *jobs, chunksize=chunksize)
+
+    def get_cache_key(self, filename: str, source: str) -> str:
+        """
+        Get the ParseCache key of a file
+
+        :param filename: the file
+        :type filename: str
+        :param source: content of the file
+        :type source: str
+
+        :return: cache key
+        :return type: str
+        """
+        return ParseCache.get_key(
+            str(ANALYZER_VERSION),
+            filename,
+            str(self.working_dir is not None),
+            str(self.debug),
+            source,
+        )
+
+    def add_parse_result(self, result: FileParseResult):
+        """
+        Merge the extraction result of a single file into the CodeParser
+
+        :param result: extraction result of a file
+        :type result: FileParseResult
+        """
+        for code_obj in result.objects.values():
+            self.code_representer.add_code_obj(code_obj)
+            if isinstance(code_obj, ModuleObject):
+                self.analyzed_ids.add(code_obj.id)
+                if code_obj.ast is not None:
+                    self.module_trees[code_obj.filename] = code_obj.ast
+        self.call_sites.extend(result.call_sites)
+        if result.assignments is not None:
+            self.module_assignments[result.filename] = result.assignments
+        if self.working_dir is not None:
+            self.import_finder.add_imports(
+                filename=result.filename, imports=result.imports, aliases=result.aliases
+            )
 
     def add_file(self, filename: str):
         """
@@ -111,12 +291,12 @@ class CodeParser:
         dir = pathlib.Path().resolve()
         try:
             sys.stderr = open(os.devnull, "w")
-            tree = ast.parse(open(filename).read())
+            tree = ast.parse(self.source_store.get_source(filename))
+            file_path = os.path.join(dir, filename)
+            self.module_trees[file_path] = tree
             if self.working_dir is not None:
-                self.import_finder.add_file(filename)
-            self.extract_file_modules_classes_and_methods(
-                tree=tree, file_path=os.path.join(dir, filename)
-            )
+                self.import_finder.add_file(filename, tree=tree)
+            self.extract_file_modules_classes_and_methods(tree=tree, file_path=file_path)
             sys.stderr = sys.__stderr__
         except Exception as e:
             if e.args[0] == "invalid syntax":
@@ -124,6 +304,27 @@ class CodeParser:
                 return
         # TODO add to pull request
 
+    def get_code_span(self, filename: str, node: ast.AST) -> tuple[SourceBuffer | None, int, int]:
+        """
+        Get the location of the code of an ast node in the shared buffer of its file. Modules span
+        the whole file
+
+        :param filename: file the node belongs to
+        :type filename: str
+        :param node: ast node
+        :type node: ast.AST
+
+        :return: buffer, start and end offset. The buffer is None if the node has no location
+        :return type: tuple[SourceBuffer|None, int, int]
+        """
+        buffer = self.source_store.get_buffer(filename)
+        if isinstance(node, ast.Module):
+            return buffer, 0, len(buffer.text)
+        span = buffer.get_span(node)
+        if span is None:
+            return None, 0, 0
+        return buffer, span[0], span[1]
+
     def extract_file_modules_classes_and_methods(self, tree: ast.AST, file_path: str):
         """
         Extract file level modules, classes and methods
@@ -137,33 +338,49 @@ class CodeParser:
             # module_name = ntpath.basename(file_path)
             module_name = pathlib.Path(file_path).stem
             docstring = ast.get_docstring(node=tree, clean=True)
-            source_code = open(file_path).read()
+            code_buffer, code_start, code_end = self.get_code_span(file_path, tree)
             module_obj = ModuleObject(
                 name=module_name,
                 filename=file_path,
                 ast=tree,
                 docstring=docstring,
-                code=source_code,
+                code=None,
                 parent_id=None,
+                code_buffer=code_buffer,
+                code_start=code_start,
+                code_end=code_end,
+                relative_filename=(
+                    os.path.relpath(file_path, self.working_dir)
+                    if self.working_dir is not None
+                    else None
+                ),
             )
             # module_obj.name = "test" # test frozen variable
-            module_id = hash(module_obj)
-            self.code_representer.objects[module_obj.id] = module_obj
+            module_id = module_obj.id
+            self.code_representer.add_code_obj(module_obj)
             self.extract_sub_classes_and_methods(code_obj_id=module_id)
+        # same named definitions, e.g. property setters, are told apart by their occurrence
+        occurrences = {}
         for node in tree.body:
             if isinstance(node, ast.FunctionDef) or isinstance(node, ast.AsyncFunctionDef):
                 func_def_name = node.name
+                occurrence = occurrences.get(node.name, 0)
+                occurrences[node.name] = occurrence + 1
                 docstring = ast.get_docstring(node=node, clean=True)
-                source_code = ast.get_source_segment(open(file_path).read(), node, padded=False)
+                code_buffer, code_start, code_end = self.get_code_span(file_path, node)
                 method_obj = MethodObject(
                     name=func_def_name,
                     filename=file_path,
                     ast=node,
                     docstring=docstring,
-                    code=source_code,
+                    code=None,
                     parent_id=module_id,
                     module_id=module_id,
                     outer_class_id=None,
+                    occurrence=occurrence,
+                    code_buffer=code_buffer,
+                    code_start=code_start,
+                    code_end=code_end,
                 )
                 self.code_representer.add_code_obj(method_obj)
                 if module_id is not None:
@@ -173,17 +390,23 @@ class CodeParser:
                 self.logger.info("Skipping lambda")
             elif isinstance(node, ast.ClassDef):
                 class_def_name = node.name
+                occurrence = occurrences.get(node.name, 0)
+                occurrences[node.name] = occurrence + 1
                 docstring = ast.get_docstring(node=node, clean=True)
-                source_code = ast.get_source_segment(open(file_path).read(), node, padded=False)
+                code_buffer, code_start, code_end = self.get_code_span(file_path, node)
                 class_obj = ClassObject(
                     name=class_def_name,
                     filename=file_path,
                     ast=node,
                     docstring=docstring,
-                    code=source_code,
+                    code=None,
                     parent_id=module_id,
                     module_id=module_id,
                     outer_class_id=None,
+                    occurrence=occurrence,
+                    code_buffer=code_buffer,
+                    code_start=code_start,
+                    code_end=code_end,
                 )
                 self.code_representer.add_code_obj(class_obj)
                 if module_id is not None:
@@ -213,23 +436,30 @@ class CodeParser:
             method_id = outer_code_obj.id
         else:
             method_id = None
+        occurrences = {}
         for node in outer_code_obj.ast.body:
             if isinstance(node, ast.FunctionDef) or isinstance(node, ast.AsyncFunctionDef):
                 func_def_name = node.name
+                occurrence = occurrences.get(node.name, 0)
+                occurrences[node.name] = occurrence + 1
                 docstring = ast.get_docstring(node=node, clean=True)
-                source_code = ast.get_source_segment(
-                    open(outer_code_obj.filename).read(), node, padded=False
+                code_buffer, code_start, code_end = self.get_code_span(
+                    outer_code_obj.filename, node
                 )
                 method_obj = MethodObject(
                     name=func_def_name,
                     filename=outer_code_obj.filename,
                     ast=node,
                     docstring=docstring,
-                    code=source_code,
+                    code=None,
                     parent_id=outer_code_obj.id,
                     module_id=module_id,
                     outer_class_id=class_id,
                     outer_method_id=method_id,
+                    occurrence=occurrence,
+                    code_buffer=code_buffer,
+                    code_start=code_start,
+                    code_end=code_end,
                 )
                 self.code_representer.add_code_obj(method_obj)
                 outer_code_obj.add_method_id(method_obj.id)
@@ -238,175 +468,174 @@ class CodeParser:
                 self.logger.info("Skipping lambda")
             elif isinstance(node, ast.ClassDef):
                 class_def_name = node.name
+                occurrence = occurrences.get(node.name, 0)
+                occurrences[node.name] = occurrence + 1
                 docstring = ast.get_docstring(node=node, clean=True)
-                source_code = ast.get_source_segment(
-                    open(outer_code_obj.filename).read(), node, padded=False
+                code_buffer, code_start, code_end = self.get_code_span(
+                    outer_code_obj.filename, node
                 )
                 inner_class_obj = ClassObject(
                     name=class_def_name,
                     filename=outer_code_obj.filename,
                     ast=node,
                     docstring=docstring,
-                    code=source_code,
+                    code=None,
                     parent_id=outer_code_obj.id,
                     module_id=module_id,
                     outer_class_id=class_id,
                     outer_method_id=method_id,
+                    occurrence=occurrence,
+                    code_buffer=code_buffer,
+                    code_start=code_start,
+                    code_end=code_end,
                 )
                 self.code_representer.add_code_obj(inner_class_obj)
                 outer_code_obj.add_class_id(inner_class_obj.id)
                 self.extract_sub_classes_and_methods(code_obj_id=inner_class_obj.id)
 
+    def analyze(self):
+        """
+        Extract arguments, return types, exceptions, attributes and calls of all modules that were
+        not analyzed yet, walking each module's ast once
+        """
+        code_analyzer = CodeAnalyzer(code_representer=self.code_representer, debug=self.debug)
+        for module_obj in self.code_representer.get_code_objects():
+            if module_obj.code_type != "module" or module_obj.id in self.analyzed_ids:
+                continue
+            self.call_sites.extend(code_analyzer.analyze(module_obj))
+            self.module_assignments[module_obj.filename] = code_analyzer.assignments
+            self.analyzed_ids.add(module_obj.id)
+
+    def release_asts(self):
+        """
+        Drop all references to ast nodes once the analysis is finished, so they can be freed. Code
+        objects parse their ast again from the file buffer on the rare later access
+        """
+        self.analyze()
+        for code_obj in self.code_representer.get_code_objects():
+            code_obj.release_ast()
+            if code_obj.code_buffer is not None:
+                code_obj.code_buffer.release_tree()
+        self.module_trees = {}
+        # collected again by resolve_variable_chain when needed
+        self.module_assignments = {}
+
     def extract_class_and_method_calls(self):
         """
         Extract classes and methods called by the CodeObject
         """
-        for parent_obj in self.code_representer.get_code_objects():
-            # remove code of children
-            parent_code_without_children = parent_obj.code
-            for child_obj in [
-                self.code_representer.get(child_id)
-                for child_id in [*parent_obj.class_ids, *parent_obj.method_ids]
-            ]:
-                parent_code_without_children = parent_code_without_children.replace(
-                    child_obj.code, ""
-                )
-            # remove annotations
-            new_parent_code_without_annotations = []
-            for line in parent_code_without_children.split("\n"):
-                if not line.lstrip().startswith("@"):
-                    new_parent_code_without_annotations.append(line)
-            parent_code_without_children = "\n".join(new_parent_code_without_annotations)
+        self.analyze()
+        for call_site in self.call_sites:
+            parent_obj = self.code_representer.get(call_site.caller_id)
+            # Do not include recursive calls, to prevent unsolvable dependencies
+            if call_site.name == parent_obj.name:
+                continue
+            called_code_obj = self.resolve_call(
+                parent_obj=parent_obj,
+                called_func_name=call_site.name,
+                variable_to_resolve=call_site.variable,
+            )
+            if called_code_obj is None:
+                continue
+            # add called method/class
+            if called_code_obj.code_type == "class":
+                parent_obj.add_called_class(called_code_obj.id)
+            elif called_code_obj.code_type == "method":
+                parent_obj.add_called_method(called_code_obj.id)
+            else:
+                raise UnknownCodeObjectError
+            # add caller module/class/method
+            if isinstance(parent_obj, MethodObject):
+                called_code_obj.add_caller_method(parent_obj.id)
+            elif isinstance(parent_obj, ClassObject):
+                called_code_obj.add_caller_class(parent_obj.id)
+            elif isinstance(parent_obj, ModuleObject):
+                called_code_obj.add_caller_module(parent_obj.id)
+            else:
+                raise UnknownCodeObjectError
+        # the calls are dependencies for the outdated state
+        self.code_representer.invalidate_dependency_graph()
 
-            try:
-                sys.stderr = open(os.devnull, "w")
-                parent_ast_without_children = ast.parse(parent_code_without_children)
-            except Exception as e:
-                if isinstance(e, IndentationError):
-                    # empty code object apart from child methods and classes
-                    sys.stderr = sys.__stderr__
-                    return
-            sys.stderr = sys.__stderr__
+    def resolve_call(
+        self, parent_obj: CodeObject, called_func_name: str, variable_to_resolve: str | None
+    ) -> CodeObject | None:
+        """
+        Resolve a call to the called CodeObject
 
-            for node in ast.walk(parent_ast_without_children):
-                # ast.get_source_segment(source, node.body[0])
-                if isinstance(node, ast.Call):
-                    variable_to_resolve = None  # TODO resolve variable(?)
-                    if hasattr(node.func, "id"):
-                        called_func_name = node.func.id
-                    else:
-                        called_func_name = node.func.attr
-                        if hasattr(node.func, "value"):
-                            skip = False
-                            if hasattr(node.func.value, "id"):
-                                variable_to_resolve = node.func.value.id
-                            elif isinstance(node.func.value, ast.Attribute):
-                                variable_to_resolve = node.func.value.attr
-                            else:
-                                skip = True
-                            if not skip:
-                                value = node.func.value
-                                while hasattr(value, "value"):
-                                    if hasattr(value.value, "id"):
-                                        variable_to_resolve = (
-                                            value.value.id + "." + variable_to_resolve
-                                        )
-                                    elif hasattr(value.value, "attr"):
-                                        variable_to_resolve = (
-                                            value.value.attr + "." + variable_to_resolve
-                                        )
-                                    else:
-                                        if not self.debug:
-                                            raise VariableChainCreationError
-                                    value = value.value
-                    # Do not include recursive calls, to prevent unsolvable dependencies
-                    if called_func_name == parent_obj.name:
-                        continue
-                    if variable_to_resolve is not None:
-                        # TODO resolve variable
-                        matches = self.resolve_variable(
-                            variable_to_resolve=variable_to_resolve,
-                            called_func_name=called_func_name,
-                            filename=parent_obj.filename,
-                        )
-                        if matches is None:
-                            continue  # call to python internal methods like print() or methods in imported modules that are not part of the source code
-                        matches = [match for match in matches if match.name == called_func_name]
-                        if len(matches) == 1:
-                            called_code_obj = matches[0]
-                        else:
-                            if len(matches) > 1:
-                                raise MultipleMatchesError
-                            else:
-                                raise NoMatchError
-                    else:
-                        # check this file
-                        matches = [
-                            code_obj
-                            for code_obj in self.code_representer.objects.values()
-                            if code_obj.name == called_func_name
-                            and code_obj.filename == parent_obj.filename
-                        ]
-                        if len(matches) == 1:
-                            called_code_obj = matches[0]
-                        elif len(matches) > 1:
-                            # if more than one code object in this file maches, check if one of them exists only locally
-                            if (
-                                len(
-                                    [match for match in matches if match.parent_id == parent_obj.id]
-                                )
-                                > 0
-                            ):
-                                matches = [
-                                    match for match in matches if match.parent_id == parent_obj.id
-                                ]
-                                if len(matches) == 1:
-                                    called_code_obj = matches[0]
-                                else:  # still more than one
-                                    raise MultipleMatchesError
-                        elif len(matches) == 0:
-                            # check imports
-                            matches = self.import_finder.resolve_external_call(
-                                called_func_name,
-                                parent_obj.filename,
-                                code_representer=self.code_representer,
-                            )
-                            if matches is None:
-                                continue  # call to python internal methods like print() or methods in imported modules that are not part of the source code
-                            matches = [
-                                match
-                                for match in matches
-                                if match.parent_id is None
-                                or self.code_representer.get(match.parent_id).code_type == "module"
-                            ]
-                            if len(matches) == 1:
-                                called_code_obj = matches[0]
-                            elif len(matches) > 1:
-                                raise MultipleMatchesError
-                            elif len(matches) == 0:
-                                raise NoMatchError
-                    # add called method/class
-                    if called_code_obj.code_type == "class":
-                        parent_obj.add_called_class(called_code_obj.id)
-                    elif called_code_obj.code_type == "method":
-                        parent_obj.add_called_method(called_code_obj.id)
-                    else:
-                        raise UnknownCodeObjectError
-                    # add caller module/class/method
-                    if isinstance(parent_obj, MethodObject):
-                        self.code_representer.objects[called_code_obj.id].add_caller_method(
-                            parent_obj.id
-                        )
-                    elif isinstance(parent_obj, ClassObject):
-                        self.code_representer.objects[called_code_obj.id].add_caller_class(
-                            parent_obj.id
-                        )
-                    elif isinstance(parent_obj, ModuleObject):
-                        self.code_representer.objects[called_code_obj.id].add_caller_module(
-                            parent_obj.id
-                        )
-                    else:
-                        raise UnknownCodeObjectError
+        :param parent_obj: the CodeObject containing the call
+        :type parent_obj: CodeObject
+        :param called_func_name: name of the called function
+        :type called_func_name: str
+        :param variable_to_resolve: variable chain the function is called on. Optional
+        :type variable_to_resolve: str|None
+
+        :return: the called CodeObject or None if the call is not part of the source code
+        :return type: CodeObject|None
+        """
+        if variable_to_resolve is not None:
+            # TODO resolve variable
+            matches = self.resolve_variable(
+                variable_to_resolve=variable_to_resolve,
+                called_func_name=called_func_name,
+                filename=parent_obj.filename,
+            )
+            if matches is None:
+                # call to python internal methods like print() or methods in imported modules that
+                # are not part of the source code
+                return None
+            matches = [match for match in matches if match.name == called_func_name]
+            if len(matches) == 1:
+                return matches[0]
+            elif len(matches) > 1:
+                raise MultipleMatchesError
+            else:
+                raise NoMatchError
+        # check this file. Class members can only be called by their bare name from the class body
+        matches = [
+            match
+            for match in self.code_representer.get_by_filename_and_name(
+                filename=parent_obj.filename, name=called_func_name
+            )
+            if match.parent_id is None
+            or match.parent_id == parent_obj.id
+            or self.code_representer.get(match.parent_id).code_type != "class"
+        ]
+        if len(matches) == 1:
+            return matches[0]
+        elif len(matches) > 1:
+            # if more than one code object in this file maches, check if one of them exists only
+            # locally
+            local_matches = self.code_representer.get_by_parent_and_name(
+                parent_id=parent_obj.id, name=called_func_name
+            )
+            if len(local_matches) == 1:
+                return local_matches[0]
+            elif len(local_matches) > 1:  # still more than one
+                raise MultipleMatchesError
+            # TODO ambiguous call, none of the matches is local
+            return None
+        # check imports
+        matches = self.import_finder.resolve_external_call(
+            called_func_name,
+            parent_obj.filename,
+            code_representer=self.code_representer,
+        )
+        if matches is None:
+            # call to python internal methods like print() or methods in imported modules that are
+            # not part of the source code
+            return None
+        matches = [
+            match
+            for match in matches
+            if match.parent_id is None
+            or self.code_representer.get(match.parent_id).code_type == "module"
+        ]
+        if len(matches) == 1:
+            return matches[0]
+        elif len(matches) > 1:
+            raise MultipleMatchesError
+        else:
+            raise NoMatchError
 
     def resolve_variable(self, variable_to_resolve, called_func_name, filename):
         # check in this file
@@ -419,9 +648,13 @@ class CodeParser:
         # => resolve from where func_a is called and what is some_class
 
         # import import3 as import1
-        # var0 = import1.Class1() # get imports of this file, find import1, resolve to import3, get classes and methods in file corresponding to import3, match class1, return code_obj_id , map var0 to code_obj_id
+        # var0 = import1.Class1()
+        #   get imports of this file, find import1, resolve to import3, get classes and methods in
+        #   file corresponding to import3, match class1, return code_obj_id, map var0 to code_obj_id
         # var1 = Class2 # resolve to this file Class2, return code_obj_id, map var1 to code_obj_id
-        # var1.attr1 = var0.func_a() # resolve var0 by finding its assignment, resolve func_a, return code_obj_id, map var1.attr1 to code_obj_id
+        # var1.attr1 = var0.func_a()
+        #   resolve var0 by finding its assignment, resolve func_a, return code_obj_id, map
+        #   var1.attr1 to code_obj_id
         variable_chain = variable_to_resolve.split(".")
         current_var = variable_chain[0]
         # check imports
@@ -435,12 +668,10 @@ class CodeParser:
                 variable_to_resolve=variable_to_resolve, filename=filename
             )
             if isinstance(result, CodeObject):
-                candidates = [
-                    code_obj
-                    for code_obj in self.code_representer.objects.values()
-                    if code_obj.parent_id == result.id
-                ]
-                return candidates
+                # only children with the called name are relevant to the caller
+                return self.code_representer.get_by_parent_and_name(
+                    parent_id=result.id, name=called_func_name
+                )
             return None
         elif len(matches) == 1:
             return matches
@@ -462,8 +693,19 @@ class CodeParser:
                         raise NoMatchError
 
     def resolve_variable_chain(self, variable_to_resolve, filename):
-        tree = ast.parse(open(filename).read())
-        for node in ast.walk(tree):
+        assignments = self.module_assignments.get(filename)
+        if assignments is None:
+            # e.g. for results loaded from the ParseCache, which does not keep ast nodes
+            tree = self.module_trees.get(filename)
+            if tree is None:
+                tree = ast.parse(self.source_store.get_source(filename))
+            assignments = [
+                node
+                for node in ast.walk(tree)
+                if isinstance(node, ast.Assign) or isinstance(node, ast.AnnAssign)
+            ]
+            self.module_assignments[filename] = assignments
+        for node in assignments:
             if isinstance(node, ast.Assign) or isinstance(node, ast.AnnAssign):
                 if isinstance(node, ast.AnnAssign):
                     targets = [node.target]
@@ -510,173 +752,45 @@ class CodeParser:
         """
         Extract exceptions raised by the CodeObject
         """
-        classes_and_modules = self.code_representer.get_modules()
-        classes_and_modules.extend(self.code_representer.get_methods())
-        for code_obj in classes_and_modules:
-            for node in ast.walk(code_obj.ast):
-                # ast.get_source_segment(source, node.body[0])
-                if isinstance(node, ast.Raise):
-                    if hasattr(node.exc, "id"):
-                        code_obj.add_exception(node.exc.id)
-                    elif hasattr(node.exc, "func"):
-                        code_obj.add_exception(node.exc.func.id)
-                    else:
-                        if not self.debug:
-                            raise ExceptionExtractionError
+        self.analyze()
 
     def extract_args_and_return_type(self):
         """
         Extract arguments and return type of methods
         """
-        for method_obj in self.code_representer.get_methods():
-            node = method_obj.ast
-            if isinstance(node, ast.FunctionDef) or isinstance(node, ast.AsyncFunctionDef):
-                for i in range(len(node.args.args)):
-                    arg = node.args.args[i]
-                    new_arg = {"name": arg.arg}
-                    if arg.annotation is not None:
-                        if hasattr(arg.annotation, "id"):
-                            new_arg["type"] = arg.annotation.id
-                        elif hasattr(arg.annotation, "value") and hasattr(
-                            arg.annotation.value, "id"
-                        ):
-                            new_arg["type"] = arg.annotation.value.id
-                        elif hasattr(arg, "type_comment"):
-                            new_arg["type"] = arg.type_comment
-                    else:
-                        if i == 0 and arg.arg == "self":
-                            new_arg["type"] = Self  # see https://peps.python.org/pep-0673/
-                        else:
-                            method_obj.add_missing_arg_type(arg.arg)
-                    if i < len(node.args.defaults):
-                        default = node.args.defaults[i]
-                        if isinstance(default, ast.Constant):
-                            new_arg["default"] = default.value
-                        elif isinstance(default, ast.List):
-                            new_arg["default"] = [item.value for item in default.elts]
-                    method_obj.add_argument(new_arg)
-                if hasattr(node.returns, "id"):
-                    return_type = node.returns.id
-                elif hasattr(node.returns, "value"):
-                    return_type = node.returns.value
-                else:
-                    return_type = None
-                if isinstance(return_type, ast.Name):
-                    return_type = return_type.id
-                method_obj.return_type = return_type
+        self.analyze()
 
     def check_return_type(self):
         """
         Check if the return type of a method is missing
         """
-        for method_obj in self.code_representer.get_methods():
-            if not isinstance(method_obj.ast, ast.FunctionDef) and not isinstance(
-                method_obj.ast, ast.AsyncFunctionDef
-            ):
-                return
-            if method_obj.return_type is None:
-                # print("check if method returns something")
-                for line in method_obj.code.split("\n"):
-                    if line.lstrip().startswith("return"):
-                        method_obj.missing_return_type = True
+        self.analyze()
 
     def extract_attributes(self):
-        for class_obj in self.code_representer.get_classes():
-            for node in class_obj.ast.body:
-                if isinstance(node, ast.Assign):
-                    if len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
-                        attr = {"name": node.targets[0].id}
-                        class_obj.add_class_attribute(attribute=attr)
-                elif isinstance(node, ast.AnnAssign):
-                    if isinstance(node.target, ast.Name):
-                        annotation_location = node.annotation
-                        while True:
-                            if hasattr(annotation_location, "id"):
-                                attr_type = annotation_location.id
-                                break
-                            elif hasattr(annotation_location, "value"):
-                                annotation_location = annotation_location.value
-                            elif hasattr(annotation_location, "left"):
-                                annotation_location = annotation_location.left
-                            else:
-                                raise AttributeExtractionError
-                        attr = {"name": node.target.id, "type": attr_type}
-                        class_obj.add_class_attribute(attribute=attr)
-                    else:
-                        raise AttributeExtractionError
-            for node in ast.walk(class_obj.ast):
-                if isinstance(node, ast.Assign):
-                    for target in node.targets:
-                        if hasattr(target, "id"):
-                            attr_name = target.id
-                        elif hasattr(target, "attr"):
-                            attr_name = target.attr
-                        else:
-                            continue  # TODO review
-                        if not hasattr(target, "value"):
-                            continue  # TODO review
-                        if hasattr(target.value, "id"):
-                            if target.value.id == "self":
-                                attr = {"name": attr_name}
-                                class_obj.add_instance_attribute(attribute=attr)
-                elif isinstance(node, ast.AnnAssign):
-                    if hasattr(node.target, "id"):
-                        attr_name = node.target.id
-                    elif hasattr(node.target, "attr"):
-                        attr_name = node.target.attr
-                    else:
-                        raise AttributeExtractionError
-                    if hasattr(node.target, "value") and hasattr(node.target.value, "id"):
-                        if node.target.value.id == "self":
-                            if hasattr(node.annotation, "id"):
-                                attr_type = node.annotation.id
-                            elif hasattr(node.annotation, "value") and hasattr(
-                                node.annotation.value, "id"
-                            ):
-                                attr_type = node.annotation.value.id
-                            else:
-                                raise AttributeExtractionError
-                            attr = {"name": attr_name, "type": attr_type}
-                            class_obj.add_instance_attribute(attribute=attr)
+        """
+        Extract class and instance attributes of classes
+        """
+        self.analyze()
 
     def set_code_affected_by_changes_to_outdated(self, changes: list):
-        for change in changes:
-            changed_methods = extract_methods_from_change_info(
-                filename=change["filename"],
-                change_start=change["start"],
-                change_length=change["lines_changed"],
-            )
-            changed_classes = extract_classes_from_change_info(
-                filename=change["filename"],
-                change_start=change["start"],
-                change_length=change["lines_changed"],
-            )
-            changed_module = extract_module_from_change_info(filename=change["filename"])
-            for changed_method in changed_methods:
-                method_obj = self.code_representer.get_by_type_filename_and_code(
-                    code_type="method",
-                    filename=changed_method["filename"],
-                    code=changed_method["content"],
-                )
-                self.code_representer.set_outdated(method_obj.id)
-                # method_obj.dev_comments = self.extract_dev_comments(method_obj)
-
-            for changed_class in changed_classes:
-                class_obj = self.code_representer.get_by_type_filename_and_code(
-                    code_type="class",
-                    filename=changed_class["filename"],
-                    code=changed_class["content"],
-                )
-                self.code_representer.set_outdated(class_obj.id)
-                # class_obj.dev_comments = self.extract_dev_comments(class_obj)
+        """
+        Mark the code objects covering changed lines and the code objects enclosing them as
+        outdated
 
-            module_obj = self.code_representer.get_by_type_filename_and_code(
-                code_type="module",
-                filename=changed_module["filename"],
-                code=changed_module["content"],
-            )
-            self.code_representer.set_outdated(module_obj.id)
-            # module_obj.dev_comments = self.extract_dev_comments(module_obj)
+        :param changes: changes as dicts with keys filename, start (first changed line, starting
+            at 1) and lines_changed
+        :type changes: list[dict]
+        """
+        line_indexes = {}
+        outdated_ids = set()
+        for change in changes:
+            filename = self.code_representer.normalize_filename(change["filename"])
+            if filename not in line_indexes:
+                line_indexes[filename] = LineIndex(self.code_representer.get_by_filename(filename))
+            start = max(change["start"], 1)
+            end = max(start, change["start"] + change["lines_changed"] - 1)
+            outdated_ids.update(line_indexes[filename].get_ids(start, end))
+        self.code_representer.set_multiple_outdated(outdated_ids)
 
 
 if __name__ == "__main__":
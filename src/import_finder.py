@@ -2,41 +2,84 @@ import ast
 import os
 from pathlib import Path
 
+from source_store import SourceStore
+
 
 class ImportFinder:
-    def __init__(self, working_dir, debug=False):
+    def __init__(self, working_dir, debug=False, source_store: SourceStore | None = None):
         self.debug = debug
         self.import_lines = {}
         self.imports = {}
         self.aliases = {}
         self.working_dir = working_dir
+        self.source_store = source_store if source_store is not None else SourceStore()
+        # built from the added files on the first resolution, see get_module_index
+        self.module_index = None
+        self.module_files = None
+        # resolve_external_call results by (filename, call)
+        self.call_cache = {}
 
-    def add_file(self, filename):
+    def add_file(self, filename, tree: ast.AST | None = None):
         current_file_imports = []
         current_file_aliases = {}
-        for node in ast.walk(ast.parse(open(file=filename, mode="r").read())):
+        if tree is None:
+            tree = ast.parse(self.source_store.get_source(filename))
+        for node in ast.walk(tree):
             if isinstance(node, ast.Import):
                 for item in node.names:  # TODO ast.alias
                     current_file_imports.append(item.name)
             elif isinstance(node, ast.ImportFrom):
                 module = node.module
+                # relative imports keep their leading dots, e.g. ".module.name"
+                level = "." * (node.level or 0)
                 for item in node.names:
                     if hasattr(item, "asname") and item.asname is not None:
                         if module is None:
-                            current_file_aliases[item.asname] = item.name
+                            current_file_aliases[item.asname] = level + item.name
                         else:
-                            current_file_aliases[item.asname] = module + "." + item.name
+                            current_file_aliases[item.asname] = level + module + "." + item.name
                         current_file_imports.append(item.asname)
                     else:
                         if module is None:
-                            current_file_imports.append(item.name)
+                            current_file_imports.append(level + item.name)
                         else:
-                            current_file_imports.append(module + "." + item.name)
-        self.imports[filename] = current_file_imports
-        self.aliases[filename] = current_file_aliases
+                            current_file_imports.append(level + module + "." + item.name)
+        self.add_imports(filename, current_file_imports, current_file_aliases)
+
+    def add_imports(self, filename, imports, aliases):
+        self.imports[filename] = imports
+        self.aliases[filename] = aliases
+        # the module index and the resolved calls depend on the known files
+        self.module_index = None
+        self.module_files = None
+        self.call_cache = {}
 
     def resolve_external_call(self, call, filename, code_representer):
-        # TODO resolve calls like class_obj_variable.class_method_call => get type of class_obj_variable
+        """
+        Resolve a call to the CodeObjects it may refer to in other files, using the imports of
+        the calling file. Results are memoized per file and call
+
+        :param call: called name, e.g. "module.func" or "ClassA"
+        :type call: str
+        :param filename: file the call is in
+        :type filename: str
+        :param code_representer: CodeRepresenter containing the CodeObjects of all files
+        :type code_representer: CodeRepresenter
+
+        :return: potentially called CodeObjects or None if the call does not resolve to any
+        :return type: list[CodeObject]|None
+        """
+        key = (filename, call)
+        if key not in self.call_cache:
+            self.call_cache[key] = self._resolve_external_call(call, filename, code_representer)
+        result = self.call_cache[key]
+        if result is None:
+            return None
+        return list(result)
+
+    def _resolve_external_call(self, call, filename, code_representer):
+        # TODO resolve calls like class_obj_variable.class_method_call
+        #  => get type of class_obj_variable
         # TODO resolve calls like self.class_obj.method, where class_obj was imported
         # TODO not working properly
         relevant_imports = self.imports[filename]
@@ -58,62 +101,108 @@ class ImportFinder:
                     import_statement=match,
                     source_file=filename,
                     code_representer=code_representer,
+                    name=call.split(".")[-1],
                 )
             )
-        matching_code_objects = [
-            potential_code_object
-            for potential_code_object in potential_code_objects
-            if potential_code_object.name == call.split(".")[-1]
-        ]
-        if matching_code_objects is None or len(matching_code_objects) == 0:
+        if len(potential_code_objects) == 0:
             return None
         else:
-            return matching_code_objects
-
-    def resolve_import_to_file(self, import_statement, source_file, code_representer):
-        import_statement = import_statement.split(".")
-        repo_files = [
-            os.path.join(dirpath, f)
-            for (dirpath, dirnames, filenames) in os.walk(self.working_dir)
-            for f in filenames
-        ]
-        repo_files = [file.split(".py")[0] for file in repo_files if file.endswith(".py")]
-        repo_files = [file.split(self.working_dir)[1] for file in repo_files]
-        repo_files = [
-            [dir_part for dir_part in Path(file).parts if len(dir_part) > 0 and dir_part != "\\"]
-            for file in repo_files
-        ]
-        source_file = source_file.split(self.working_dir)[1]
-        source_file = [
-            dir_part
-            for dir_part in Path(source_file).parts
-            if len(dir_part) > 0 and dir_part != "\\"
+            return potential_code_objects
+
+    def get_module_parts(self, filename: str) -> list[str]:
+        """
+        Get the module path of a file relative to the working directory, e.g. ["pkg", "module"].
+        Packages are represented by their __init__ file
+
+        :param filename: python file
+        :type filename: str
+
+        :return: parts of the dotted module name
+        :return type: list[str]
+        """
+        relative_path = os.path.relpath(os.path.normpath(filename), self.working_dir)
+        parts = [
+            part for part in Path(relative_path.replace("\\", "/")).parts if part not in ("..", ".")
         ]
+        if len(parts) > 0 and parts[-1].endswith(".py"):
+            parts[-1] = parts[-1][: -len(".py")]
+        if len(parts) > 0 and parts[-1] == "__init__":
+            parts.pop()
+        return parts
 
-        potential_matches = []
+    def get_module_index(self) -> dict[str, list[tuple[list[str], str]]]:
+        """
+        Get the module index of the added files. Every file is indexed by each suffix of its dotted
+        module name, because the import root is not known: src/pkg/module.py can be imported as
+        src.pkg.module, pkg.module or module. Built once and kept until files are added
 
-        for split_path in repo_files:
-            # go to same depth in repo
-            i = 0
-            while i < min(len(source_file), len(split_path)) and source_file[i] == split_path[i]:
-                i += 1
-            if i == len(source_file):
-                raise CircularImportError("Import from the file that is importing")
-            # match file part of import
-            j = 0
-            while (
-                j < min(len(split_path) - i, len(import_statement))
-                and split_path[i + j] == import_statement[j]
-            ):
-                j += 1
-            if j > 0:
-                filename = os.path.join(self.working_dir, *split_path)
-                filename = filename + ".py"
-                potential_matches.extend(code_representer.get_by_filename(filename))
-        if len(potential_matches) > 0:
-            return potential_matches
-        else:
+        :return: (module parts before the suffix, filename) by dotted module name suffix
+        :return type: dict[str, list[tuple[list[str], str]]]
+        """
+        if self.module_index is None:
+            self.module_index = {}
+            self.module_files = {}
+            for filename in self.imports.keys():
+                self.module_files[os.path.normpath(filename)] = filename
+                parts = self.get_module_parts(filename)
+                for start in range(len(parts)):
+                    self.module_index.setdefault(".".join(parts[start:]), []).append(
+                        (parts[:start], filename)
+                    )
+        return self.module_index
+
+    def find_module_files(self, import_statement: str, source_file: str) -> list[str]:
+        """
+        Find the files an import statement refers to. The longest prefix of the statement that
+        names a module is used, as the rest names something inside it
+
+        :param import_statement: import, e.g. "pkg.module.ClassA" or ".module.func" for relative
+            imports
+        :type import_statement: str
+        :param source_file: file containing the import
+        :type source_file: str
+
+        :return: matching files
+        :return type: list[str]
+        """
+        module_index = self.get_module_index()
+        name = import_statement.lstrip(".")
+        level = len(import_statement) - len(name)
+        parts = name.split(".") if len(name) > 0 else []
+        if level > 0:
+            # relative to the package of the source file
+            anchor = os.path.dirname(os.path.normpath(source_file))
+            for i in range(level - 1):
+                anchor = os.path.dirname(anchor)
+            for end in range(len(parts), -1, -1):
+                module_path = os.path.join(anchor, *parts[:end])
+                for candidate in [module_path + ".py", os.path.join(module_path, "__init__.py")]:
+                    if candidate in self.module_files:
+                        return [self.module_files[candidate]]
             return []
+        # the import root has to contain the source file, like the entries of sys.path
+        source_dir_parts = self.get_module_parts(source_file)[:-1]
+        for end in range(len(parts), 0, -1):
+            candidates = module_index.get(".".join(parts[:end]), [])
+            files = [
+                filename
+                for root_parts, filename in candidates
+                if source_dir_parts[: len(root_parts)] == root_parts
+            ]
+            if len(files) > 0:
+                return files
+        return []
+
+    def resolve_import_to_file(self, import_statement, source_file, code_representer, name=None):
+        potential_matches = []
+        for filename in self.find_module_files(import_statement, source_file):
+            if name is None:
+                potential_matches.extend(code_representer.get_by_filename(filename))
+            else:
+                potential_matches.extend(
+                    code_representer.get_by_filename_and_name(filename=filename, name=name)
+                )
+        return potential_matches
 
 
 class CircularImportError(Exception):
@@ -1,5 +1,6 @@
 import logging
 import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 from dotenv import load_dotenv
 
@@ -10,10 +11,13 @@ from docstring_input_selector import (
     DocstringInputSelectorMethod,
     DocstringInputSelectorModule,
 )
-from extract_outdated_ids import extract_code_affected_by_change
+from extract_outdated_ids import extract_code_affected_by_change, get_keys
 from get_context import CodeParser
 from gpt_input import GptOutput
 from gpt_interface import GptInterface
+from memory_report import MemoryReport
+from old_docstrings import OldDocstringIndex
+from parse_cache import DEFAULT_MAX_SIZE, ParseCache
 from repo_controller import CodeIntegrityViolationError, RepoController
 from save_data import save_data
 from validate_docstring import validate_docstring
@@ -42,6 +46,14 @@ class AutoPyDoc:
         branch: str = "main",
         debug=False,
         repo_owner=None,
+        workers: int = 1,
+        cache_dir: str | None = None,
+        cache_max_size: int = DEFAULT_MAX_SIZE,
+        release_asts: bool = False,
+        memory_report: bool = False,
+        partial_clone: bool = False,
+        mirror_dir: str | None = None,
+        patch_dir: str | None = None,
     ) -> None:  # repo_path will be required later
         """Generates new docstrings for modified parts of the code
 
@@ -49,9 +61,29 @@ class AutoPyDoc:
         :type repo_path: str
         :param debug: toggle debug mode
         :type debug: boolean
+        :param workers: number of worker processes used for parsing
+        :type workers: int
+        :param cache_dir: directory to keep extraction results in between runs. Optional
+        :type cache_dir: str|None
+        :param cache_max_size: maximum size of the cache in bytes
+        :type cache_max_size: int
+        :param release_asts: drop ast nodes once the analysis is finished to save memory
+        :type release_asts: bool
+        :param memory_report: log the memory in use and its peak after each stage
+        :type memory_report: bool
+        :param partial_clone: clone remote repositories without history and with python files only
+        :type partial_clone: bool
+        :param mirror_dir: directory of a local mirror of remote repositories to clone from.
+            Optional
+        :type mirror_dir: str|None
+        :param patch_dir: write the changes as patch with a JSON summary to this directory instead
+            of creating a pull request. Optional
+        :type patch_dir: str|None
         """
+        self.memory_report = MemoryReport(logger=self.logger, enabled=memory_report)
 
-        # Initialize gpt interface with the chosen strategy and its parameters early to fail early if model is unavailable or unable to load
+        # Initialize gpt interface with the chosen strategy and its parameters early to fail early
+        # if model is unavailable or unable to load
         self.logger.info(f"Using {model_strategy_name} strategy.")
         self.gpt_interface = GptInterface(model_strategy_name, **model_strategy_params)
 
@@ -66,20 +98,82 @@ class AutoPyDoc:
             logger=self.logger,
             debug=debug,
             repo_owner=repo_owner,
+            partial_clone=partial_clone,
+            mirror_dir=mirror_dir,
+            patch_dir=patch_dir,
         )
-        self.code_parser = CodeParser(
-            code_representer=CodeRepresenter(),
-            working_dir=self.repo.working_dir,
-            debug=True,
-            files=self.repo.get_files_in_repo(),
-            logger=self.logger,
-        )
+        # only changed files need to be compared. Their previous versions are read from the git
+        # object store, so both states can be parsed at the same time
+        changed_files = self.repo.get_changed_files()
+        old_source_store = self.repo.old_source_store
+        old_files = [file for file in changed_files if old_source_store.has_file(file)]
+
+        parse_cache = None
+        if cache_dir is not None:
+            parse_cache = ParseCache(cache_dir=cache_dir, max_size=cache_max_size)
+
+        if workers > 1:
+            with (
+                ProcessPoolExecutor(max_workers=workers) as process_pool,
+                ThreadPoolExecutor(max_workers=2) as thread_pool,
+            ):
+                code_parser_future = thread_pool.submit(
+                    CodeParser,
+                    code_representer=CodeRepresenter(),
+                    working_dir=self.repo.working_dir,
+                    debug=True,
+                    files=self.repo.get_files_in_repo(),
+                    logger=self.logger,
+                    source_store=self.repo.source_store,
+                    workers=workers,
+                    executor=process_pool,
+                    parse_cache=parse_cache,
+                )
+                code_parser_old_future = thread_pool.submit(
+                    CodeParser,
+                    code_representer=CodeRepresenter(),
+                    working_dir=self.repo.working_dir,
+                    debug=True,
+                    files=old_files,
+                    logger=self.logger,
+                    source_store=old_source_store,
+                    workers=workers,
+                    executor=process_pool,
+                    parse_cache=parse_cache,
+                )
+                self.code_parser = code_parser_future.result()
+                self.code_parser_old = code_parser_old_future.result()
+        else:
+            self.code_parser = CodeParser(
+                code_representer=CodeRepresenter(),
+                working_dir=self.repo.working_dir,
+                debug=True,
+                files=self.repo.get_files_in_repo(),
+                logger=self.logger,
+                source_store=self.repo.source_store,
+                parse_cache=parse_cache,
+            )
+            self.code_parser_old = CodeParser(
+                code_representer=CodeRepresenter(),
+                working_dir=self.repo.working_dir,
+                debug=True,
+                files=old_files,
+                logger=self.logger,
+                source_store=old_source_store,
+                parse_cache=parse_cache,
+            )
+        if parse_cache is not None:
+            self.logger.info(f"Parse cache: {parse_cache.hits} hits, {parse_cache.misses} misses")
+        # docstrings as of the latest commit, for telling apart changes made by developers
+        self.old_docstrings = OldDocstringIndex(source_store=old_source_store)
+        self.old_docstrings.add_code_objects(self.code_parser_old.code_representer)
+        self.memory_report.stage("parsing")
 
         def save_objects(objects):
             content = ""
             for object in objects.values():
-                print(str(object.__dict__))
-                content += str(object.__dict__)
+                print(repr(object))
+                content += repr(object)
                 content += "\n"
             with open(file="saved_objects.txt", mode="w") as f:
                 f.write(content)
@@ -91,20 +185,19 @@ class AutoPyDoc:
         self.code_parser.extract_exceptions()
         self.code_parser.check_return_type()
         self.code_parser.extract_attributes()
+        self.memory_report.stage("analysis")
+        if release_asts:
+            self.code_parser.release_asts()
+            self.code_parser_old.release_asts()
+            self.memory_report.stage("releasing asts")
 
-        self.repo.repo.git.checkout(self.repo.latest_commit_hash)
-        self.code_parser_old = CodeParser(
-            code_representer=CodeRepresenter(),
-            working_dir=self.repo.working_dir,
-            debug=True,
-            files=self.repo.get_files_in_repo(),
-            logger=self.logger,
-        )
-        self.repo.repo.git.checkout(self.repo.current_commit)
         outdated_ids = extract_code_affected_by_change(
-            code_parser_old=self.code_parser_old, code_parser_new=self.code_parser
+            code_parser_old=self.code_parser_old,
+            code_parser_new=self.code_parser,
+            changed_files=changed_files,
         )
         self.code_parser.code_representer.set_multiple_outdated(outdated_ids)
+        self.memory_report.stage("change detection")
 
         # get changes between last commit the tool ran for and now
         # self.changes = self.repo.get_changes()
@@ -121,33 +214,46 @@ class AutoPyDoc:
             quit()
         self.gpt_interface.process_batch(first_batch, callback=self.process_gpt_result)
 
-        # if parts are still outdated
-        while len(self.code_parser.code_representer.get_outdated_ids()) > 0:
-            missing_items = self.code_parser.code_representer.get_outdated_ids()
-            self.logger.info("Some parts are still missing updates")
-            self.logger.info("\n".join([str(item) for item in missing_items]))
-            # force generate all, ignore dependencies
-            next_batch = self.code_parser.code_representer.generate_next_batch(
-                ignore_dependencies=True
-            )
-            if len(next_batch) > 0:
-                self.gpt_interface.process_batch(next_batch, callback=self.process_gpt_result)
+        while True:
+            # if parts are still outdated
+            while len(self.code_parser.code_representer.get_outdated_ids()) > 0:
+                missing_items = self.code_parser.code_representer.get_outdated_ids()
+                self.logger.info("Some parts are still missing updates")
+                self.logger.info("\n".join([str(item) for item in missing_items]))
+                # force generate all, ignore dependencies
+                next_batch = self.code_parser.code_representer.generate_next_batch(
+                    ignore_dependencies=True
+                )
+                if len(next_batch) > 0:
+                    self.gpt_interface.process_batch(next_batch, callback=self.process_gpt_result)
+
+            # docstrings are written per file once they are all generated
+            rejected_ids = self.repo.write_docstrings()
+            if len(rejected_ids) == 0:
+                break
+            for code_obj_id in rejected_ids:
+                self.code_parser.code_representer.revert_docstring(code_obj_id)
+
+        self.memory_report.stage("docstring generation")
 
         # if every docstring is updated
-        if not self.repo.validate_code_integrity():
+        if not self.repo.validate_code_integrity(
+            before_trees=self.code_parser.module_trees, workers=workers
+        ):
             self.logger.fatal("Code integrity no longer given!!! aborting")
             raise CodeIntegrityViolationError("Code integrity no longer given!!! aborting")
             quit()  # saveguard in case someone tries to catch the exception and continue anyways
         self.logger.info("Code integrity validated")
 
         self.repo.apply_changes(changed_files=self.code_parser.code_representer.get_changed_files())
+        self.memory_report.stage("applying changes")
+        self.memory_report.stop()
         self.logger.info("Finished successfully")
 
     def process_gpt_result(self, result: GptOutput) -> None:
         self.logger.debug(f"Received {str(result.id)}")
-        self.logger.debug(
-            f"Waiting for {str(len(self.code_parser.code_representer.get_sent_to_gpt_ids()))} more results"
-        )
+        waiting_count = len(self.code_parser.code_representer.get_sent_to_gpt_ids())
+        self.logger.debug(f"Waiting for {waiting_count} more results")
         code_obj = self.code_parser.code_representer.get(result.id)
 
         start_pos, indentation_level, end_pos = self.repo.identify_docstring_location(
@@ -155,7 +261,7 @@ class AutoPyDoc:
         )
 
         if result.no_change_necessary:
-            code_obj.outdated = False
+            self.code_parser.code_representer.set_outdated(code_obj.id, outdated=False)
         else:
             # merge new docstring with developer comments
             developer_docstring_changes = self.extract_dev_comments(code_obj)
@@ -206,29 +312,25 @@ class AutoPyDoc:
                 if hasattr(code_obj, "retry") and code_obj.retry > 0:
                     if code_obj.retry > 2:
                         self.logger.error("Docstring is still invalid after 3 attempts. Skipping")
-                        code_obj.outdated = False
-                        code_obj.is_updated = True
+                        self.code_parser.code_representer.set_updated(code_obj.id)
                         return
                     code_obj.retry += 1
                 else:
                     code_obj.retry = 1
                 return  # this prevents code_obj.outdated from being set to False and code_obj.is_updated from being set to True, causing it to be included in the next batch again. # TODO what about sent_to_gpt?
 
-            # insert new docstring in the file
-            try:
-                self.repo.insert_docstring(
-                    filename=code_obj.filename,
-                    start=start_pos,
-                    end=end_pos,
-                    new_docstring=new_docstring,
-                    old_docstring=code_obj.old_docstring,
-                )
-            except CodeIntegrityViolationError:
-                code_obj.send_to_gpt = False
-            else:
-                code_obj.update_docstring(new_docstring=new_docstring)
-                code_obj.is_updated = True
-                code_obj.outdated = False
+            # queue new docstring for the file, it is reverted if it cannot be inserted
+            self.repo.insert_docstring(
+                filename=code_obj.filename,
+                start=start_pos,
+                end=end_pos,
+                new_docstring=new_docstring,
+                old_docstring=code_obj.old_docstring,
+                code_obj_id=code_obj.id,
+            )
+            self.code_parser.code_representer.update_docstring(
+                code_obj.id, new_docstring=new_docstring
+            )
         # if parts are still outdated
         next_batch = self.code_parser.code_representer.generate_next_batch()
         if len(next_batch) > 0:
@@ -247,52 +349,30 @@ class AutoPyDoc:
 
     # TODO move elsewhere
     def extract_dev_comments(self, code_obj):
-        import ast
         import pathlib
-        import sys
 
-        from code_representation import ClassObject, MethodObject, ModuleObject
         from docstring_dismantler import DocstringDismantler
 
         developer_changes = []
 
-        self.repo.repo.git.stash("save")
-        self.repo.repo.git.checkout(self.repo.latest_commit_hash)
-
-        sys.stderr = open(os.devnull, "w")
+        # docstrings as of the latest commit are looked up, the files were read once beforehand
         # if the file is new, all existing docstrings are manually generated
-        if os.path.isfile(code_obj.filename):
-            code_ast = ast.parse(open(code_obj.filename).read())
-            sys.stderr = sys.__stderr__
-            old_docstring = -1
-
-            for node in ast.walk(code_ast):
-                if isinstance(code_obj, MethodObject) and (
-                    isinstance(node, ast.FunctionDef) or isinstance(node, ast.AsyncFunctionDef)
-                ):
-                    if code_obj.name == node.name:
-                        old_docstring = ast.get_docstring(node, clean=True) or ""
-                        break
-                elif isinstance(code_obj, ClassObject) and isinstance(node, ast.ClassDef):
-                    if code_obj.name == node.name:
-                        old_docstring = ast.get_docstring(node, clean=True) or ""
-                        break
-                elif isinstance(code_obj, ModuleObject) and isinstance(node, ast.Module):
-                    old_docstring = ast.get_docstring(node, clean=True) or ""
-                    break
-
-            if old_docstring == -1:
+        if self.old_docstrings.has_file(code_obj.filename):
+            _, path = get_keys(self.code_parser.code_representer, [code_obj])[code_obj.id]
+            old_docstring = self.old_docstrings.get(code_obj.filename, path)
+
+            if old_docstring is None:
                 # new method/class
                 return []
             if code_obj.old_docstring is not None and old_docstring == code_obj.old_docstring:
                 print("+++docstrings are equal+++")
                 return []
+        else:
+            old_docstring = ""
 
         # if the file does not exist, all docstrings were made manually
         print("---docstrings are different---")
         new_docstring_dismantler = DocstringDismantler(docstring=code_obj.old_docstring or "")
-        if not ("old_docstring" in locals() or "old_docstring" in globals()):
-            old_docstring = ""
         old_docstring_dismantler = DocstringDismantler(docstring=old_docstring or "")
         developer_changes = old_docstring_dismantler.compare_docstrings(new_docstring_dismantler)
         if len(developer_changes) > 0:
@@ -302,12 +382,6 @@ class AutoPyDoc:
         for developer_change in developer_changes:
             print(developer_change)
 
-        self.repo.repo.git.checkout(self.repo.current_commit)
-        git_stash_list = self.repo.repo.git.stash("list")
-        if len(git_stash_list) > 0:
-            self.repo.repo.git.stash("pop")
-            self.repo.repo.git.stash("clear")
-
         if developer_changes is None:
             print()
         return developer_changes
@@ -33,8 +33,72 @@ def raise_for_required_options(common_args):
     show_default=True,
     help="Context size for the LLM model.",
 )
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="Number of worker processes used to parse the repository.",
+)
+@click.option(
+    "--cache-dir",
+    type=click.Path(file_okay=False),
+    help="Directory to cache parse results of unchanged files in between runs.",
+)
+@click.option(
+    "--cache-max-size",
+    type=click.IntRange(min=1),
+    default=512,
+    show_default=True,
+    help="Maximum size of the parse cache in MB.",
+)
+@click.option(
+    "--release-asts/--keep-asts",
+    default=False,
+    show_default=True,
+    help="Drop syntax trees once the analysis is finished to save memory.",
+)
+@click.option(
+    "--memory-report/--no-memory-report",
+    default=False,
+    show_default=True,
+    help="Log the memory in use and its peak after each stage. Slows the run down.",
+)
+@click.option(
+    "--partial-clone/--full-clone",
+    default=False,
+    show_default=True,
+    help="Clone remote repositories without history and check out python files only.",
+)
+@click.option(
+    "--mirror-dir",
+    type=click.Path(file_okay=False),
+    help="Directory of a local mirror of the remote repository, updated and cloned from on each run.",
+)
+@click.option(
+    "--patch-dir",
+    type=click.Path(file_okay=False),
+    help="Write the changes as patch with a JSON summary to this directory instead of creating a pull request. No git writes or network calls.",
+)
 @click.pass_context  # Pass common options to subcommands
-def cli(ctx, repo_path, username, pull_request_token, branch, repo_owner, debug, context_size):
+def cli(
+    ctx,
+    repo_path,
+    username,
+    pull_request_token,
+    branch,
+    repo_owner,
+    debug,
+    context_size,
+    workers,
+    cache_dir,
+    cache_max_size,
+    release_asts,
+    memory_report,
+    partial_clone,
+    mirror_dir,
+    patch_dir,
+):
     ctx.obj = {
         "repo_path": repo_path,
         "username": username,
@@ -43,6 +107,14 @@ def cli(ctx, repo_path, username, pull_request_token, branch, repo_owner, debug,
         "repo_owner": repo_owner,
         "debug": debug,
         "context_size": context_size,
+        "workers": workers,
+        "cache_dir": cache_dir,
+        "cache_max_size": cache_max_size * 2**20,
+        "release_asts": release_asts,
+        "memory_report": memory_report,
+        "partial_clone": partial_clone,
+        "mirror_dir": mirror_dir,
+        "patch_dir": patch_dir,
     }
 
 
@@ -73,6 +145,14 @@ def ollama(ctx, ollama_host):
         branch=common_args["branch"],
         repo_owner=common_args["repo_owner"],
         debug=common_args["debug"],
+        workers=common_args["workers"],
+        cache_dir=common_args["cache_dir"],
+        cache_max_size=common_args["cache_max_size"],
+        release_asts=common_args["release_asts"],
+        memory_report=common_args["memory_report"],
+        partial_clone=common_args["partial_clone"],
+        mirror_dir=common_args["mirror_dir"],
+        patch_dir=common_args["patch_dir"],
         model_strategy_name="ollama",
         model_strategy_params=strategy_params,
     )
@@ -106,6 +186,14 @@ def gemini(ctx, gemini_api_key):
         branch=common_args["branch"],
         repo_owner=common_args["repo_owner"],
         debug=common_args["debug"],
+        workers=common_args["workers"],
+        cache_dir=common_args["cache_dir"],
+        cache_max_size=common_args["cache_max_size"],
+        release_asts=common_args["release_asts"],
+        memory_report=common_args["memory_report"],
+        partial_clone=common_args["partial_clone"],
+        mirror_dir=common_args["mirror_dir"],
+        patch_dir=common_args["patch_dir"],
         model_strategy_name="gemini",
         model_strategy_params=strategy_params,
     )
@@ -135,6 +223,14 @@ def local_deepseek(ctx, device):
         branch=common_args["branch"],
         repo_owner=common_args["repo_owner"],
         debug=common_args["debug"],
+        workers=common_args["workers"],
+        cache_dir=common_args["cache_dir"],
+        cache_max_size=common_args["cache_max_size"],
+        release_asts=common_args["release_asts"],
+        memory_report=common_args["memory_report"],
+        partial_clone=common_args["partial_clone"],
+        mirror_dir=common_args["mirror_dir"],
+        patch_dir=common_args["patch_dir"],
         model_strategy_name="local_deepseek",
         model_strategy_params=strategy_params,
     )
@@ -161,6 +257,14 @@ def mock(ctx):
         branch=common_args["branch"],
         repo_owner=common_args["repo_owner"],
         debug=common_args["debug"],
+        workers=common_args["workers"],
+        cache_dir=common_args["cache_dir"],
+        cache_max_size=common_args["cache_max_size"],
+        release_asts=common_args["release_asts"],
+        memory_report=common_args["memory_report"],
+        partial_clone=common_args["partial_clone"],
+        mirror_dir=common_args["mirror_dir"],
+        patch_dir=common_args["patch_dir"],
         model_strategy_name="mock",
         model_strategy_params=strategy_params,
     )
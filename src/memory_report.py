@@ -0,0 +1,43 @@
+import logging
+import tracemalloc
+
+
+class MemoryReport:
+    """Log the memory in use after each stage of a run and the peak during the stage"""
+
+    def __init__(self, logger: logging.Logger, enabled: bool = True):
+        """
+        Log the memory in use after each stage of a run and the peak during the stage. Tracing
+        memory allocations slows the run down, so it is only started if enabled
+
+        :param logger: logger to report to
+        :type logger: logging.Logger
+        :param enabled: toggle the report
+        :type enabled: bool
+        """
+        self.logger = logger
+        self.enabled = enabled
+        self.stages = []
+        if self.enabled and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def stage(self, name: str):
+        """
+        Report the memory of a finished stage and start measuring the peak of the next one
+
+        :param name: name of the finished stage
+        :type name: str
+        """
+        if not self.enabled:
+            return
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        self.stages.append((name, current, peak))
+        self.logger.info(
+            f"Memory after {name}: {current / 2**20:.1f} MB in use, {peak / 2**20:.1f} MB peak"
+        )
+
+    def stop(self):
+        """Stop tracing memory allocations"""
+        if self.enabled:
+            tracemalloc.stop()
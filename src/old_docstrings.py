@@ -0,0 +1,111 @@
+import ast
+
+from code_representation import CodeRepresenter
+from extract_outdated_ids import get_keys
+from source_store import SourceStore
+
+
+class OldDocstringIndex:
+    """Docstrings of the modules, classes and methods as of the latest commit"""
+
+    def __init__(self, source_store: SourceStore):
+        """
+        Docstrings of the modules, classes and methods as of the latest commit, keyed by the
+        normalized filename and the path of names and occurrences below the module, like in
+        extract_code_affected_by_change. Every file is parsed at most once, files that were
+        already parsed for the change detection are not parsed at all
+
+        :param source_store: source store reading the files as of the latest commit
+        :type source_store: SourceStore
+        """
+        self.source_store = source_store
+        self.docstrings = {}
+        # whether a file exists in the commit, by normalized filename
+        self.files = {}
+
+    def add_code_objects(self, code_representer: CodeRepresenter):
+        """
+        Add the docstrings of CodeObjects parsed from the files as of the latest commit
+
+        :param code_representer: CodeRepresenter of the latest commit
+        :type code_representer: CodeRepresenter
+        """
+        code_objects = code_representer.get_code_objects()
+        for code_obj_id, key in get_keys(code_representer, code_objects).items():
+            self.docstrings[key] = code_representer.get(code_obj_id).docstring or ""
+            self.files[key[0]] = True
+
+    def add_file(self, filename: str):
+        """
+        Parse a file as of the latest commit and add its docstrings. Files that do not exist in the
+        commit or cannot be parsed have no docstrings
+
+        :param filename: filename
+        :type filename: str
+        """
+        key = CodeRepresenter.normalize_filename(filename)
+        try:
+            tree = ast.parse(self.source_store.get_source(filename))
+        except (FileNotFoundError, SyntaxError, ValueError):
+            self.files[key] = False
+            return
+        self.files[key] = True
+        self.docstrings[(key, ())] = ast.get_docstring(tree, clean=True) or ""
+        self.add_docstrings(key, tree, ())
+
+    def add_docstrings(self, key: str, node: ast.AST, path: tuple[tuple[str, int], ...]):
+        """
+        Add the docstrings of the classes and methods in the body of a node
+
+        :param key: normalized filename
+        :type key: str
+        :param node: module, class or function definition
+        :type node: ast.AST
+        :param path: path of the node
+        :type path: tuple[tuple[str, int], ...]
+        """
+        # children are found like CodeParser.extract_sub_classes_and_methods does
+        occurrences = {}
+        for child in node.body:
+            if not (
+                isinstance(child, ast.FunctionDef)
+                or isinstance(child, ast.AsyncFunctionDef)
+                or isinstance(child, ast.ClassDef)
+            ):
+                continue
+            occurrence = occurrences.get(child.name, 0)
+            occurrences[child.name] = occurrence + 1
+            child_path = path + ((child.name, occurrence),)
+            self.docstrings[(key, child_path)] = ast.get_docstring(child, clean=True) or ""
+            self.add_docstrings(key, child, child_path)
+
+    def has_file(self, filename: str) -> bool:
+        """
+        Check if a file existed in the latest commit
+
+        :param filename: filename
+        :type filename: str
+
+        :return: True if the file existed and could be parsed
+        :return type: bool
+        """
+        key = CodeRepresenter.normalize_filename(filename)
+        if key not in self.files:
+            self.add_file(filename)
+        return self.files[key]
+
+    def get(self, filename: str, path: tuple[tuple[str, int], ...]) -> str | None:
+        """
+        Get the docstring of the module, a class or a method as of the latest commit
+
+        :param filename: filename
+        :type filename: str
+        :param path: path of names and occurrences below the module, the module has the empty path
+        :type path: tuple[tuple[str, int], ...]
+
+        :return: docstring, empty if there was none. None if the code did not exist
+        :return type: str|None
+        """
+        if not self.has_file(filename):
+            return None
+        return self.docstrings.get((CodeRepresenter.normalize_filename(filename), path))
@@ -0,0 +1,162 @@
+import ast
+import hashlib
+import io
+import logging
+import os
+import pickle
+import sys
+import tempfile
+
+# 512 MB
+DEFAULT_MAX_SIZE = 512 * 2**20
+
+
+class AstStrippingPickler(pickle.Pickler):
+    """Pickler that leaves out ast nodes. They are loaded as None"""
+
+    def persistent_id(self, obj):
+        if isinstance(obj, ast.AST):
+            return "ast"
+        return None
+
+
+class AstStrippingUnpickler(pickle.Unpickler):
+    """Unpickler for data written by AstStrippingPickler"""
+
+    def persistent_load(self, pid):
+        if pid == "ast":
+            return None
+        raise pickle.UnpicklingError("unsupported persistent id " + str(pid))
+
+
+class ParseCache:
+    """
+    Persistent cache of extraction results across runs, addressed by a hash of the file content.
+    Entries are evicted least recently used first once the cache exceeds its maximum size
+    """
+
+    def __init__(self, cache_dir: str, max_size: int = DEFAULT_MAX_SIZE):
+        """
+        Persistent cache of extraction results across runs, addressed by a hash of the file content.
+        Entries are evicted least recently used first once the cache exceeds its maximum size
+
+        :param cache_dir: directory to store the cache in. Created if it does not exist
+        :type cache_dir: str
+        :param max_size: maximum size of the cache in bytes
+        :type max_size: int
+        """
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def get_key(*parts: str) -> str:
+        """
+        Get the cache key of an entry
+
+        :param parts: everything the cached value depends on, e.g. version, filename and content
+        :type parts: str
+
+        :return: cache key
+        :return type: str
+        """
+        digest = hashlib.blake2b(digest_size=20)
+        # the python version determines the ast and the pickle format
+        digest.update(sys.version.encode("utf-8"))
+        for part in parts:
+            encoded = part.encode("utf-8", errors="surrogatepass")
+            digest.update(len(encoded).to_bytes(8, "little"))
+            digest.update(encoded)
+        return digest.hexdigest()
+
+    def get_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key + ".pickle")
+
+    def load(self, key: str):
+        """
+        Load a cached value. ast nodes contained in the value are None
+
+        :param key: cache key
+        :type key: str
+
+        :return: the cached value or None if it is not cached
+        :return type: Any
+        """
+        path = self.get_path(key)
+        try:
+            with open(path, mode="rb") as f:
+                value = AstStrippingUnpickler(f).load()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (pickle.UnpicklingError, EOFError, AttributeError, ImportError, OSError) as e:
+            self.logger.info("Ignoring unreadable cache entry " + path + ": " + repr(e))
+            self.remove(path)
+            self.misses += 1
+            return None
+        # mark as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return value
+
+    def store(self, key: str, value):
+        """
+        Store a value in the cache. ast nodes contained in the value are left out
+
+        :param key: cache key
+        :type key: str
+        :param value: picklable value to store
+        :type value: Any
+        """
+        buffer = io.BytesIO()
+        AstStrippingPickler(buffer, protocol=pickle.HIGHEST_PROTOCOL).dump(value)
+        path = self.get_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # write to a temporary file first, so readers never see partial entries
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, mode="wb") as f:
+                f.write(buffer.getvalue())
+            os.replace(tmp_path, path)
+        except OSError as e:
+            self.logger.info("Could not write cache entry " + path + ": " + repr(e))
+            self.remove(tmp_path)
+            return
+        self.stored += 1
+
+    def remove(self, path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def evict(self):
+        """
+        Remove the least recently used entries until the cache is no larger than its maximum size
+        """
+        entries = []
+        total_size = 0
+        for dirpath, dirnames, filenames in os.walk(self.cache_dir):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total_size += stat.st_size
+        if total_size <= self.max_size:
+            return
+        entries.sort()
+        for mtime, size, path in entries:
+            if total_size <= self.max_size:
+                break
+            self.remove(path)
+            total_size -= size
@@ -1,27 +1,32 @@
 import ast
 import configparser
-import filecmp
-import inspect
+import json
 import os
 import pathlib
-import re
-import shutil
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 import validators
 from dotenv import load_dotenv
-from git import Actor, Repo
+from git import Actor, GitCommandError, Repo
 from github import Github
 
-from code_representation import (
-    ClassObject,
-    CodeRepresenter,
-    MethodObject,
-    ModuleObject,
-)
+from code_representation import CodeRepresenter
 
-import helpers
+from docstring_editor import (
+    DocstringEdit,
+    apply_edits,
+    check_file_integrity,
+    get_unified_diff,
+    select_edits,
+    write_atomically,
+)
+from docstring_locator import DocstringLocator
+from extract_affected_code_from_change_info import parse_diff
+from extract_outdated_ids import get_keys
+from fingerprint import get_ast_fingerprint
+from source_store import GitSourceStore, SourceBuffer, SourceStore
 
 
 class CodeIntegrityViolationError(Exception):
@@ -75,6 +80,9 @@ class RepoController:
         debug: bool = False,
         branch: str = "main",
         repo_owner=None,
+        partial_clone: bool = False,
+        mirror_dir: str | None = None,
+        patch_dir: str | None = None,
     ):
         """
         A class to control interactions with the target repository
@@ -85,13 +93,25 @@ class RepoController:
         :type pull_request_token: str
         :param debug: toggle debug mode
         :type debug: bool
+        :param partial_clone: clone remote repositories without history and with python files only
+        :type partial_clone: bool
+        :param mirror_dir: directory of a local mirror of remote repositories, kept in between runs
+            and cloned from instead of the remote. Optional
+        :type mirror_dir: str|None
+        :param patch_dir: directory to write the changes to as patch instead of creating a pull
+            request. Optional
+        :type patch_dir: str|None
         """
         parent_dir = pathlib.Path().resolve()
         dir = "working_repo"
         self.working_dir = os.path.join(parent_dir, dir)
-        self.cmp_files = []
+        # content of the edited files before the first edit
+        self.original_buffers = {}
         self.pr_notes = []
         self.branch = branch
+        self.source_store = SourceStore()
+        self.docstring_locators = {}
+        self.pending_edits = {}
 
         self.debug = debug
         self.logger = logger
@@ -102,11 +122,16 @@ class RepoController:
         if self.repo_owner is None:
             self.repo_owner = username
 
+        self.partial_clone = partial_clone
+        self.mirror_dir = mirror_dir
+        self.patch_dir = patch_dir
+
         self.is_remote_repo = validators.url(repo_path)
         if self.is_remote_repo:
             self.repo_url = repo_path
             self.pull_repo()
-            full_repo_name = self.repo.remotes.origin.url
+            # origin may point to the mirror
+            full_repo_name = self.repo_url
             self.repo_name = full_repo_name.split(".git")[0].split("/")[-1]
             self.remote_name = full_repo_name.split(".git")[0].split("/")[-2]
         else:
@@ -116,11 +141,12 @@ class RepoController:
             self.repo_name = full_repo_name.split("/")[-1]
             self.remote_name = full_repo_name.split("/")[-2]
 
-        if os.path.exists(os.path.join(parent_dir, "saved_files")):
-            shutil.rmtree(os.path.join(parent_dir, "saved_files"))
-
         self.current_commit = self.repo.head.commit.hexsha
         self.get_latest_commit()
+        # files as of the latest commit are read from the object store, the working tree is never checked out
+        self.old_source_store = GitSourceStore(
+            repo=self.repo, commit=self.latest_commit_hash, working_dir=self.working_dir
+        )
 
     def get_files_in_repo(self) -> list[str]:
         """
@@ -143,6 +169,29 @@ class RepoController:
             self.repo_files = [file for file in repo_files if file.endswith(".py")]
         return self.repo_files
 
+    def get_changed_files(self) -> list[str]:
+        """
+        Get the python files in the target repository that were added or changed since the latest commit
+
+        :return: list of changed python files in the repository
+        :return type: list[str]
+        """
+        if self.initial_run:
+            return list(self.get_files_in_repo())
+        # compares the commit with the working tree. Untracked files are not listed, but they do not
+        # exist in the commit either
+        diff = self.repo.git.diff("--name-only", "-z", self.latest_commit_hash, "--")
+        changed_paths = {
+            os.path.normpath(os.path.join(self.working_dir, path))
+            for path in diff.split("\0")
+            if len(path) > 0
+        }
+        return [
+            file
+            for file in self.get_files_in_repo()
+            if os.path.normpath(file) in changed_paths or not self.old_source_store.has_file(file)
+        ]
+
     def get_latest_commit(self):
         """Get the latest commit the tool sucessfully ran for. Sets the result internally"""
         self.latest_commit_file_name = os.path.join(self.working_dir, "latest_commit.autopydoc")
@@ -179,8 +228,17 @@ class RepoController:
             # convert ssh link to https link if necessary
             if self.repo_url.startswith("git@github.com") and self.repo_url.endswith(".git"):
                 self.repo_url = "https://" + self.repo_url[4:-4]
-            self.repo = Repo.clone_from(self.repo_url, self.working_dir)
-            self.repo.git.checkout(self.branch)
+            source_url = self.repo_url
+            if self.mirror_dir is not None:
+                source_url = self.update_mirror()
+            if self.partial_clone:
+                self.clone_partially(source_url)
+            else:
+                self.repo = Repo.clone_from(source_url, self.working_dir)
+                self.repo.git.checkout(self.branch)
+            if source_url != self.repo_url:
+                # objects missing later are fetched from the mirror, pushes go to the remote
+                self.repo.git.remote("set-url", "--push", "origin", self.repo_url)
             self.logger.info(f"Checked out branch {self.repo.active_branch.name}")
             assert not self.repo.bare
         else:
@@ -190,6 +248,74 @@ class RepoController:
             self.repo.git.checkout(self.branch)
             assert not self.repo.bare
 
+    def update_mirror(self) -> str:
+        """
+        Create the local mirror of the remote repository or fetch the changes since the last run
+
+        :return: file url of the mirror
+        :return type: str
+        """
+        if os.path.exists(self.mirror_dir):
+            self.logger.info("Updating mirror")
+            mirror = Repo(self.mirror_dir)
+            mirror.git.fetch("--prune", "origin")
+        else:
+            self.logger.info("Creating mirror")
+            mirror = Repo.clone_from(self.repo_url, self.mirror_dir, mirror=True)
+        # partial and shallow clones are served by the mirror
+        with mirror.config_writer() as config:
+            config.set_value("uploadpack", "allowFilter", "true")
+            config.set_value("uploadpack", "allowAnySHA1InWant", "true")
+        mirror.close()
+        # clones from plain paths ignore --depth and --filter
+        return pathlib.Path(self.mirror_dir).resolve().as_uri()
+
+    def clone_partially(self, source_url: str):
+        """
+        Clone only what a run needs: the latest commit of the branch, the commit the tool last ran
+        for and the python files that changed in between. History and other files are not
+        fetched, blobs missing later are fetched on demand. Only python files and the commit
+        tracking file are checked out
+
+        :param source_url: url to clone from
+        :type source_url: str
+        """
+        self.repo = Repo.clone_from(
+            source_url,
+            self.working_dir,
+            filter="blob:none",
+            depth=1,
+            no_checkout=True,
+            branch=self.branch,
+        )
+        try:
+            latest_commit_hash = self.repo.git.show("HEAD:latest_commit.autopydoc").split("\n")[0]
+        except GitCommandError:
+            latest_commit_hash = None
+        if latest_commit_hash:
+            # the history in between is not needed, only the trees of both commits
+            self.repo.git.fetch("--depth=1", "--no-tags", "origin", latest_commit_hash)
+            # fetch the previous versions of changed python files at once, not one by one
+            # entries are ":<old mode> <new mode> <old sha> <new sha> <status>", separated by NUL
+            diff = self.repo.git.diff(
+                "--raw", "-z", "--no-abbrev", latest_commit_hash, "HEAD", "--", "*.py"
+            )
+            old_shas = [
+                entry.split(" ")[2]
+                for entry in diff.split("\0")
+                if entry.startswith(":") and entry.split(" ")[2].strip("0") != ""
+            ]
+            if len(old_shas) > 0:
+                self.repo.git.fetch(
+                    "--no-tags",
+                    "--no-write-fetch-head",
+                    "--filter=blob:none",
+                    "origin",
+                    *old_shas,
+                )
+        self.repo.git.sparse_checkout("set", "--no-cone", "*.py", "/latest_commit.autopydoc")
+        self.repo.git.checkout(self.branch)
+
     def get_changes(self) -> list[dict]:
         """
         Returns changed methods, classes and modules
@@ -202,32 +328,44 @@ class RepoController:
         if self.initial_run:
             result = []
             for file in self.get_files_in_repo():
-                with open(file=file, mode="r") as f:
-                    result.append(
-                        {
-                            "filename": os.path.normpath(file),
-                            "start": 0,
-                            "lines_changed": len(f.readlines()),
-                        }
-                    )
+                result.append(
+                    {
+                        "filename": os.path.normpath(file),
+                        "start": 1,
+                        "lines_changed": len(self.source_store.get_lines(file)),
+                    }
+                )
         else:
             latest_commit = self.repo.commit(self.latest_commit_hash)
-            diff = self.repo.git.diff(latest_commit, current_commit)
-
-            pattern = re.compile(r"\+\+\+ b\/([\w.\/]+)\n@@ -(\d+),(\d+) \+(\d+),(\d+) @@")
-            changes = re.findall(pattern, diff)
+            # streamed, the diff of a large change does not have to fit in memory
+            process = self.repo.git.diff(
+                "--unified=0",
+                "--no-color",
+                "--no-ext-diff",
+                # independent of diff.noprefix and diff.mnemonicPrefix
+                "--src-prefix=a/",
+                "--dst-prefix=b/",
+                latest_commit.hexsha,
+                current_commit.hexsha,
+                "--",
+                as_process=True,
+            )
+            lines = (line.decode("utf-8", errors="replace") for line in process.proc.stdout)
             result = []
-            for change in changes:
+            for change in parse_diff(lines):
                 # check if change affects a python file
-                if not change[0].endswith(".py"):
+                if not change["filename"].endswith(".py"):
                     continue
                 result.append(
                     {
-                        "filename": os.path.normpath(os.path.join(self.working_dir, change[0])),
-                        "start": int(change[3]),
-                        "lines_changed": int(change[4]),
+                        "filename": os.path.normpath(
+                            os.path.join(self.working_dir, change["filename"])
+                        ),
+                        "start": change["start"],
+                        "lines_changed": change["lines_changed"],
                     }
                 )
+            process.wait()
         return result
 
     def identify_docstring_location(
@@ -244,116 +382,39 @@ class RepoController:
         :return: tuple(start, indentation level, end)
         :rtype: tuple[int]
 
-        :raises Exception("End of docstring not found"): raised when the end of the docstring cannot be located
+        :raises UnknownCodeObjectError: raised when the CodeObject is not found in its file
         """
-        # TODO use ast.get_source_code_segment() and/or look into asttokens
-        # self.repo.git.checkout(self.current_commit) # TODO was this necessary?
-
         code_obj = code_representer.get(code_obj_id)
-        with open(file=code_obj.filename, mode="r") as f:
-            lines = f.readlines()
-            if isinstance(code_obj, ModuleObject):
-                start_pos = 0
-                indentation_level = 0
-                start_line = lines[0]
-                i = start_pos
-            else:
-                # get start pos
-                class_nesting = []
-                current_code_obj = code_obj
-                while (
-                    hasattr(current_code_obj, "outer_class_id")
-                    and current_code_obj.outer_class_id is not None
-                ):
-                    current_code_obj = code_representer.get(current_code_obj.outer_class_id)
-                    class_nesting.append(current_code_obj)
-                start_pos = 0
-                for outer_class_obj in class_nesting[
-                    ::-1
-                ]:  # iterate from outer most class to inner most class
-                    # search for class
-                    for i in range(start_pos, len(lines)):
-                        if (
-                            lines[i]
-                            .lstrip()
-                            .lower()
-                            .startswith("class " + outer_class_obj.name.lower())
-                        ):
-                            start_pos = i + 1
-                            break
-                if isinstance(code_obj, MethodObject):
-                    prefix = "def "
-                elif isinstance(code_obj, ClassObject):
-                    prefix = "class "
-                else:
-                    self.logger.error(
-                        f"Unkown code_obj type {type(code_obj)} in {inspect.currentframe().f_code.co_name}"
-                    )
-                    raise UnknownCodeObjectError
-
-                # get start of signature
-                for i in range(start_pos, len(lines)):
-                    if lines[i].lstrip().lower().startswith(prefix + code_obj.name.lower()):
-                        start_pos = i
-                        start_line = lines[start_pos]
-                        break
-
-                # find end of signature
-                open_brackets = 0
-                for j in range(start_pos, len(lines)):
-                    # TODO this can still fail for cases like def func(a="sfr("):
-                    open_brackets += lines[j].count("(")
-                    open_brackets -= lines[j].count(")")
-                    if open_brackets < 1:
-                        start_pos = j + 1
-                        break
-
-                # get indentation level
-                indentation_level = (
-                    sum(
-                        4 if char == "\t" else 1 for char in start_line[: -len(start_line.lstrip())]
-                    )
-                    + 4
-                )
-                end_pos = len(lines)
-                i = start_pos
-                for j in range(start_pos, len(lines)):
-                    if len(lines[j].strip()) > 0:
-                        i = j
-                        break
-            if lines[i].strip().startswith('"""'):
-                if (
-                    lines[i].strip().rstrip("\n").endswith('"""') and len(lines[i].strip()) >= 5
-                ):  # inline docstring
-                    end_pos = i + 1
-                else:
-                    for j in range(i + 1, len(lines)):
-                        if lines[j].strip().rstrip("\n").endswith('"""'):
-                            end_pos = j + 1
-                            break
-                        if j == len(lines) - 1:
-                            self.logger.warning(
-                                f"End of docstring not found in file {code_obj.filename} for {code_obj.code_type} {code_obj.name}"
-                            )
-                            end_pos = len(lines)
-            else:
-                end_pos = start_pos
-        return (start_pos, indentation_level, end_pos)
+        path = get_keys(code_representer, [code_obj])[code_obj.id][1]
+        location = self.get_docstring_locator(code_obj.filename).get(path)
+        if location is None:
+            self.logger.error(
+                f"{code_obj.code_type} {code_obj.name} not found in file {code_obj.filename}"
+            )
+            raise UnknownCodeObjectError(
+                f"{code_obj.code_type} {code_obj.name} not found in file {code_obj.filename}"
+            )
+        return location
 
-    def save_file_for_comparison(self, filename: str):
-        new_partial_filename = filename.split("working_repo")[-1].lstrip("/").lstrip("\\\\")
-        parent_dir = pathlib.Path().resolve()
-        dir = "saved_files"
-        dir = os.path.join(parent_dir, dir)
-        if not os.path.exists(dir):
-            os.makedirs(dir)
-        new_filename = os.path.join(dir, new_partial_filename)
-        new_location = os.path.dirname(new_filename)
-        if not os.path.isfile(new_filename):
-            if not os.path.exists(new_location):
-                os.makedirs(new_location)
-            new_path = shutil.copy(filename, new_location)
-            self.cmp_files.append([filename, new_path])
+    def get_docstring_locator(self, filename: str) -> DocstringLocator:
+        """
+        Get the docstring locations of a file. They are computed once per file and adjusted to
+        the docstrings inserted by insert_docstring
+
+        :param filename: filename
+        :type filename: str
+
+        :return: docstring locations of the file
+        :return type: DocstringLocator
+        """
+        buffer = self.source_store.get_buffer(filename)
+        key = CodeRepresenter.normalize_filename(filename)
+        docstring_locator = self.docstring_locators.get(key)
+        # the file changed in another way
+        if docstring_locator is None or docstring_locator.buffer is not buffer:
+            docstring_locator = DocstringLocator(buffer)
+            self.docstring_locators[key] = docstring_locator
+        return docstring_locator
 
     def insert_docstring(
         self,
@@ -362,9 +423,11 @@ class RepoController:
         end: int,
         new_docstring: str,
         old_docstring: str | None = None,
+        code_obj_id: int | None = None,
     ):
         """
-        Insert the new docstring. Lines between start and end will be overridden. Static method
+        Queue the new docstring. Lines between start and end will be overridden once the pending
+        docstrings are written by write_docstrings
 
         :param filename: filename
         :type filename: str
@@ -374,46 +437,134 @@ class RepoController:
         :type end: int
         :param new_docstring: new docstring
         :type new_docstring: str
+        :param old_docstring: docstring to replace, only used for module docstrings
+        :type old_docstring: str|None
+        :param code_obj_id: id of the CodeObject the docstring belongs to
+        :type code_obj_id: int|None
+        """
+        buffer = self.source_store.get_buffer(filename)
+        key = CodeRepresenter.normalize_filename(filename)
+        if key not in self.original_buffers:
+            self.original_buffers[key] = (filename, buffer)
+        if key not in self.pending_edits:
+            self.pending_edits[key] = (filename, buffer, {})
+        edits = self.pending_edits[key][2]
+        if start == 0 and old_docstring is not None and len(old_docstring) > 6:  # module docstring
+            position = buffer.text.find(old_docstring)
+            if position == -1:
+                self.logger.warning(f"Old module docstring not found in file {filename}")
+                return
+            # the quotes of the old docstring are kept, so they are stripped from the new one
+            edit = DocstringEdit(
+                start=position,
+                end=position + len(old_docstring),
+                text=new_docstring.strip('"""'),
+                code_obj_id=code_obj_id,
+            )
+        else:
+            edit = DocstringEdit(
+                start=self.get_line_offset(buffer, start),
+                end=self.get_line_offset(buffer, end),
+                text=new_docstring + "\n",
+                code_obj_id=code_obj_id,
+                start_line=start,
+                end_line=end,
+                line_count=(new_docstring + "\n").count("\n"),
+            )
+        # a newer docstring for the same location replaces the pending one
+        edits[edit.start] = edit
+
+    @staticmethod
+    def get_line_offset(buffer: SourceBuffer, line: int) -> int:
+        """
+        Get the character offset of the start of a line
+
+        :param buffer: content of the file
+        :type buffer: SourceBuffer
+        :param line: line index, starting at 0
+        :type line: int
+
+        :return: character offset
+        :return type: int
+        """
+        if line < len(buffer.line_offsets):
+            return buffer.line_offsets[line]
+        return len(buffer.text)
+
+    def write_docstrings(self) -> list[int]:
+        """
+        Write the pending docstrings. Every file is edited in a single pass, checked for code
+        integrity once and written atomically. If the check fails, the edits are checked one by
+        one and only the edits violating the code integrity are rejected
+
+        :return: ids of the CodeObjects whose docstrings were rejected
+        :return type: list[int]
         """
-        self.save_file_for_comparison(filename)
-        with open(filename, "r") as f:
-            content = f.readlines()
-            content_before = "".join(content)
-            if (
-                start == 0 and old_docstring is not None and len(old_docstring) > 6
-            ):  # module docstring
-                new_content = content_before.replace(old_docstring, new_docstring.strip('"""'))
-                # since this does not replace """ or ''', remove ''' and duplicate """
-                new_content.replace('""""""', '"""')
-                new_content.replace("'''", "")  # TODO might break stuff
+        rejected_ids = []
+        for key, (filename, buffer, edits) in self.pending_edits.items():
+            if self.source_store.get_buffer(filename) is not buffer:
+                self.logger.error(f"File {filename} changed while docstrings were pending!")
+                accepted, rejected = [], list(edits.values())
             else:
-                before = content[:start]
-                after = content[end:]
-                new_content = "".join(before) + new_docstring + "\n" + "".join(after)
-            if not helpers.remove_comments(new_content) == helpers.remove_comments(content_before):
+                accepted, rejected = select_edits(buffer.text, list(edits.values()))
+            for edit in rejected:
                 self.logger.error(
-                    f"Code integrity was violated by replacing old docstring {old_docstring} with new docstring {new_docstring} at line {start} to {end} in file {filename}!"
+                    f"Code integrity was violated by inserting docstring {edit.text} at position {edit.start} to {edit.end} in file {filename}!"
+                )
+                if edit.code_obj_id is not None:
+                    rejected_ids.append(edit.code_obj_id)
+            if len(accepted) == 0:
+                continue
+            new_content = apply_edits(buffer.text, accepted)
+            write_atomically(filename, new_content)
+            new_buffer = self.source_store.add_source(filename, new_content)
+            docstring_locator = self.docstring_locators.get(key)
+            if docstring_locator is None or docstring_locator.buffer is not buffer:
+                continue
+            if any(edit.start_line is None for edit in accepted):
+                # replaced by content, the locations are computed again when needed
+                del self.docstring_locators[key]
+                continue
+            for edit in sorted(accepted, key=lambda edit: edit.start, reverse=True):
+                docstring_locator.apply_edit(
+                    edit.start_line, edit.end_line, edit.line_count, new_buffer
                 )
-                raise CodeIntegrityViolationError("Code integrity violated")
-
-            with open(filename, "w") as file:
-                file.write(new_content)
-
-    def remove_comments(self, filename: str) -> str:
-        with open(filename) as f:
-            content = helpers.remove_comments(f.read())
-            new_filename = filename.rstrip(".py") + "_no_comments.py"
-            with open(new_filename, mode="w") as f:
-                f.write(content)
-            return new_filename
-
-    def validate_code_integrity(self):
-        for file_before, file_after in self.cmp_files:
-            file_before_no_comments = self.remove_comments(file_before)
-            file_after_no_comments = self.remove_comments(file_after)
-            if not filecmp.cmp(file_before_no_comments, file_after_no_comments):
-                return False
-        return True
+        self.pending_edits = {}
+        return rejected_ids
+
+    def validate_code_integrity(
+        self, before_trees: dict[str, ast.Module] | None = None, workers: int = 1
+    ) -> bool:
+        """
+        Check that only docstrings changed in the files that were edited, by comparing their asts
+        without docstrings before and after editing in memory
+
+        :param before_trees: asts of the files before editing by filename, e.g. kept from the
+            analysis. Files without ast are parsed again. Optional
+        :type before_trees: dict[str, ast.Module]|None
+        :param workers: number of worker processes. 1 checks in this process
+        :type workers: int
+
+        :return: whether the code of every edited file is unchanged
+        :return type: bool
+        """
+        if before_trees is None:
+            before_trees = {}
+        jobs = ([], [], [])
+        for filename, buffer in self.original_buffers.values():
+            tree = before_trees.get(filename)
+            before_fingerprint = None if tree is None else get_ast_fingerprint(tree)
+            jobs[0].append(before_fingerprint)
+            jobs[1].append(buffer.text if before_fingerprint is None else None)
+            # the files as they were written
+            with open(filename) as f:
+                jobs[2].append(f.read())
+        if workers <= 1 or len(jobs[2]) <= 1:
+            results = map(check_file_integrity, *jobs)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as process_pool:
+                results = list(process_pool.map(check_file_integrity, *jobs))
+        return all(results)
 
     def update_latest_commit(self):
         """
@@ -425,15 +576,17 @@ class RepoController:
             f.write(current_commit)
         self.repo.index.add([self.latest_commit_file_name])
 
-    def commit_to_new_branch(self, changed_files: list[str] = []):
+    def commit_to_new_branch(self, changed_files: list[str] | None = None):
         """
         Commit changes to a new branch. The new branch name is <old_branch>_AutoPyDoc
 
-        :param changed_files: list of changed files
-        :type change_files: list[str]
+        :param changed_files: list of changed files. Optional
+        :type change_files: list[str]|None
 
         :raises Exception: bare repository
         """
+        if changed_files is None:
+            changed_files = []
         if self.repo is not None:
             # create new branch
             new_branch = self.branch + "_AutoPyDoc"
@@ -529,14 +682,76 @@ class RepoController:
         github_object.close()
         return pull_request
 
-    def apply_changes(self, changed_files: list[str] = []):
+    def get_pull_request_description(self) -> str:
+        """
+        Get the description of the pull request, including the notes
+
+        :return: description
+        :return type: str
         """
-        Apply to the repo in the way configured in src/config.ini. Currently creates a pull request from a new branch
+        description = "Automatically created docstrings for recently changed code"
+        if len(self.pr_notes) > 0:
+            description += "\n\nNotes:\n"
+            description += "\n".join(self.pr_notes)
+        return description
 
-        :param changed_files: list of changed_files
-        :type changed_files: list[str]
+    def write_patch(self, changed_files: list[str] | None = None) -> tuple[str, str]:
+        """
+        Write every docstring edit as a single unified diff and the pull request it would have
+        been as JSON summary to self.patch_dir. Neither git nor the network is used. The patch
+        applies to the current commit with git apply
+
+        :param changed_files: list of changed files. Optional
+        :type changed_files: list[str]|None
+
+        :return: paths of the patch and of the summary
+        :return type: tuple[str, str]
+        """
+        if changed_files is None:
+            changed_files = []
+        os.makedirs(self.patch_dir, exist_ok=True)
+        patch = []
+        edited_files = []
+        for filename, buffer in sorted(self.original_buffers.values(), key=lambda item: item[0]):
+            path = os.path.relpath(filename, self.working_dir).replace(os.sep, "/")
+            diff = get_unified_diff(path, buffer.text, self.source_store.get_source(filename))
+            if len(diff) > 0:
+                patch.append(diff)
+                edited_files.append(path)
+        patch_file = os.path.join(self.patch_dir, "autopydoc.patch")
+        with open(patch_file, mode="w") as f:
+            f.write("".join(patch))
+
+        summary = {
+            "title": "Autogenerated Docstrings",
+            "description": self.get_pull_request_description(),
+            "notes": self.pr_notes,
+            "base_branch": self.branch,
+            "commit": self.current_commit,
+            "edited_files": edited_files,
+            "changed_files": [
+                os.path.relpath(file, self.working_dir).replace(os.sep, "/")
+                for file in changed_files
+            ],
+        }
+        summary_file = os.path.join(self.patch_dir, "autopydoc.json")
+        with open(summary_file, mode="w") as f:
+            json.dump(summary, f, indent=4)
+        self.logger.info(f"Patch written to {patch_file}, summary written to {summary_file}")
+        return patch_file, summary_file
+
+    def apply_changes(self, changed_files: list[str] | None = None):
+        """
+        Apply to the repo in the way configured in src/config.ini. Currently creates a pull request
+        from a new branch, or writes a patch if self.patch_dir is set
+
+        :param changed_files: list of changed_files. Optional
+        :type changed_files: list[str]|None
         """
         self.logger.info("###Applying changes###")
+        if self.patch_dir is not None:
+            self.write_patch(changed_files=changed_files)
+            return
         config = configparser.ConfigParser()
         config.read("src/config.ini")
 
@@ -544,10 +759,7 @@ class RepoController:
         self.logger.info(f"Commit before docstring update: {current_commit}")
         new_branch = self.commit_to_new_branch(changed_files=changed_files)
 
-        description = "Automatically created docstrings for recently changed code"
-        if len(self.pr_notes) > 0:
-            description += "\n\nNotes:\n"
-            description += "\n".join(self.pr_notes)
+        description = self.get_pull_request_description()
 
         # create pull request
         self.create_pull_request(
@@ -0,0 +1,337 @@
+import ast
+import os
+import threading
+
+
+class SourceBuffer:
+    """Source code of a single file version with precomputed line offsets"""
+
+    def __init__(self, filename: str, text: str):
+        """
+        Source code of a single file version with precomputed line offsets
+
+        :param filename: file the source code belongs to
+        :type filename: str
+        :param text: content of the file
+        :type text: str
+        """
+        self.filename = filename
+        self.text = text
+        self.line_offsets = [0]
+        position = text.find("\n")
+        while position != -1:
+            self.line_offsets.append(position + 1)
+            position = text.find("\n", position + 1)
+        self._lines = None
+        self._tree = None
+        self._nodes = None
+
+    def __reduce__(self):
+        # line offsets, lines and the tree are recomputed instead of being pickled
+        return (self.__class__, (self.filename, self.text))
+
+    def get_lines(self) -> list[str]:
+        """
+        Get the lines of the buffer, including line endings
+
+        :return: lines of the buffer
+        :return type: list[str]
+        """
+        if self._lines is None:
+            # split at newlines only, like the line numbers of ast and the line offsets
+            offsets = self.line_offsets + [len(self.text)]
+            self._lines = [
+                self.text[start:end] for start, end in zip(offsets, offsets[1:]) if start < end
+            ]
+        return self._lines
+
+    def get_offset(self, lineno: int, col_offset: int) -> int:
+        """
+        Convert an ast position to a character offset into the buffer
+
+        :param lineno: line number, starting at 1
+        :type lineno: int
+        :param col_offset: column offset in utf-8 bytes, as reported by ast
+        :type col_offset: int
+
+        :return: character offset into the buffer
+        :return type: int
+        """
+        line_start = self.line_offsets[lineno - 1]
+        if lineno < len(self.line_offsets):
+            line_end = self.line_offsets[lineno]
+        else:
+            line_end = len(self.text)
+        line = self.text[line_start:line_end]
+        if line.isascii():
+            return line_start + col_offset
+        return line_start + len(line.encode("utf-8")[:col_offset].decode("utf-8", errors="replace"))
+
+    def get_span(self, node: ast.AST) -> tuple[int, int] | None:
+        """
+        Get the character offsets of the source code of an ast node
+
+        :param node: ast node with location information
+        :type node: ast.AST
+
+        :return: start and end offset or None if the node has no location information
+        :return type: tuple[int, int]|None
+        """
+        try:
+            if node.end_lineno is None or node.end_col_offset is None:
+                return None
+            start = self.get_offset(node.lineno, node.col_offset)
+            end = self.get_offset(node.end_lineno, node.end_col_offset)
+        except AttributeError:
+            return None
+        return start, end
+
+    def get_tree(self) -> ast.Module:
+        """
+        Get the ast of the buffer. The buffer is only parsed on the first access
+
+        :return: ast of the buffer
+        :return type: ast.Module
+        """
+        if self._tree is None:
+            self._tree = ast.parse(self.text)
+        return self._tree
+
+    def get_node(self, start: int, end: int) -> ast.AST | None:
+        """
+        Get the class or function definition spanning from start to end
+
+        :param start: character offset of the start of the definition
+        :type start: int
+        :param end: character offset of the end of the definition
+        :type end: int
+
+        :return: the definition or None if no definition has this span
+        :return type: ast.AST|None
+        """
+        if self._nodes is None:
+            self._nodes = {}
+            for node in ast.walk(self.get_tree()):
+                if (
+                    isinstance(node, ast.FunctionDef)
+                    or isinstance(node, ast.AsyncFunctionDef)
+                    or isinstance(node, ast.ClassDef)
+                ):
+                    self._nodes[self.get_span(node)] = node
+        return self._nodes.get((start, end))
+
+    def release_tree(self):
+        """Forget the ast of the buffer, it is parsed again on the next access"""
+        self._tree = None
+        self._nodes = None
+
+    def get_segment(self, node: ast.AST) -> str | None:
+        """
+        Get the source code of an ast node. Equivalent to ast.get_source_segment(padded=False)
+
+        :param node: ast node with location information
+        :type node: ast.AST
+
+        :return: source code of the node or None if the node has no location information
+        :return type: str|None
+        """
+        span = self.get_span(node)
+        if span is None:
+            return None
+        return self.text[span[0] : span[1]]
+
+
+class SourceStore:
+    """Read each file once per run and share its content between all consumers"""
+
+    def __init__(self):
+        """Read each file once per run and share its content between all consumers"""
+        self.buffers = {}
+
+    @staticmethod
+    def _key(filename: str) -> str:
+        return os.path.normpath(filename)
+
+    def get_buffer(self, filename: str) -> SourceBuffer:
+        """
+        Get the SourceBuffer of a file. The file is only read on the first access
+
+        :param filename: file to get
+        :type filename: str
+
+        :return: SourceBuffer of the file
+        :return type: SourceBuffer
+        """
+        key = self._key(filename)
+        buffer = self.buffers.get(key)
+        if buffer is None:
+            buffer = SourceBuffer(filename=filename, text=self.read(filename))
+            self.buffers[key] = buffer
+        return buffer
+
+    def read(self, filename: str) -> str:
+        """
+        Read the content of a file from its origin, bypassing the buffers
+
+        :param filename: file to read
+        :type filename: str
+
+        :return: content of the file
+        :return type: str
+        """
+        with open(filename, mode="r") as f:
+            return f.read()
+
+    def get_source(self, filename: str) -> str:
+        """
+        Get the content of a file
+
+        :param filename: file to get
+        :type filename: str
+
+        :return: content of the file
+        :return type: str
+        """
+        return self.get_buffer(filename).text
+
+    def get_lines(self, filename: str) -> list[str]:
+        """
+        Get the lines of a file, including line endings
+
+        :param filename: file to get
+        :type filename: str
+
+        :return: lines of the file
+        :return type: list[str]
+        """
+        return self.get_buffer(filename).get_lines()
+
+    def get_segment(self, filename: str, node: ast.AST) -> str | None:
+        """
+        Get the source code of an ast node of a file
+
+        :param filename: file the node belongs to
+        :type filename: str
+        :param node: ast node with location information
+        :type node: ast.AST
+
+        :return: source code of the node or None if the node has no location information
+        :return type: str|None
+        """
+        return self.get_buffer(filename).get_segment(node)
+
+    def add_source(self, filename: str, source: str) -> SourceBuffer:
+        """
+        Set the content of a file without reading it. Used for preloading and after writing a file
+
+        :param filename: file to set
+        :type filename: str
+        :param source: content of the file
+        :type source: str
+
+        :return: the new SourceBuffer of the file
+        :return type: SourceBuffer
+        """
+        buffer = SourceBuffer(filename=filename, text=source)
+        self.buffers[self._key(filename)] = buffer
+        return buffer
+
+    def invalidate(self, filename: str):
+        """
+        Forget the content of a file, so it is read again on the next access
+
+        :param filename: file to forget
+        :type filename: str
+        """
+        self.buffers.pop(self._key(filename), None)
+
+
+class GitSourceStore(SourceStore):
+    """SourceStore that reads files as of a commit from the git object store, without checking it out"""
+
+    def __init__(self, repo, commit: str | None, working_dir: str):
+        """
+        SourceStore that reads files as of a commit from the git object store, without checking it out
+
+        :param repo: repository to read from
+        :type repo: git.Repo
+        :param commit: commit to read the files of. If None, no file exists
+        :type commit: str|None
+        :param working_dir: root of the working tree. Filenames are resolved relative to it
+        :type working_dir: str
+        """
+        super().__init__()
+        self.repo = repo
+        self.commit = commit
+        self.working_dir = os.path.normpath(working_dir)
+        self.blob_shas = None
+        # git cat-file --batch runs as a single persistent process
+        self.lock = threading.Lock()
+
+    def get_blob_shas(self) -> dict[str, str]:
+        """
+        Get the blob shas of all files in the commit. Listed on the first access
+
+        :return: blob sha by path relative to the working tree, using "/" as separator
+        :return type: dict[str, str]
+        """
+        if self.blob_shas is None:
+            self.blob_shas = {}
+            if self.commit is not None:
+                # entries are "<mode> <type> <sha>\t<path>", separated by NUL
+                for entry in self.repo.git.ls_tree("-r", "-z", self.commit).split("\0"):
+                    if len(entry) == 0:
+                        continue
+                    info, path = entry.split("\t", 1)
+                    _, object_type, sha = info.split(" ")
+                    if object_type == "blob":
+                        self.blob_shas[path] = sha
+        return self.blob_shas
+
+    def get_relative_path(self, filename: str) -> str:
+        relative_path = os.path.relpath(os.path.normpath(filename), self.working_dir)
+        return relative_path.replace(os.sep, "/")
+
+    def get_blob_sha(self, filename: str) -> str | None:
+        """
+        Get the blob sha of a file in the commit
+
+        :param filename: path of the file in the working tree
+        :type filename: str
+
+        :return: blob sha or None if the file does not exist in the commit
+        :return type: str|None
+        """
+        return self.get_blob_shas().get(self.get_relative_path(filename))
+
+    def has_file(self, filename: str) -> bool:
+        """
+        Check if a file exists in the commit
+
+        :param filename: path of the file in the working tree
+        :type filename: str
+
+        :return: True if the file exists in the commit
+        :return type: bool
+        """
+        return self.get_blob_sha(filename) is not None
+
+    def read(self, filename: str) -> str:
+        """
+        Read the content of a file as of the commit
+
+        :param filename: path of the file in the working tree
+        :type filename: str
+
+        :raises FileNotFoundError: raised if the file does not exist in the commit
+
+        :return: content of the file
+        :return type: str
+        """
+        sha = self.get_blob_sha(filename)
+        if sha is None:
+            raise FileNotFoundError(filename + " does not exist in commit " + str(self.commit))
+        with self.lock:
+            _, _, _, data = self.repo.git.get_object_data(sha)
+        # match the newline translation of open()
+        return data.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
@@ -0,0 +1,123 @@
+import ast
+import logging
+import os
+import pathlib
+import sys
+
+file_path = os.path.dirname(os.path.realpath(__file__))
+project_dir = str(pathlib.Path(file_path).parent.parent.absolute())
+sys.path.append(project_dir)
+
+from src.get_context import CodeParser, CodeRepresenter
+
+CODE = """class ClassA:
+    counter: int = 0
+
+    def __init__(self, x: int, y=3):
+        self.x = x
+
+        class Inner:
+            def __init__(self):
+                self.inner = 1
+
+        def helper():
+            return 2
+
+        if x:
+            raise ValueError("x")
+
+    def func_a(self):
+        return self.x
+
+    def func_b(self) -> int:
+        print(self.x)
+        return
+
+
+def func_c():
+    def func_d():
+        raise KeyError
+    return func_d()
+
+
+value = func_c()
+"""
+
+
+def create_code_parser(tmp_path):
+    filename = os.path.join(tmp_path, "testfile.py")
+    with open(filename, mode="w") as f:
+        f.write(CODE)
+    code_parser = CodeParser(
+        code_representer=CodeRepresenter(),
+        working_dir=str(tmp_path),
+        debug=True,
+        files=[filename],
+        logger=logging.getLogger(__name__),
+    )
+
+    def get(name):
+        code_representer = code_parser.code_representer
+        return code_representer.get_by_filename_and_name(filename=filename, name=name)[0]
+
+    return code_parser, get, filename
+
+
+def test_analyze(tmp_path):
+    code_parser, get, filename = create_code_parser(tmp_path)
+    code_parser.analyze()
+
+    init = get("__init__")
+    assert [arg["name"] for arg in init.arguments] == ["self", "x", "y"]
+    assert init.arguments[1]["type"] == "int"
+    assert init.missing_arg_types == {"y"}
+
+    # exceptions are raised by all enclosing modules and methods
+    assert init.exceptions == {"ValueError"}
+    assert get("func_d").exceptions == {"KeyError"}
+    assert get("func_c").exceptions == {"KeyError"}
+    assert get("testfile").exceptions == {"ValueError", "KeyError"}
+
+    # only returns with a value in the method itself count
+    assert not init.missing_return_type
+    assert get("helper").missing_return_type
+    assert get("func_a").missing_return_type
+    assert not get("func_b").missing_return_type
+    assert get("func_c").missing_return_type
+
+    # instance attributes belong to all enclosing classes
+    assert get("ClassA").class_attributes == [{"name": "counter", "type": "int"}]
+    assert get("ClassA").instance_attributes == [{"name": "x"}, {"name": "inner"}]
+    assert get("Inner").instance_attributes == [{"name": "inner"}]
+
+    call_sites = {
+        (code_parser.code_representer.get(call_site.caller_id).name, call_site.name)
+        for call_site in code_parser.call_sites
+    }
+    assert call_sites == {
+        ("__init__", "ValueError"),
+        ("func_b", "print"),
+        ("func_c", "func_d"),
+        ("testfile", "func_c"),
+    }
+
+    # assignments are kept in the order of ast.walk
+    module_tree = get("testfile").ast
+    assert code_parser.module_assignments[filename] == [
+        node
+        for node in ast.walk(module_tree)
+        if isinstance(node, ast.Assign) or isinstance(node, ast.AnnAssign)
+    ]
+
+
+def test_analyze_is_idempotent(tmp_path):
+    code_parser, get, filename = create_code_parser(tmp_path)
+    code_parser.extract_args_and_return_type()
+    code_parser.extract_exceptions()
+    code_parser.check_return_type()
+    code_parser.extract_attributes()
+    code_parser.extract_class_and_method_calls()
+
+    assert [arg["name"] for arg in get("__init__").arguments] == ["self", "x", "y"]
+    assert len(code_parser.call_sites) == 4
+    assert get("func_c").called_by_modules == {get("testfile").id}
@@ -6,12 +6,15 @@ file_path = os.path.dirname(os.path.realpath(__file__))
 project_dir = str(pathlib.Path(file_path).parent.parent.absolute())
 sys.path.append(project_dir)
 
+import copy as copy_module
+import pickle
 import unittest
 import ast as ast_module
 
 
 from src.code_representation import (
     frozen_field_support,
+    FrozenFieldError,
     CodeObject,
     MethodObject,
     ClassObject,
@@ -19,6 +22,39 @@ from src.code_representation import (
     CodeRepresenter,
 )
 from src.gpt_input import GptInputCodeObject
+from src.source_store import SourceBuffer
+
+
+def create_module_with_methods(names):
+    code_representer = CodeRepresenter()
+    module_obj = ModuleObject(
+        name="testfile",
+        filename="testfile.py",
+        ast=None,
+        docstring=None,
+        code="",
+        parent_id=None,
+    )
+    code_representer.add_code_obj(module_obj)
+    methods = {}
+    for name in names:
+        methods[name] = MethodObject(
+            name=name,
+            filename="testfile.py",
+            ast=None,
+            docstring=None,
+            code="def " + name + "():\n    pass",
+            parent_id=module_obj.id,
+            arguments=None,
+            return_type=None,
+            exceptions=None,
+            outer_method_id=None,
+            outer_class_id=None,
+            module_id=module_obj.id,
+        )
+        code_representer.add_code_obj(methods[name])
+        module_obj.add_method_id(methods[name].id)
+    return code_representer, module_obj, methods
 
 
 class TestFrozenFieldSupport(unittest.TestCase):
@@ -50,16 +86,76 @@ class TestCodeObject(unittest.TestCase):
 
         self.assertTrue(hasattr(code_obj, "id") and isinstance(code_obj.id, int))
         self.assertEqual(code_obj.code_type, "code")
-        self.assertIsInstance(code_obj.called_methods, set)
-        self.assertIsInstance(code_obj.called_classes, set)
-        self.assertIsInstance(code_obj.called_by_methods, set)
-        self.assertIsInstance(code_obj.called_by_classes, set)
-        self.assertIsInstance(code_obj.called_by_modules, set)
+        self.assertEqual(code_obj.called_methods, set())
+        self.assertEqual(code_obj.called_classes, set())
+        self.assertEqual(code_obj.called_by_methods, set())
+        self.assertEqual(code_obj.called_by_classes, set())
+        self.assertEqual(code_obj.called_by_modules, set())
         self.assertFalse(code_obj.outdated)
         self.assertFalse(code_obj.is_updated)
         self.assertFalse(code_obj.send_to_gpt)
         self.assertEqual(code_obj.old_docstring, code_obj.docstring)
 
+    def test_compact_representation(self):
+        method_obj = MethodObject(
+            name="func_a",
+            filename="testfile.py",
+            ast=None,
+            docstring=None,
+            code="def func_a():\n    return 3",
+            parent_id=None,
+        )
+        self.assertFalse(hasattr(method_obj, "__dict__"))
+        with self.assertRaises(AttributeError):
+            method_obj.unknown_attribute = 1
+        self.assertFalse(hasattr(method_obj, "retry"))
+        self.assertIs(method_obj.filename, sys.intern("testfile.py"))
+        # empty edge views are shared until the first add
+        self.assertIs(method_obj.called_methods, method_obj.called_classes)
+
+        for copy in [
+            pickle.loads(pickle.dumps(method_obj)),
+            copy_module.deepcopy(method_obj),
+        ]:
+            self.assertEqual(copy.id, method_obj.id)
+            self.assertEqual(copy.code_type, "method")
+            copy.add_called_method(1)
+            copy.add_method_id(2)
+            self.assertEqual(copy.called_methods, {1})
+            self.assertEqual(copy.method_ids, {2})
+            self.assertEqual(method_obj.called_methods, set())
+            with self.assertRaises(FrozenFieldError):
+                copy.name = "func_b"
+
+    def test_code_span(self):
+        source = 'class ClassA:\n    def func_a(self):\n        """Returns 3"""\n        return 3\n'
+        tree = ast_module.parse(source)
+        code_buffer = SourceBuffer(filename="testfile.py", text=source)
+        node = tree.body[0].body[0]
+        start, end = code_buffer.get_span(node)
+        method_obj = MethodObject(
+            name="func_a",
+            filename="testfile.py",
+            ast=node,
+            docstring="Returns 3",
+            code=None,
+            parent_id=None,
+            code_buffer=code_buffer,
+            code_start=start,
+            code_end=end,
+        )
+        self.assertEqual(method_obj.code, ast_module.get_source_segment(source, node))
+        self.assertTrue(hasattr(method_obj, "code"))
+
+        unpickled_method_obj = pickle.loads(pickle.dumps(method_obj))
+        self.assertEqual(unpickled_method_obj.code, method_obj.code)
+        self.assertEqual(unpickled_method_obj, method_obj)
+
+        # assigned code replaces the span
+        method_obj.code = "def func_a(self):\n    return 4"
+        self.assertEqual(method_obj.code, "def func_a(self):\n    return 4")
+        self.assertEqual(code_buffer.text, source)
+
     def test_add_called_method(self):
         code_obj = CodeObject(
             name="func_a",
@@ -341,11 +437,11 @@ class TestMethodObject(unittest.TestCase):
         self.assertTrue(hasattr(method_obj, "id") and isinstance(method_obj.id, int))
         self.assertEqual(method_obj.code_type, "method")
         self.assertIsInstance(method_obj, MethodObject)
-        self.assertIsInstance(method_obj.called_methods, set)
-        self.assertIsInstance(method_obj.called_classes, set)
-        self.assertIsInstance(method_obj.called_by_methods, set)
-        self.assertIsInstance(method_obj.called_by_classes, set)
-        self.assertIsInstance(method_obj.called_by_modules, set)
+        self.assertEqual(method_obj.called_methods, set())
+        self.assertEqual(method_obj.called_classes, set())
+        self.assertEqual(method_obj.called_by_methods, set())
+        self.assertEqual(method_obj.called_by_classes, set())
+        self.assertEqual(method_obj.called_by_modules, set())
         self.assertFalse(method_obj.outdated)
         self.assertFalse(method_obj.is_updated)
         self.assertFalse(method_obj.send_to_gpt)
@@ -531,6 +627,262 @@ class TestCodeRepresenter(unittest.TestCase):
         with self.assertRaises(NotImplementedError):
             raise NotImplementedError
 
+    def test_symbol_index(self):
+        code = "class ClassA:\n    def func_a(self):\n        pass\n"
+        tree = ast_module.parse(code)
+        code_representer = CodeRepresenter()
+        module_obj = ModuleObject(
+            name="testfile",
+            filename="dir/../testfile.py",
+            ast=tree,
+            docstring=None,
+            code=code,
+            parent_id=None,
+        )
+        code_representer.add_code_obj(module_obj)
+        class_obj = ClassObject(
+            name="ClassA",
+            filename="testfile.py",
+            ast=tree.body[0],
+            docstring=None,
+            code=code,
+            parent_id=module_obj.id,
+            module_id=module_obj.id,
+            outer_class_id=None,
+        )
+        code_representer.add_code_obj(class_obj)
+        method_obj = MethodObject(
+            name="func_a",
+            filename="testfile.py",
+            ast=tree.body[0].body[0],
+            docstring=None,
+            code="def func_a(self):\n        pass",
+            parent_id=class_obj.id,
+            arguments=None,
+            return_type=None,
+            exceptions=None,
+            outer_method_id=None,
+            outer_class_id=class_obj.id,
+            module_id=module_obj.id,
+        )
+        code_representer.add_code_obj(method_obj)
+        # adding the same object twice does not duplicate index entries
+        code_representer.add_code_obj(method_obj)
+
+        self.assertEqual(
+            code_representer.get_by_filename_and_name(filename="testfile", name="testfile"),
+            [module_obj],
+        )
+        self.assertEqual(
+            code_representer.get_by_filename_and_name(filename="testfile.py", name="func_a"),
+            [method_obj],
+        )
+        self.assertEqual(
+            code_representer.get_by_parent_and_name(parent_id=class_obj.id, name="func_a"),
+            [method_obj],
+        )
+        self.assertEqual(
+            code_representer.get_by_parent_and_name(parent_id=module_obj.id, name="func_a"), []
+        )
+
+        code_representer.remove_code_obj(method_obj.id)
+        self.assertNotIn(method_obj.id, code_representer.objects)
+        self.assertEqual(
+            code_representer.get_by_filename_and_name(filename="testfile.py", name="func_a"), []
+        )
+        self.assertEqual(
+            code_representer.get_by_parent_and_name(parent_id=class_obj.id, name="func_a"), []
+        )
+
+    def test_outdated_propagation(self):
+        code_representer, module_obj, methods = create_module_with_methods(
+            ["func_a", "func_b", "func_c", "func_d"]
+        )
+        # func_a and func_b call each other, func_b calls func_c, func_d calls nothing
+        methods["func_a"].add_called_method(methods["func_b"].id)
+        methods["func_b"].add_called_method(methods["func_a"].id)
+        methods["func_b"].add_called_method(methods["func_c"].id)
+
+        def outdated_names():
+            return {code_representer.get(id).name for id in code_representer.get_outdated_ids()}
+
+        self.assertEqual(outdated_names(), set())
+        code_representer.set_outdated(methods["func_c"].id)
+        self.assertEqual(outdated_names(), {"func_a", "func_b", "func_c", "testfile"})
+        self.assertFalse(code_representer.depends_on_outdated_code(methods["func_c"].id))
+        self.assertTrue(code_representer.depends_on_outdated_code(methods["func_b"].id))
+
+        # updated code no longer makes the code depending on it outdated
+        code_representer.update_docstring(methods["func_c"].id, new_docstring="new docstring")
+        self.assertEqual(outdated_names(), set())
+
+        code_representer.set_outdated(methods["func_d"].id)
+        code_representer.set_outdated(methods["func_a"].id)
+        self.assertEqual(outdated_names(), {"func_a", "func_b", "func_d", "testfile"})
+        code_representer.set_updated(methods["func_d"].id)
+        self.assertEqual(outdated_names(), {"func_a", "func_b", "testfile"})
+        code_representer.set_outdated(methods["func_a"].id, outdated=False)
+        self.assertEqual(outdated_names(), set())
+
+        # the incrementally updated state matches a rebuild from scratch
+        code_representer.set_multiple_outdated([methods["func_b"].id, module_obj.id])
+        expected = outdated_names()
+        code_representer.invalidate_dependency_graph()
+        self.assertEqual(outdated_names(), expected)
+        self.assertEqual(expected, {"func_a", "func_b", "testfile"})
+
+    def test_dependency_graph(self):
+        code_representer, module_obj, methods = create_module_with_methods(
+            ["func_a", "func_b", "func_c"]
+        )
+        methods["func_a"].add_called_method(methods["func_b"].id)
+        methods["func_a"].add_called_method(methods["func_c"].id)
+        methods["func_b"].add_called_method(methods["func_c"].id)
+        code_representer.build_dependency_graph()
+        dependency_graph = code_representer.dependency_graph
+
+        def get_names(indices):
+            return {code_representer.get(dependency_graph.ids[index]).name for index in indices}
+
+        index = dependency_graph.indices[methods["func_c"].id]
+        self.assertEqual(
+            get_names(dependency_graph.get_dependents(index)), {"func_a", "func_b", "testfile"}
+        )
+        self.assertEqual(get_names(dependency_graph.get_dependencies(index)), set())
+        self.assertEqual(
+            set(dependency_graph.get_dependency_ids(methods["func_a"].id)),
+            {methods["func_b"].id, methods["func_c"].id},
+        )
+        self.assertEqual(
+            set(dependency_graph.get_dependency_ids(module_obj.id)),
+            {method_obj.id for method_obj in methods.values()},
+        )
+        self.assertEqual(dependency_graph.get_dependency_ids(12345), [])
+        # every edge is stored once in each direction
+        self.assertEqual(len(dependency_graph.targets), 6)
+        self.assertEqual(len(dependency_graph.reverse_targets), 6)
+
+    def test_dependency_graph_edges(self):
+        code_representer, module_obj, methods = create_module_with_methods(["func_a", "func_b"])
+        methods["func_a"].add_called_method(methods["func_b"].id)
+        methods["func_b"].add_caller_method(methods["func_a"].id)
+        # ids of code that is not in the CodeRepresenter
+        methods["func_a"].add_called_method(12345)
+        methods["func_b"].add_caller_module(67890)
+        code_representer.build_dependency_graph()
+
+        # the edges are only kept in the graph
+        for code_obj in code_representer.get_code_objects():
+            self.assertIsNone(code_obj.staged_edges)
+        self.assertEqual(methods["func_a"].called_methods, {methods["func_b"].id, 12345})
+        self.assertEqual(methods["func_b"].called_by_methods, {methods["func_a"].id})
+        self.assertEqual(methods["func_b"].called_by_modules, {67890})
+        self.assertEqual(module_obj.method_ids, {methods["func_a"].id, methods["func_b"].id})
+        self.assertEqual(len(code_representer.dependency_graph.targets), 5)
+
+        # edges added later are merged, and kept by the next build
+        methods["func_b"].add_called_class(54321)
+        self.assertEqual(methods["func_b"].called_classes, {54321})
+        code_representer.invalidate_dependency_graph()
+        code_representer.build_dependency_graph()
+        self.assertEqual(methods["func_a"].called_methods, {methods["func_b"].id, 12345})
+        self.assertEqual(methods["func_b"].called_by_modules, {67890})
+        self.assertEqual(methods["func_b"].called_classes, {54321})
+        # callers that are not CodeObjects are not marked as outdated
+        code_representer.set_outdated(methods["func_b"].id)
+        self.assertEqual(
+            set(code_representer.get_outdated_ids()),
+            {module_obj.id, methods["func_a"].id, methods["func_b"].id},
+        )
+
+        copy = pickle.loads(pickle.dumps(methods["func_a"]))
+        self.assertEqual(copy.called_methods, {methods["func_b"].id, 12345})
+
+    def test_generate_next_batch(self):
+        code_representer, module_obj, methods = create_module_with_methods(
+            ["func_a", "func_b", "func_c", "func_d", "func_e"]
+        )
+        # func_a calls func_b calls func_c, func_d and func_e call each other
+        methods["func_a"].add_called_method(methods["func_b"].id)
+        methods["func_b"].add_called_method(methods["func_c"].id)
+        methods["func_d"].add_called_method(methods["func_e"].id)
+        methods["func_e"].add_called_method(methods["func_d"].id)
+        code_representer.set_multiple_outdated(
+            [code_obj.id for code_obj in code_representer.get_code_objects()]
+        )
+
+        def next_batch_names():
+            return [gpt_input.name for gpt_input in code_representer.generate_next_batch()]
+
+        # the cycle is scheduled as one unit
+        self.assertEqual(next_batch_names(), ["func_c", "func_d", "func_e"])
+        self.assertEqual(next_batch_names(), [])
+        code_representer.update_docstring(methods["func_c"].id, new_docstring="new docstring")
+        self.assertEqual(next_batch_names(), ["func_b"])
+        code_representer.set_updated(methods["func_d"].id)
+        code_representer.reschedule(methods["func_e"].id)
+        self.assertEqual(next_batch_names(), ["func_e"])
+        code_representer.set_outdated(methods["func_e"].id, outdated=False)
+        code_representer.set_updated(methods["func_b"].id)
+        self.assertEqual(next_batch_names(), ["func_a"])
+        code_representer.set_updated(methods["func_a"].id)
+        self.assertEqual(next_batch_names(), ["testfile"])
+
+    def test_get_by_filename(self):
+        code_representer = CodeRepresenter()
+        module_obj = ModuleObject(
+            name="testfile",
+            filename=os.path.join("dir", "testfile.py"),
+            ast=None,
+            docstring=None,
+            code="",
+            parent_id=None,
+        )
+        code_representer.add_code_obj(module_obj)
+        other_module_obj = ModuleObject(
+            name="testfile",
+            filename=os.path.join(os.getcwd(), "other_dir", "testfile.py"),
+            ast=None,
+            docstring=None,
+            code="",
+            parent_id=None,
+        )
+        code_representer.add_code_obj(other_module_obj)
+
+        for filename in [
+            "dir/testfile.py",
+            "dir\\testfile.py",
+            "./dir/../dir/testfile",
+            os.path.join(os.getcwd(), "dir", "testfile.py"),
+        ]:
+            self.assertEqual(code_representer.get_by_filename(filename), [module_obj])
+        self.assertEqual(
+            code_representer.get_by_filename("other_dir/testfile.py"), [other_module_obj]
+        )
+        self.assertEqual(code_representer.get_by_filename("testfile.py"), [])
+
+        code_representer.remove_code_obj(module_obj.id)
+        self.assertEqual(code_representer.get_by_filename("dir/testfile.py"), [])
+
+    def test_normalize_filename_after_chdir(self):
+        import tempfile
+
+        cwd = os.getcwd()
+        self.assertEqual(
+            CodeRepresenter.normalize_filename("dir/testfile.py"),
+            os.path.normcase(os.path.join(cwd, "dir", "testfile.py")),
+        )
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            os.chdir(tmp_dir)
+            try:
+                # relative filenames are resolved against the new working directory
+                self.assertEqual(
+                    CodeRepresenter.normalize_filename("dir/testfile.py"),
+                    os.path.normcase(os.path.join(os.getcwd(), "dir", "testfile.py")),
+                )
+            finally:
+                os.chdir(cwd)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,106 @@
+import os
+import pathlib
+import sys
+
+file_path = os.path.dirname(os.path.realpath(__file__))
+project_dir = str(pathlib.Path(file_path).parent.parent.absolute())
+sys.path.append(project_dir)
+
+from src.docstring_editor import (
+    DocstringEdit,
+    apply_edits,
+    check_file_integrity,
+    get_unified_diff,
+    select_edits,
+    write_atomically,
+)
+
+SOURCE = """def func_a():
+    return 1
+
+
+def func_b():
+    return 2
+"""
+
+
+def create_edit(line: int, text: str, code_obj_id: int) -> DocstringEdit:
+    offset = sum(len(line) for line in SOURCE.splitlines(keepends=True)[:line])
+    return DocstringEdit(start=offset, end=offset, text=text, code_obj_id=code_obj_id)
+
+
+def test_apply_edits():
+    edits = [
+        create_edit(5, '    """Docstring B"""\n', 2),
+        create_edit(1, '    """Docstring A"""\n', 1),
+    ]
+    assert apply_edits(SOURCE, edits) == (
+        "def func_a():\n"
+        '    """Docstring A"""\n'
+        "    return 1\n"
+        "\n"
+        "\n"
+        "def func_b():\n"
+        '    """Docstring B"""\n'
+        "    return 2\n"
+    )
+
+
+def test_select_edits():
+    valid_edit = create_edit(1, '    """Docstring A"""\n', 1)
+    # not indented like the body
+    invalid_edit = create_edit(5, '"""Docstring B"""\n', 2)
+    accepted, rejected = select_edits(SOURCE, [valid_edit, invalid_edit])
+    assert accepted == [valid_edit]
+    assert rejected == [invalid_edit]
+
+    # the second edit for the same location is rejected
+    overlapping_edit = DocstringEdit(
+        start=valid_edit.start, end=valid_edit.start + 5, text="", code_obj_id=3
+    )
+    accepted, rejected = select_edits(SOURCE, [valid_edit, overlapping_edit])
+    assert accepted == [valid_edit]
+    assert rejected == [overlapping_edit]
+
+
+def test_write_atomically(tmp_path):
+    filename = os.path.join(tmp_path, "module.py")
+    with open(filename, mode="w") as f:
+        f.write(SOURCE)
+    os.chmod(filename, 0o755)
+    write_atomically(filename, "x = 1\n")
+    with open(filename) as f:
+        assert f.read() == "x = 1\n"
+    assert os.stat(filename).st_mode & 0o777 == 0o755
+    assert os.listdir(tmp_path) == ["module.py"]
+
+
+def test_check_file_integrity():
+    import ast
+
+    from src.fingerprint import get_ast_fingerprint
+
+    content_after = apply_edits(SOURCE, [create_edit(1, '    """Docstring A"""\n', 1)])
+    assert check_file_integrity(None, SOURCE, content_after)
+    assert check_file_integrity(get_ast_fingerprint(ast.parse(SOURCE)), None, content_after)
+    assert not check_file_integrity(None, SOURCE, content_after.replace("return 1", "return 3"))
+    assert not check_file_integrity(None, SOURCE, content_after.replace("    return 1", "return 1"))
+
+
+def test_get_unified_diff(tmp_path):
+    from git import Repo
+
+    content_after = apply_edits(SOURCE, [create_edit(4, '    """Docstring\x0cB"""\n', 2)])
+    assert get_unified_diff("module.py", SOURCE, SOURCE) == ""
+
+    # the diff applies with git, also without newline at the end of the file
+    repo = Repo.init(tmp_path)
+    for content_before in (SOURCE, SOURCE.rstrip("\n")):
+        after = content_after if content_before == SOURCE else content_after.rstrip("\n")
+        with open(tmp_path / "module.py", mode="w") as f:
+            f.write(content_before)
+        with open(tmp_path / "module.patch", mode="w") as f:
+            f.write(get_unified_diff("module.py", content_before, after))
+        repo.git.apply("module.patch")
+        with open(tmp_path / "module.py") as f:
+            assert f.read() == after
@@ -0,0 +1,82 @@
+import os
+import pathlib
+import sys
+
+file_path = os.path.dirname(os.path.realpath(__file__))
+project_dir = str(pathlib.Path(file_path).parent.parent.absolute())
+sys.path.append(project_dir)
+
+from src.docstring_locator import DocstringLocator
+from src.source_store import SourceBuffer
+
+SOURCE = '''import os
+
+
+def func_b():
+    return 1
+
+
+def func(
+    a="(",
+    b=None,
+) -> dict[str, int]:
+    # comment
+    return {}
+
+
+class ClassA:
+    """
+    Class docstring
+    """
+
+    @staticmethod
+    def func():
+        """Method docstring"""
+        return 2
+
+    class Inner:
+        def func(self):
+            pass
+
+    def func(self): return 3
+'''
+
+
+def test_docstring_locations():
+    docstring_locator = DocstringLocator(SourceBuffer("module.py", SOURCE))
+    assert docstring_locator.get(()) == (0, 0, 0)
+    assert docstring_locator.get((("func_b", 0),)) == (4, 4, 4)
+    # the docstring goes after the signature, not after the comment
+    assert docstring_locator.get((("func", 0),)) == (11, 4, 11)
+    assert docstring_locator.get((("ClassA", 0),)) == (16, 4, 19)
+    assert docstring_locator.get((("ClassA", 0), ("func", 0))) == (22, 8, 23)
+    assert docstring_locator.get((("ClassA", 0), ("Inner", 0))) == (26, 8, 26)
+    assert docstring_locator.get((("ClassA", 0), ("Inner", 0), ("func", 0))) == (27, 12, 27)
+    assert docstring_locator.get((("ClassA", 0), ("func", 1))) == (30, 8, 30)
+    assert docstring_locator.get((("missing", 0),)) is None
+
+
+def test_apply_edit():
+    buffer = SourceBuffer("module.py", SOURCE)
+    docstring_locator = DocstringLocator(buffer)
+    for path, new_docstring in [
+        ((("ClassA", 0), ("Inner", 0), ("func", 0)), '            """Inserted"""'),
+        ((("ClassA", 0),), '    """Replaced"""'),
+        ((("func", 0),), '    """\n    Inserted\n\n    :param a: a\n    """'),
+    ]:
+        start, _, end = docstring_locator.get(path)
+        lines = buffer.get_lines()
+        new_text = "".join(lines[:start]) + new_docstring + "\n" + "".join(lines[end:])
+        buffer = SourceBuffer("module.py", new_text)
+        docstring_locator.apply_edit(start, end, (new_docstring + "\n").count("\n"), buffer)
+        # the adjusted locations match those of the edited file
+        assert docstring_locator.locations == DocstringLocator(buffer).locations
+    assert docstring_locator.buffer is buffer
+
+
+def test_form_feed():
+    # a form feed is no line break for ast
+    source = "import os\n\x0c\n\n\ndef f(a,\n      b):\n    pass\n\n\nclass C:\n    x = 1\n"
+    docstring_locator = DocstringLocator(SourceBuffer("module.py", source))
+    assert docstring_locator.get((("f", 0),)) == (6, 4, 6)
+    assert docstring_locator.get((("C", 0),)) == (10, 4, 10)
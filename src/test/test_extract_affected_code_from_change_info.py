@@ -1,23 +1,121 @@
 import pathlib
 import sys
 import os
-import pytest
+import subprocess
 
 file_path = os.path.dirname(os.path.realpath(__file__))
 project_dir = str(pathlib.Path(file_path).parent.parent.absolute())
 sys.path.append(project_dir)
 
+from src.extract_affected_code_from_change_info import LineIndex, parse_diff
 
-def test_extract_methods_from_change_info():
-    # TODO
-    pass
+DIFF = """diff --git a/src/module.py b/src/module.py
+index 1111111..2222222 100644
+--- a/src/module.py
++++ b/src/module.py
+@@ -3 +3 @@ def func_a():
+-    return 1
++    return 2
+@@ -10,2 +9,0 @@ def func_b():
+-    x = 1
+-    y = 2
+@@ -20,0 +20,3 @@ def func_c():
++++ not a header
++    return 3
++
+diff --git a/removed.py b/removed.py
+deleted file mode 100644
+--- a/removed.py
++++ /dev/null
+@@ -1,2 +0,0 @@
+-def func_d():
+-    pass
+diff --git "a/sp\\303\\244ce.py" "b/sp\\303\\244ce.py"
+--- "a/sp\\303\\244ce.py"
++++ "b/sp\\303\\244ce.py"
+@@ -1 +1,2 @@
+-x = 1
++x = 2
++y = 3
+\\ No newline at end of file
+"""
 
 
-def test_extract_classes_from_change_info():
-    # TODO
-    pass
+def test_parse_diff():
+    changes = list(parse_diff(DIFF.splitlines(keepends=True)))
+    assert changes == [
+        {"filename": "src/module.py", "start": 3, "lines_changed": 1},
+        {"filename": "src/module.py", "start": 9, "lines_changed": 0},
+        {"filename": "src/module.py", "start": 20, "lines_changed": 3},
+        {"filename": "späce.py", "start": 1, "lines_changed": 2},
+    ]
 
 
-def test_extract_module_from_change_info():
-    # TODO
-    pass
+def test_parse_git_diff(tmp_path):
+    def git(*args):
+        return subprocess.run(
+            ["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+            cwd=tmp_path,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+
+    git("init", "-q")
+    with open(os.path.join(tmp_path, "module.py"), mode="w") as f:
+        f.write("".join(f"line_{index} = {index}\n" for index in range(1, 21)))
+    git("add", "module.py")
+    git("commit", "-q", "-m", "first")
+    with open(os.path.join(tmp_path, "module.py"), mode="w") as f:
+        f.write(
+            "".join(
+                f"line_{index} = {-index if index in (2, 15, 16) else index}\n"
+                for index in range(1, 21)
+            )
+        )
+    diff = git("diff", "--unified=0", "--no-color")
+    changes = list(parse_diff(diff.splitlines(keepends=True)))
+    # every hunk is kept, not only the first one of the file
+    assert changes == [
+        {"filename": "module.py", "start": 2, "lines_changed": 1},
+        {"filename": "module.py", "start": 15, "lines_changed": 2},
+    ]
+
+
+class Span:
+    def __init__(self, id, code_type, lineno, end_lineno, decorator_linenos=()):
+        self.id = id
+        self.code_type = code_type
+        self.code_buffer = None
+        self.code = "\n" * (end_lineno - 1)
+        self.ast = type(
+            "Node",
+            (),
+            {
+                "lineno": lineno,
+                "end_lineno": end_lineno,
+                "decorator_list": [
+                    type("Decorator", (), {"lineno": decorator_lineno})
+                    for decorator_lineno in decorator_linenos
+                ],
+            },
+        )
+
+
+def test_line_index():
+    line_index = LineIndex(
+        [
+            Span(1, "module", 1, 40),
+            Span(2, "class", 3, 20),
+            Span(3, "method", 5, 10, decorator_linenos=[4]),
+            Span(4, "method", 7, 9),
+            Span(5, "method", 12, 20),
+            Span(6, "method", 25, 30),
+        ]
+    )
+    assert line_index.get_ids(8, 8) == {1, 2, 3, 4}
+    assert line_index.get_ids(4, 4) == {1, 2, 3}
+    assert line_index.get_ids(11, 11) == {1, 2}
+    assert line_index.get_ids(9, 13) == {1, 2, 3, 4, 5}
+    assert line_index.get_ids(21, 40) == {1, 6}
+    assert line_index.get_ids(2, 2) == {1}
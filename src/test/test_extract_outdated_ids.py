@@ -0,0 +1,139 @@
+import logging
+import os
+import pathlib
+import sys
+
+file_path = os.path.dirname(os.path.realpath(__file__))
+project_dir = str(pathlib.Path(file_path).parent.parent.absolute())
+sys.path.append(project_dir)
+
+from src.extract_outdated_ids import extract_code_affected_by_change
+from src.get_context import CodeParser, CodeRepresenter
+from src.source_store import SourceStore
+
+CHANGED_OLD = """def func_a():
+    return 1
+
+
+def func_b():
+    return 2
+"""
+
+CHANGED_NEW = """def func_a():
+    return 3
+
+
+def func_b():
+    return 2
+"""
+
+UNCHANGED = """def func_c():
+    return 4
+"""
+
+
+def create_code_parser(tmp_path, files, sources):
+    source_store = SourceStore()
+    for filename, source in zip(files, sources):
+        source_store.add_source(filename, source)
+    return CodeParser(
+        code_representer=CodeRepresenter(),
+        working_dir=str(tmp_path),
+        debug=True,
+        files=files,
+        logger=logging.getLogger(__name__),
+        source_store=source_store,
+    )
+
+
+def test_only_changed_files_are_compared(tmp_path):
+    changed_file = os.path.join(tmp_path, "changed.py")
+    unchanged_file = os.path.join(tmp_path, "unchanged.py")
+    code_parser_new = create_code_parser(
+        tmp_path, [changed_file, unchanged_file], [CHANGED_NEW, UNCHANGED]
+    )
+    # the previous version of unchanged files is not parsed
+    code_parser_old = create_code_parser(tmp_path, [changed_file], [CHANGED_OLD])
+
+    outdated_ids = extract_code_affected_by_change(
+        code_parser_old=code_parser_old,
+        code_parser_new=code_parser_new,
+        changed_files=[changed_file],
+    )
+    outdated_names = {code_parser_new.code_representer.get(id).name for id in outdated_ids}
+    assert outdated_names == {"func_a"}
+
+    # without the changed files, code missing from the previous version counts as new
+    code_parser_old = create_code_parser(tmp_path, [changed_file], [CHANGED_OLD])
+    outdated_ids = extract_code_affected_by_change(
+        code_parser_old=code_parser_old, code_parser_new=code_parser_new
+    )
+    outdated_names = {code_parser_new.code_representer.get(id).name for id in outdated_ids}
+    assert outdated_names == {"func_a", "func_c", "unchanged"}
+
+
+CLASS_OLD = """class A:
+    value = 1
+
+    def method_a(self):
+        return 1
+
+    def method_b(self):
+        return 2
+"""
+
+CLASS_NEW = '''class A:
+    """A class"""
+
+    value = 2
+
+    def method_a(self):
+        # a comment
+
+        return 1  # another comment
+
+    def method_b(self):
+        return 2
+
+    def method_c(self):
+        return 3
+'''
+
+
+def test_structural_diff(tmp_path):
+    filename = os.path.join(tmp_path, "module.py")
+    code_parser_old = create_code_parser(tmp_path, [filename], [CLASS_OLD])
+    code_parser_new = create_code_parser(tmp_path, [filename], [CLASS_NEW])
+    old_objects = {
+        code_obj.id: (code_obj.code, set(code_obj.class_ids), set(code_obj.method_ids))
+        for code_obj in code_parser_old.code_representer.get_code_objects()
+    }
+
+    outdated_ids = extract_code_affected_by_change(
+        code_parser_old=code_parser_old,
+        code_parser_new=code_parser_new,
+        changed_files=[filename],
+    )
+    outdated_names = {code_parser_new.code_representer.get(id).name for id in outdated_ids}
+    # the class changed itself and got a new method, formatting, comments and docstrings of
+    # method_a do not count. The module only contains the unchanged class
+    assert outdated_names == {"A", "method_c"}
+    # the previous version is not modified
+    assert old_objects == {
+        code_obj.id: (code_obj.code, set(code_obj.class_ids), set(code_obj.method_ids))
+        for code_obj in code_parser_old.code_representer.get_code_objects()
+    }
+
+
+def test_removed_method_outdates_parent(tmp_path):
+    filename = os.path.join(tmp_path, "module.py")
+    source_old = CLASS_OLD
+    source_new = CLASS_OLD.replace("    def method_b(self):\n        return 2\n", "")
+    code_parser_old = create_code_parser(tmp_path, [filename], [source_old])
+    code_parser_new = create_code_parser(tmp_path, [filename], [source_new])
+
+    outdated_ids = extract_code_affected_by_change(
+        code_parser_old=code_parser_old, code_parser_new=code_parser_new
+    )
+    outdated_names = {code_parser_new.code_representer.get(id).name for id in outdated_ids}
+    assert outdated_names == {"A"}
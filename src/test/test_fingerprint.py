@@ -0,0 +1,69 @@
+import os
+import pathlib
+import sys
+
+file_path = os.path.dirname(os.path.realpath(__file__))
+project_dir = str(pathlib.Path(file_path).parent.parent.absolute())
+sys.path.append(project_dir)
+
+from src import fingerprint
+from src.fingerprint import get_ast_fingerprint, get_fingerprint
+
+CODE = """def func(a, b):
+    return a + b
+"""
+
+CODE_WITH_DOCSTRING = '''def func(a, b):
+    """
+    Add two numbers
+
+    :param a: first number
+    :type a: int
+    """
+    # comment
+    return a + b  # another comment
+'''
+
+CHANGED_CODE = '''def func(a, b):
+    """Add two numbers"""
+    return a - b
+'''
+
+
+def test_docstrings_and_comments_are_ignored():
+    assert get_fingerprint(CODE) == get_fingerprint(CODE_WITH_DOCSTRING)
+    assert get_fingerprint(CODE) != get_fingerprint(CHANGED_CODE)
+    # indentation is part of the code
+    assert get_fingerprint("if a:\n    b()\nc()\n") != get_fingerprint("if a:\n    b()\n    c()\n")
+    # a string that is used is not a docstring
+    assert get_fingerprint("x = 'a'\n") != get_fingerprint("x = 'b'\n")
+
+
+def test_invalid_code():
+    assert get_fingerprint("def func(:\n    (\n") != get_fingerprint("def func(:\n    [\n")
+
+
+def test_fingerprints_are_cached():
+    fingerprint.clear()
+    fingerprint_before = get_fingerprint(CODE)
+    assert len(fingerprint.fingerprints) == 1
+    assert get_fingerprint(CODE) == fingerprint_before
+    assert len(fingerprint.fingerprints) == 1
+
+
+def test_ast_fingerprint():
+    import ast
+
+    assert get_ast_fingerprint(ast.parse(CODE)) == get_ast_fingerprint(
+        ast.parse(CODE_WITH_DOCSTRING)
+    )
+    assert get_ast_fingerprint(ast.parse(CODE)) != get_ast_fingerprint(ast.parse(CHANGED_CODE))
+    # only docstrings are left out
+    assert get_ast_fingerprint(ast.parse("x = 1\n'a'\n")) != get_ast_fingerprint(
+        ast.parse("x = 1\n'b'\n")
+    )
+    # the tree is not modified
+    tree = ast.parse(CODE_WITH_DOCSTRING)
+    dump = ast.dump(tree)
+    get_ast_fingerprint(tree)
+    assert ast.dump(tree) == dump
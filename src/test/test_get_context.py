@@ -1,4 +1,7 @@
+import ast
 import pathlib
+import shutil
+import subprocess
 import sys
 import os
 import logging
@@ -43,6 +46,250 @@ def code_parser():
     return code_parser
 
 
+@pytest.fixture
+def test_data_files():
+    working_dir = os.path.join(project_dir, "src/test/test_data")
+    files = [
+        os.path.join(working_dir, "src/main.py"),
+        os.path.join(working_dir, "src/second_file.py"),
+        os.path.join(working_dir, "src/third_file.py"),
+        os.path.join(working_dir, "src/fourth_file.py"),
+    ]
+    return working_dir, files
+
+
+def summarize_code_objects(code_parser):
+    summary = set()
+    for code_obj in code_parser.code_representer.objects.values():
+        summary.add(
+            (
+                code_obj.code_type,
+                code_obj.name,
+                code_obj.filename,
+                code_obj.code,
+                str(getattr(code_obj, "arguments", None)),
+                str(sorted(getattr(code_obj, "exceptions", None) or [])),
+                str(getattr(code_obj, "instance_attributes", None)),
+            )
+        )
+    return summary
+
+
+def test_parallel_parsing(test_data_files):
+    # use the CodeRepresenter imported by get_context, so isinstance checks in the representer match
+    from src.get_context import CodeRepresenter
+
+    working_dir, files = test_data_files
+    logger = logging.getLogger(__name__)
+    serial_code_parser = CodeParser(
+        code_representer=CodeRepresenter(),
+        working_dir=working_dir,
+        debug=True,
+        files=files,
+        logger=logger,
+    )
+    serial_code_parser.extract_args_and_return_type()
+    serial_code_parser.extract_exceptions()
+    serial_code_parser.check_return_type()
+    serial_code_parser.extract_attributes()
+
+    parallel_code_parser = CodeParser(
+        code_representer=CodeRepresenter(),
+        working_dir=working_dir,
+        debug=True,
+        files=files,
+        logger=logger,
+        workers=2,
+    )
+    # already extracted by the workers, must not add arguments twice
+    parallel_code_parser.extract_args_and_return_type()
+
+    assert summarize_code_objects(serial_code_parser) == summarize_code_objects(
+        parallel_code_parser
+    )
+    assert serial_code_parser.import_finder.imports == parallel_code_parser.import_finder.imports
+
+
+def summarize_calls(code_parser):
+    code_representer = code_parser.code_representer
+    return {
+        (code_obj.filename, code_obj.name, code_representer.get(called_id).name)
+        for code_obj in code_representer.objects.values()
+        for called_id in [*code_obj.called_methods, *code_obj.called_classes]
+    }
+
+
+def test_parse_cache(test_data_files, tmp_path):
+    from src.get_context import CodeRepresenter, ParseCache
+
+    working_dir, files = test_data_files
+    logger = logging.getLogger(__name__)
+    code_parsers = []
+    parse_cache = ParseCache(cache_dir=str(tmp_path))
+    for _ in range(2):
+        code_parser = CodeParser(
+            code_representer=CodeRepresenter(),
+            working_dir=working_dir,
+            debug=True,
+            files=files,
+            logger=logger,
+            parse_cache=parse_cache,
+        )
+        code_parser.extract_class_and_method_calls()
+        code_parser.extract_args_and_return_type()
+        code_parsers.append(code_parser)
+    assert parse_cache.misses == len(files)
+    assert parse_cache.hits == len(files)
+
+    uncached_code_parser = CodeParser(
+        code_representer=CodeRepresenter(),
+        working_dir=working_dir,
+        debug=True,
+        files=files,
+        logger=logger,
+    )
+    uncached_code_parser.extract_class_and_method_calls()
+    for code_parser in code_parsers:
+        assert summarize_code_objects(code_parser) == summarize_code_objects(uncached_code_parser)
+        assert summarize_calls(code_parser) == summarize_calls(uncached_code_parser)
+        assert code_parser.import_finder.imports == uncached_code_parser.import_finder.imports
+
+
+def test_release_asts(test_data_files):
+    from src.get_context import CodeRepresenter
+
+    working_dir, files = test_data_files
+    code_parsers = []
+    for _ in range(2):
+        code_parsers.append(
+            CodeParser(
+                code_representer=CodeRepresenter(),
+                working_dir=working_dir,
+                debug=True,
+                files=files,
+                logger=logging.getLogger(__name__),
+            )
+        )
+    code_parser, released_code_parser = code_parsers
+    code_parser.extract_class_and_method_calls()
+    released_code_parser.release_asts()
+    assert released_code_parser.module_trees == {}
+    for code_obj in released_code_parser.code_representer.objects.values():
+        with pytest.raises(AttributeError):
+            # bypasses __getattr__, which parses the ast again
+            object.__getattribute__(code_obj, "ast")
+
+    # calls are resolved without the asts kept from parsing
+    released_code_parser.extract_class_and_method_calls()
+    assert summarize_calls(released_code_parser) == summarize_calls(code_parser)
+
+    # asts are parsed again on access
+    for code_obj in code_parser.code_representer.objects.values():
+        released_code_obj = released_code_parser.code_representer.get(code_obj.id)
+        assert ast.dump(released_code_obj.ast, include_attributes=True) == ast.dump(
+            code_obj.ast, include_attributes=True
+        )
+
+
+def summarize_ids(code_parser):
+    code_representer = code_parser.code_representer
+    return {
+        (
+            os.path.relpath(code_obj.filename, code_parser.working_dir),
+            code_obj.name,
+            code_obj.id,
+            code_obj.parent_id,
+        )
+        for code_obj in code_representer.objects.values()
+    }
+
+
+def test_stable_ids(test_data_files, tmp_path):
+    from src.get_context import CodeRepresenter
+
+    working_dir, files = test_data_files
+    code_parser = CodeParser(
+        code_representer=CodeRepresenter(),
+        working_dir=working_dir,
+        debug=True,
+        files=files,
+        logger=logging.getLogger(__name__),
+    )
+
+    # ids do not depend on the hash seed of the process
+    script = (
+        "import logging, sys\n"
+        "sys.path.append(sys.argv[1])\n"
+        "sys.path.append(sys.argv[1] + '/src')\n"
+        "from src.get_context import CodeParser, CodeRepresenter\n"
+        "code_parser = CodeParser(code_representer=CodeRepresenter(), working_dir=sys.argv[2],"
+        " debug=True, files=sys.argv[3:], logger=logging.getLogger())\n"
+        "print(sorted(code_parser.code_representer.objects.keys()))\n"
+    )
+    for seed in ["1", "2"]:
+        result = subprocess.run(
+            [sys.executable, "-c", script, project_dir, working_dir, *files],
+            env={**os.environ, "PYTHONHASHSEED": seed},
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        assert result.stdout.strip() == str(sorted(code_parser.code_representer.objects.keys()))
+
+    # nor on the location of the repository
+    copied_working_dir = os.path.join(tmp_path, "repo")
+    shutil.copytree(working_dir, copied_working_dir)
+    copied_code_parser = CodeParser(
+        code_representer=CodeRepresenter(),
+        working_dir=copied_working_dir,
+        debug=True,
+        files=[os.path.join(copied_working_dir, os.path.relpath(f, working_dir)) for f in files],
+        logger=logging.getLogger(__name__),
+    )
+    assert summarize_ids(code_parser) == summarize_ids(copied_code_parser)
+
+
+def test_stable_ids_of_same_named_methods(tmp_path):
+    from src.get_context import CodeRepresenter
+
+    filename = os.path.join(tmp_path, "testfile.py")
+    with open(filename, mode="w") as f:
+        f.write(
+            "class ClassA:\n"
+            "    @property\n"
+            "    def value(self):\n"
+            "        return self._value\n"
+            "\n"
+            "    @value.setter\n"
+            "    def value(self, value):\n"
+            "        self._value = value\n"
+        )
+    code_parser = CodeParser(
+        code_representer=CodeRepresenter(),
+        working_dir=str(tmp_path),
+        debug=True,
+        files=[filename],
+        logger=logging.getLogger(__name__),
+    )
+    code_representer = code_parser.code_representer
+    getter, setter = code_representer.get_by_filename_and_name(filename=filename, name="value")
+    assert getter.id != setter.id
+
+    # changed code keeps its id
+    with open(filename, mode="a") as f:
+        f.write("        print(value)\n")
+    changed_code_parser = CodeParser(
+        code_representer=CodeRepresenter(),
+        working_dir=str(tmp_path),
+        debug=True,
+        files=[filename],
+        logger=logging.getLogger(__name__),
+    )
+    changed_setter = changed_code_parser.code_representer.get(setter.id)
+    assert changed_setter.code != setter.code
+    assert changed_code_parser.code_representer.get(getter.id).code == getter.code
+
+
 def test_init():
     pass
     # TODO
@@ -63,9 +310,50 @@ def test_extract_sub_classes_and_methods():
     # TODO
 
 
-def test_extract_class_and_method_calls():
-    pass
-    # TODO
+def test_extract_class_and_method_calls(tmp_path):
+    filename = os.path.join(tmp_path, "testfile.py")
+    with open(filename, mode="w") as f:
+        f.write(
+            "def decorator(func):\n"
+            "    return func\n"
+            "\n"
+            "\n"
+            "def helper():\n"
+            "    return 1\n"
+            "\n"
+            "\n"
+            "class ClassA:\n"
+            "    def method_a(self):\n"
+            "        return helper()\n"
+            "\n"
+            "    @decorator\n"
+            "    def method_b(self):\n"
+            "        def inner():\n"
+            "            return helper()\n"
+            "\n"
+            "        return inner()\n"
+        )
+    code_parser = CodeParser(
+        code_representer=CodeRepresenter(),
+        working_dir=str(tmp_path),
+        debug=True,
+        files=[filename],
+        logger=logging.getLogger(__name__),
+    )
+    code_parser.extract_class_and_method_calls()
+
+    def get(name):
+        code_representer = code_parser.code_representer
+        return code_representer.get_by_filename_and_name(filename=filename, name=name)[0]
+
+    # calls are attributed to the innermost code object, decorators are not part of the code
+    assert get("testfile").called_methods == set()
+    assert get("ClassA").called_methods == set()
+    assert get("method_a").called_methods == {get("helper").id}
+    assert get("method_b").called_methods == {get("inner").id}
+    assert get("inner").called_methods == {get("helper").id}
+    assert get("helper").called_by_methods == {get("method_a").id, get("inner").id}
+    assert get("decorator").called_by_methods == set()
 
 
 def test_resolve_variable():
@@ -93,9 +381,65 @@ def test_extract_attributes():
     # TODO
 
 
-def test_set_code_affected_by_changes_to_outdated():
-    pass
-    # TODO
+def test_set_code_affected_by_changes_to_outdated(tmp_path):
+    filename = os.path.join(tmp_path, "testfile.py")
+    with open(filename, mode="w") as f:
+        f.write(
+            "class ClassA:\n"  # 1
+            "    def method_a(self):\n"
+            "        return 1\n"
+            "\n"
+            "    @staticmethod\n"  # 5
+            "    def method_b():\n"
+            "        def inner():\n"
+            "            return 2\n"
+            "\n"
+            "        return inner()\n"  # 10
+            "\n"
+            "\n"
+            "def func_c():\n"
+            "    return 3\n"
+        )
+    code_parser = CodeParser(
+        code_representer=CodeRepresenter(),
+        working_dir=str(tmp_path),
+        debug=True,
+        files=[filename],
+        logger=logging.getLogger(__name__),
+    )
+    code_representer = code_parser.code_representer
+
+    def get_outdated_names():
+        return {
+            code_obj.name for code_obj in code_representer.get_code_objects() if code_obj.outdated
+        }
+
+    # nested function and the code enclosing it
+    code_parser.set_code_affected_by_changes_to_outdated(
+        [{"filename": filename, "start": 8, "lines_changed": 1}]
+    )
+    assert get_outdated_names() == {"testfile", "ClassA", "method_b", "inner"}
+
+    # a decorator belongs to the decorated method, every hunk counts
+    code_representer.set_multiple_outdated(
+        [code_obj.id for code_obj in code_representer.get_code_objects()], outdated=False
+    )
+    code_parser.set_code_affected_by_changes_to_outdated(
+        [
+            {"filename": filename, "start": 5, "lines_changed": 1},
+            {"filename": filename, "start": 14, "lines_changed": 1},
+        ]
+    )
+    assert get_outdated_names() == {"testfile", "ClassA", "method_b", "func_c"}
+
+    # lines removed between definitions only affect the module
+    code_representer.set_multiple_outdated(
+        [code_obj.id for code_obj in code_representer.get_code_objects()], outdated=False
+    )
+    code_parser.set_code_affected_by_changes_to_outdated(
+        [{"filename": filename, "start": 11, "lines_changed": 0}]
+    )
+    assert get_outdated_names() == {"testfile"}
 
 
 def test_extract_dev_comments():
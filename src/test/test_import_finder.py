@@ -1,6 +1,8 @@
+import logging
 import pathlib
 import sys
 import os
+import tempfile
 import unittest
 import pytest
 
@@ -8,6 +10,35 @@ file_path = os.path.dirname(os.path.realpath(__file__))
 project_dir = str(pathlib.Path(file_path).parent.parent.absolute())
 sys.path.append(project_dir)
 
+from src.get_context import CodeParser, CodeRepresenter
+
+
+FILES = {
+    "src/main.py": "import pkg.module\nfrom pkg import func_b\n",
+    "src/pkg/__init__.py": "def func_b():\n    pass\n",
+    "src/pkg/module.py": "def func_a():\n    pass\n",
+    "src/pkg/sub/relative.py": "from ..module import func_a\nfrom . import helper\n",
+    "src/pkg/sub/helper.py": "def func_c():\n    pass\n",
+    "tests/module.py": "def func_a():\n    pass\n",
+}
+
+
+def create_code_parser(working_dir):
+    files = []
+    for filename, content in FILES.items():
+        filename = os.path.join(working_dir, filename)
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        with open(filename, mode="w") as f:
+            f.write(content)
+        files.append(filename)
+    return CodeParser(
+        code_representer=CodeRepresenter(),
+        working_dir=working_dir,
+        debug=True,
+        files=files,
+        logger=logging.getLogger(__name__),
+    )
+
 
 class TestImportFinder(unittest.TestCase):
     def test_init(self):
@@ -19,9 +50,69 @@ class TestImportFinder(unittest.TestCase):
         # TODO
 
     def test_resolve_external_call(self):
-        pass
-        # TODO
+        with tempfile.TemporaryDirectory() as working_dir:
+            code_parser = create_code_parser(working_dir)
+            import_finder = code_parser.import_finder
+            code_representer = code_parser.code_representer
+            main_file = os.path.join(working_dir, "src/main.py")
+
+            matches = import_finder.resolve_external_call("func_b", main_file, code_representer)
+            self.assertEqual(
+                [(match.name, match.filename) for match in matches],
+                [("func_b", os.path.join(working_dir, "src/pkg/__init__.py"))],
+            )
+            self.assertIn((main_file, "func_b"), import_finder.call_cache)
+            self.assertIsNone(
+                import_finder.resolve_external_call("print", main_file, code_representer)
+            )
+
+            # the memoized result is not affected by callers changing the returned list
+            matches.clear()
+            matches = import_finder.resolve_external_call("func_b", main_file, code_representer)
+            self.assertEqual(len(matches), 1)
 
     def test_resolve_import_to_file(self):
-        pass
-        # TODO
+        with tempfile.TemporaryDirectory() as working_dir:
+            code_parser = create_code_parser(working_dir)
+            import_finder = code_parser.import_finder
+            code_representer = code_parser.code_representer
+
+            def resolve(import_statement, source_file, name):
+                return [
+                    os.path.relpath(match.filename, working_dir)
+                    for match in import_finder.resolve_import_to_file(
+                        import_statement=import_statement,
+                        source_file=os.path.join(working_dir, source_file),
+                        code_representer=code_representer,
+                        name=name,
+                    )
+                ]
+
+            # imports are relative to a directory containing the importing file
+            self.assertEqual(
+                resolve("pkg.module", "src/main.py", "func_a"),
+                [os.path.join("src", "pkg", "module.py")],
+            )
+            self.assertEqual(
+                resolve("module.func_a", "tests/module.py", "func_a"),
+                [os.path.join("tests", "module.py")],
+            )
+            # packages resolve to their __init__ file
+            self.assertEqual(
+                resolve("pkg.func_b", "src/main.py", "func_b"),
+                [os.path.join("src", "pkg", "__init__.py")],
+            )
+            # relative imports are anchored at the package of the importing file
+            self.assertEqual(
+                import_finder.imports[os.path.join(working_dir, "src/pkg/sub/relative.py")],
+                ["..module.func_a", ".helper"],
+            )
+            self.assertEqual(
+                resolve("..module.func_a", "src/pkg/sub/relative.py", "func_a"),
+                [os.path.join("src", "pkg", "module.py")],
+            )
+            self.assertEqual(
+                resolve(".helper", "src/pkg/sub/relative.py", "func_c"),
+                [os.path.join("src", "pkg", "sub", "helper.py")],
+            )
+            self.assertEqual(resolve("missing.func_a", "src/main.py", "func_a"), [])
@@ -0,0 +1,40 @@
+import logging
+import os
+import pathlib
+import sys
+import tracemalloc
+
+file_path = os.path.dirname(os.path.realpath(__file__))
+project_dir = str(pathlib.Path(file_path).parent.parent.absolute())
+sys.path.append(project_dir)
+
+from src.memory_report import MemoryReport
+
+
+def test_memory_report(caplog):
+    caplog.set_level(logging.INFO)
+    memory_report = MemoryReport(logger=logging.getLogger(__name__))
+    try:
+        data = [bytearray(2**20) for _ in range(4)]
+        memory_report.stage("allocating")
+        del data
+        memory_report.stage("freeing")
+    finally:
+        memory_report.stop()
+
+    assert [stage[0] for stage in memory_report.stages] == ["allocating", "freeing"]
+    (_, allocated_current, allocated_peak), (_, freed_current, freed_peak) = memory_report.stages
+    assert allocated_peak >= allocated_current >= 4 * 2**20
+    assert freed_current < allocated_current - 3 * 2**20
+    # the peak is reset for each stage
+    assert freed_peak < allocated_peak + 2**20
+    assert "Memory after allocating" in caplog.text
+    assert not tracemalloc.is_tracing()
+
+
+def test_memory_report_disabled():
+    memory_report = MemoryReport(logger=logging.getLogger(__name__), enabled=False)
+    memory_report.stage("parsing")
+    memory_report.stop()
+    assert memory_report.stages == []
+    assert not tracemalloc.is_tracing()
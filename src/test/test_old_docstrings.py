@@ -0,0 +1,92 @@
+import logging
+import os
+import pathlib
+import sys
+
+file_path = os.path.dirname(os.path.realpath(__file__))
+project_dir = str(pathlib.Path(file_path).parent.parent.absolute())
+sys.path.append(project_dir)
+
+from src.get_context import CodeParser, CodeRepresenter
+from src.old_docstrings import OldDocstringIndex
+from src.source_store import SourceStore
+
+SOURCE = '''"""Module docstring"""
+
+
+def func():
+    """
+    Function docstring
+    """
+    return 1
+
+
+class ClassA:
+    """Class docstring"""
+
+    def func(self):
+        return 2
+
+    def func(self):
+        """Redefined method"""
+        return 3
+'''
+
+
+class CountingSourceStore(SourceStore):
+    def __init__(self):
+        super().__init__()
+        self.reads = 0
+
+    def get_source(self, filename):
+        self.reads += 1
+        return super().get_source(filename)
+
+
+def test_docstrings_from_file(tmp_path):
+    filename = os.path.join(tmp_path, "module.py")
+    source_store = CountingSourceStore()
+    source_store.add_source(filename, SOURCE)
+    old_docstrings = OldDocstringIndex(source_store=source_store)
+
+    assert old_docstrings.get(filename, ()) == "Module docstring"
+    assert old_docstrings.get(filename, (("func", 0),)) == "Function docstring"
+    assert old_docstrings.get(filename, (("ClassA", 0),)) == "Class docstring"
+    assert old_docstrings.get(filename, (("ClassA", 0), ("func", 0))) == ""
+    assert old_docstrings.get(filename, (("ClassA", 0), ("func", 1))) == "Redefined method"
+    # new code
+    assert old_docstrings.get(filename, (("func_b", 0),)) is None
+    # the file is only read once
+    assert source_store.reads == 1
+
+
+def test_missing_file(tmp_path):
+    old_docstrings = OldDocstringIndex(source_store=SourceStore())
+    filename = os.path.join(tmp_path, "missing.py")
+
+    assert not old_docstrings.has_file(filename)
+    assert old_docstrings.get(filename, ()) is None
+
+
+def test_docstrings_from_code_objects(tmp_path):
+    filename = os.path.join(tmp_path, "module.py")
+    source_store = SourceStore()
+    source_store.add_source(filename, SOURCE)
+    code_parser = CodeParser(
+        code_representer=CodeRepresenter(),
+        working_dir=str(tmp_path),
+        debug=True,
+        files=[filename],
+        logger=logging.getLogger(__name__),
+        source_store=source_store,
+    )
+    from_file = OldDocstringIndex(source_store=source_store)
+    from_file.add_file(filename)
+    counting_source_store = CountingSourceStore()
+    from_code_objects = OldDocstringIndex(source_store=counting_source_store)
+    from_code_objects.add_code_objects(code_parser.code_representer)
+
+    assert from_code_objects.has_file(filename)
+    assert from_code_objects.docstrings == from_file.docstrings
+    # parsed files are not read again
+    assert counting_source_store.reads == 0
@@ -0,0 +1,59 @@
+import ast
+import os
+import pathlib
+import sys
+
+file_path = os.path.dirname(os.path.realpath(__file__))
+project_dir = str(pathlib.Path(file_path).parent.parent.absolute())
+sys.path.append(project_dir)
+
+from src.parse_cache import ParseCache
+
+
+def test_get_key():
+    assert ParseCache.get_key("1", "testfile.py", "x = 1") == ParseCache.get_key(
+        "1", "testfile.py", "x = 1"
+    )
+    assert ParseCache.get_key("1", "testfile.py", "x = 1") != ParseCache.get_key(
+        "2", "testfile.py", "x = 1"
+    )
+    # parts are length prefixed, so moving characters between parts changes the key
+    assert ParseCache.get_key("ab", "c") != ParseCache.get_key("a", "bc")
+
+
+def test_store_and_load(tmp_path):
+    parse_cache = ParseCache(cache_dir=str(tmp_path))
+    key = ParseCache.get_key("testfile.py", "x = 1")
+    assert parse_cache.load(key) is None
+    assert parse_cache.misses == 1
+
+    tree = ast.parse("x = 1")
+    parse_cache.store(key, {"name": "testfile", "ast": tree, "nodes": [tree.body[0]]})
+    # ast nodes are not cached
+    assert parse_cache.load(key) == {"name": "testfile", "ast": None, "nodes": [None]}
+    assert parse_cache.hits == 1
+
+
+def test_unreadable_entry_is_ignored(tmp_path):
+    parse_cache = ParseCache(cache_dir=str(tmp_path))
+    key = ParseCache.get_key("testfile.py", "x = 1")
+    parse_cache.store(key, "value")
+    with open(parse_cache.get_path(key), mode="wb") as f:
+        f.write(b"not a pickle")
+    assert parse_cache.load(key) is None
+    assert not os.path.exists(parse_cache.get_path(key))
+
+
+def test_evict_least_recently_used(tmp_path):
+    parse_cache = ParseCache(cache_dir=str(tmp_path))
+    keys = [ParseCache.get_key(str(i)) for i in range(3)]
+    for i, key in enumerate(keys):
+        parse_cache.store(key, "x" * 1000)
+        os.utime(parse_cache.get_path(key), (i, i))
+    # loading marks an entry as recently used
+    parse_cache.load(keys[0])
+    parse_cache.max_size = 2 * os.path.getsize(parse_cache.get_path(keys[0]))
+    parse_cache.evict()
+    assert os.path.exists(parse_cache.get_path(keys[0]))
+    assert not os.path.exists(parse_cache.get_path(keys[1]))
+    assert os.path.exists(parse_cache.get_path(keys[2]))
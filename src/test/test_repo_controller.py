@@ -1,13 +1,168 @@
+import json
+import logging
 import pathlib
 import sys
 import os
 import unittest
 import pytest
+from git import Repo
 
 file_path = os.path.dirname(os.path.realpath(__file__))
 project_dir = str(pathlib.Path(file_path).parent.parent.absolute())
 sys.path.append(project_dir)
 
+from src.repo_controller import RepoController
+
+
+def commit_files(repo, files: dict[str, str], message: str) -> str:
+    for path, content in files.items():
+        full_path = os.path.join(repo.working_tree_dir, path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, mode="w") as f:
+            f.write(content)
+    repo.index.add(list(files))
+    return repo.index.commit(message).hexsha
+
+
+@pytest.fixture
+def remote_repo(tmp_path):
+    """
+    Bare repository with a commit the tool ran for, a change to one python file and a change to
+    a file that is not python. Returns the file url, the bare repository and the commit hashes
+    """
+    source = Repo.init(tmp_path / "source", initial_branch="main")
+    latest_commit = commit_files(
+        source,
+        {
+            "pkg/changed.py": "def func():\n    pass\n",
+            "pkg/unchanged.py": "def other():\n    pass\n",
+            "README.md": "readme\n",
+        },
+        "initial",
+    )
+    commit_files(source, {"latest_commit.autopydoc": latest_commit}, "tool run")
+    commit_files(source, {"pkg/changed.py": "def func():\n    return 1\n"}, "change")
+    commit_files(source, {"README.md": "changed readme\n"}, "readme")
+    bare = Repo.clone_from(
+        str(tmp_path / "source"), str(tmp_path / "remote" / "project.git"), bare=True
+    )
+    with bare.config_writer() as config:
+        config.set_value("uploadpack", "allowFilter", "true")
+    url = (tmp_path / "remote" / "project.git").as_uri()
+    return url, source, latest_commit
+
+
+def create_repo_controller(url, **kwargs):
+    return RepoController(
+        repo_path=url, logger=logging.getLogger(__name__), username="user", **kwargs
+    )
+
+
+def get_missing_objects(repo, commit):
+    objects = repo.git.rev_list("--objects", "--missing=print", commit).split("\n")
+    return {line[1:] for line in objects if line.startswith("?")}
+
+
+def test_partial_clone(remote_repo, tmp_path, monkeypatch):
+    url, _, latest_commit = remote_repo
+    monkeypatch.chdir(tmp_path)
+    repo_controller = create_repo_controller(url, partial_clone=True)
+    repo = repo_controller.repo
+    working_dir = repo_controller.working_dir
+
+    assert repo_controller.repo_name == "project"
+    assert repo_controller.latest_commit_hash == latest_commit
+    assert repo.git.rev_parse("--is-shallow-repository") == "true"
+    # only python files are checked out
+    assert os.path.isfile(os.path.join(working_dir, "pkg", "changed.py"))
+    assert os.path.isfile(os.path.join(working_dir, "pkg", "unchanged.py"))
+    assert not os.path.exists(os.path.join(working_dir, "README.md"))
+    # the previous version of the changed file was fetched, files that are not python were not
+    missing = get_missing_objects(repo, latest_commit)
+    assert repo.git.rev_parse(f"{latest_commit}:pkg/changed.py") not in missing
+    assert repo.git.rev_parse(f"{latest_commit}:README.md") in missing
+    assert repo_controller.get_changed_files() == [os.path.join(working_dir, "pkg", "changed.py")]
+    assert (
+        repo_controller.old_source_store.get_source(os.path.join(working_dir, "pkg", "changed.py"))
+        == "def func():\n    pass\n"
+    )
+
+
+def test_clone_from_mirror(remote_repo, tmp_path, monkeypatch):
+    url, source, latest_commit = remote_repo
+    mirror_dir = str(tmp_path / "mirror")
+    monkeypatch.chdir(tmp_path)
+    create_repo_controller(url, partial_clone=True, mirror_dir=mirror_dir)
+
+    # the mirror is updated on the next run
+    new_commit = commit_files(source, {"pkg/new.py": "x = 1\n"}, "new file")
+    source.git.push(str(tmp_path / "remote" / "project.git"), "main")
+    os.makedirs(tmp_path / "second_run")
+    monkeypatch.chdir(tmp_path / "second_run")
+    repo_controller = create_repo_controller(url, partial_clone=True, mirror_dir=mirror_dir)
+
+    assert repo_controller.current_commit == new_commit
+    assert repo_controller.latest_commit_hash == latest_commit
+    assert Repo(mirror_dir).git.rev_parse("main") == new_commit
+    assert os.path.isfile(os.path.join(repo_controller.working_dir, "pkg", "new.py"))
+    # fetches go to the mirror, pushes to the remote repository
+    origin = repo_controller.repo.remotes.origin
+    assert origin.url == pathlib.Path(mirror_dir).resolve().as_uri()
+    assert repo_controller.repo.git.remote("get-url", "--push", "origin") == url
+    assert repo_controller.repo_name == "project"
+
+
+def test_write_patch(tmp_path):
+    repo = Repo.init(tmp_path / "project", initial_branch="main")
+    commit = commit_files(repo, {"module.py": "def func():\n    pass\n"}, "initial")
+    patch_dir = str(tmp_path / "patch")
+    repo_controller = create_repo_controller(str(tmp_path / "project"), patch_dir=patch_dir)
+    repo_controller.pr_notes.append("note")
+    filename = os.path.join(repo_controller.working_dir, "module.py")
+    repo_controller.original_buffers[filename] = (
+        filename,
+        repo_controller.source_store.get_buffer(filename),
+    )
+    new_content = 'def func():\n    """Docstring"""\n    pass\n'
+    with open(filename, mode="w") as f:
+        f.write(new_content)
+    repo_controller.source_store.add_source(filename, new_content)
+
+    repo_controller.apply_changes(changed_files=[filename])
+
+    # nothing was committed
+    assert repo.head.commit.hexsha == commit
+    assert [head.name for head in repo.heads] == ["main"]
+    assert repo.is_dirty()
+    # the patch undoes the edit
+    repo.git.apply("--reverse", os.path.join(patch_dir, "autopydoc.patch"))
+    assert not repo.is_dirty()
+    with open(os.path.join(patch_dir, "autopydoc.json")) as f:
+        summary = json.load(f)
+    assert summary["notes"] == ["note"]
+    assert summary["commit"] == commit
+    assert summary["edited_files"] == ["module.py"]
+    assert "note" in summary["description"]
+
+
+def test_get_changes_ignores_diff_prefix_config(tmp_path):
+    repo = Repo.init(tmp_path / "project", initial_branch="main")
+    latest_commit = commit_files(repo, {"pkg/module.py": "x = 1\n"}, "initial")
+    commit_files(repo, {"latest_commit.autopydoc": latest_commit}, "tool run")
+    commit_files(repo, {"pkg/module.py": "x = 1\ny = 2\n"}, "change")
+    with repo.config_writer() as config:
+        config.set_value("diff", "noprefix", "true")
+        config.set_value("diff", "mnemonicPrefix", "true")
+    repo_controller = create_repo_controller(str(tmp_path / "project"))
+
+    assert repo_controller.get_changes() == [
+        {
+            "filename": os.path.join(repo_controller.working_dir, "pkg", "module.py"),
+            "start": 2,
+            "lines_changed": 1,
+        }
+    ]
+
 
 class TestRepoController(unittest.TestCase):
     def test_init(self):
@@ -26,10 +181,6 @@ class TestRepoController(unittest.TestCase):
         pass
         # TODO
 
-    def test_pull_repo(self):
-        pass
-        # TODO
-
     def test_get_changes(self):
         pass
         # TODO
@@ -38,18 +189,10 @@ class TestRepoController(unittest.TestCase):
         pass
         # TODO
 
-    def test_save_file_for_comparison(self):
-        pass
-        # TODO
-
     def test_insert_docstring(self):
         pass
         # TODO
 
-    def test_remove_comments(self):
-        pass
-        # TODO
-
     def test_validate_code_integrity(self):
         pass
         # TODO
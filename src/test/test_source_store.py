@@ -0,0 +1,83 @@
+import ast
+import os
+import pathlib
+import sys
+
+import pytest
+from git import Actor, Repo
+
+file_path = os.path.dirname(os.path.realpath(__file__))
+project_dir = str(pathlib.Path(file_path).parent.parent.absolute())
+sys.path.append(project_dir)
+
+from src.source_store import GitSourceStore, SourceBuffer, SourceStore
+
+CODE = 'class ClassA:\n    def func_a(self):\n        """äöü"""\n        return "ß"\n\n\nx = ClassA()\n'
+
+
+def test_get_segment_matches_ast():
+    buffer = SourceBuffer(filename="testfile.py", text=CODE)
+    tree = ast.parse(CODE)
+    for node in ast.walk(tree):
+        if hasattr(node, "lineno"):
+            assert buffer.get_segment(node) == ast.get_source_segment(CODE, node)
+
+
+def test_get_lines():
+    buffer = SourceBuffer(filename="testfile.py", text=CODE)
+    assert buffer.get_lines() == CODE.splitlines(keepends=True)
+    assert len(buffer.line_offsets) == CODE.count("\n") + 1
+    # only newlines end lines, like in ast
+    buffer = SourceBuffer(filename="testfile.py", text="x = 1\n\x0c\u2028y = 2")
+    assert buffer.get_lines() == ["x = 1\n", "\x0c\u2028y = 2"]
+
+
+def test_file_is_read_once(tmp_path):
+    filename = os.path.join(tmp_path, "testfile.py")
+    with open(filename, mode="w") as f:
+        f.write(CODE)
+    source_store = SourceStore()
+    assert source_store.get_source(filename) == CODE
+
+    # changes on disk are not picked up until the file is invalidated
+    with open(filename, mode="w") as f:
+        f.write("x = 1\n")
+    assert source_store.get_source(filename) == CODE
+    source_store.invalidate(filename)
+    assert source_store.get_source(filename) == "x = 1\n"
+
+
+def test_add_source():
+    source_store = SourceStore()
+    source_store.add_source("does_not_exist.py", CODE)
+    assert source_store.get_lines("does_not_exist.py")[0] == "class ClassA:\n"
+
+
+def test_git_source_store(tmp_path):
+    repo = Repo.init(tmp_path)
+    filename = os.path.join(tmp_path, "package", "testfile.py")
+    os.makedirs(os.path.dirname(filename))
+    with open(filename, mode="w", newline="") as f:
+        f.write(CODE.replace("\n", "\r\n"))
+    repo.index.add([filename])
+    author = Actor("test", "test@example.com")
+    commit = repo.index.commit("initial commit", author=author, committer=author).hexsha
+
+    # the working tree is changed, the store still reads the committed version
+    with open(filename, mode="w") as f:
+        f.write("x = 1\n")
+    new_filename = os.path.join(tmp_path, "new_file.py")
+    with open(new_filename, mode="w") as f:
+        f.write("y = 2\n")
+
+    git_source_store = GitSourceStore(repo=repo, commit=commit, working_dir=str(tmp_path))
+    assert git_source_store.has_file(filename)
+    assert git_source_store.get_source(filename) == CODE
+    assert not git_source_store.has_file(new_filename)
+    with pytest.raises(FileNotFoundError):
+        git_source_store.get_source(new_filename)
+    with open(filename) as f:
+        assert f.read() == "x = 1\n"
+
+    # before the first commit, no file exists
+    assert not GitSourceStore(repo=repo, commit=None, working_dir=str(tmp_path)).has_file(filename)